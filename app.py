@@ -4,12 +4,23 @@ import streamlit as st
 import pandas as pd
 import shutil
 import os
+import json
 from datetime import datetime, date, timedelta
 import database as db
+import case_bundle
+import case_listing
+import data_cache
+import dashboard_metrics
 import report_parser
 import doc_generator
+import log_writer
 import coc_parser
+import coc_scanner
+import coc_worker
+import ocr_cache
 import entitlements
+import profiler
+import search
 
 ACTIVE_CASES_DIR = os.path.join(os.path.dirname(__file__), "..", "Active Cases")
 
@@ -613,9 +624,68 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-db.init_db()
-db.seed_data()
-db.seed_default_admin()
+db.start_rerun()
+db.ensure_schema()
+
+# --- Hot-path queries ---
+# Module-level so tests/test_query_plans.py can check their plans against the
+# indexes from database._migrate_hot_path_indexes.
+
+CASES_SQL = "SELECT * FROM cases ORDER BY state, worker_name"
+WORKER_NAMES_SQL = "SELECT worker_name FROM cases ORDER BY worker_name"
+LATEST_COCS_SQL = """
+    SELECT lc.case_id, lc.cert_from, lc.cert_to, lc.capacity, lc.days_per_week, lc.hours_per_day,
+           cs.worker_name
+    FROM latest_certificates lc
+    JOIN cases cs ON lc.case_id = cs.id
+    ORDER BY lc.cert_to ASC
+"""
+CASE_CERTIFICATES_SQL = "SELECT * FROM certificates WHERE case_id = ? ORDER BY cert_to DESC"
+CASE_PAYROLL_SQL = "SELECT * FROM payroll_entries WHERE case_id = ? ORDER BY period_to DESC"
+PAYROLL_HISTORY_SQL = """
+    SELECT p.*, c.worker_name, c.state
+    FROM payroll_entries p
+    JOIN cases c ON p.case_id = c.id
+    ORDER BY p.period_to DESC
+"""
+CASE_DOCUMENTS_SQL = "SELECT * FROM documents WHERE case_id = ? ORDER BY doc_type"
+CASE_ACTIVITY_SQL = """
+    SELECT a.*, c.worker_name FROM activity_log a
+    LEFT JOIN cases c ON a.case_id = c.id
+    WHERE a.case_id = ? ORDER BY a.created_at DESC LIMIT ?
+"""
+RECENT_ACTIVITY_SQL = """
+    SELECT a.*, c.worker_name FROM activity_log a
+    LEFT JOIN cases c ON a.case_id = c.id
+    ORDER BY a.created_at DESC LIMIT ?
+"""
+AUDIT_LOG_SQL = "SELECT * FROM audit_log ORDER BY created_at DESC LIMIT 200"
+FOLLOW_UPS_SQL = """
+    SELECT co.*, c.worker_name FROM correspondence co
+    JOIN cases c ON co.case_id = c.id
+    WHERE co.follow_up_date IS NOT NULL AND co.follow_up_done = 0
+    ORDER BY co.follow_up_date
+"""
+CASE_CORRESPONDENCE_SQL = """
+    SELECT co.*, c.worker_name FROM correspondence co
+    JOIN cases c ON co.case_id = c.id
+    WHERE co.case_id = ? ORDER BY co.date DESC
+"""
+CORRESPONDENCE_SQL = """
+    SELECT co.*, c.worker_name FROM correspondence co
+    JOIN cases c ON co.case_id = c.id ORDER BY co.date DESC
+"""
+OPEN_EVENTS_SQL = """
+    SELECT ce.*, c.worker_name FROM calendar_events ce
+    LEFT JOIN cases c ON ce.case_id = c.id
+    WHERE ce.is_completed = 0
+    ORDER BY ce.event_date
+"""
+CALENDAR_EVENTS_SQL = """
+    SELECT ce.*, c.worker_name FROM calendar_events ce
+    LEFT JOIN cases c ON ce.case_id = c.id
+    ORDER BY ce.event_date DESC
+"""
 
 # --- Helpers ---
 
@@ -646,32 +716,21 @@ def calculate_days_lost(case_row):
     return int(days_since * 0.5)  # default: partial
 
 
+@data_cache.cached_loader("cases")
 def get_cases_df():
     conn = db.get_connection()
-    df = pd.read_sql_query("SELECT * FROM cases ORDER BY state, worker_name", conn)
-    conn.close()
+    df = pd.read_sql_query(CASES_SQL, conn)
     return df
 
 
+@data_cache.cached_loader("latest_certificates", "certificates", "cases")
 def get_latest_cocs():
     conn = db.get_connection()
-    df = pd.read_sql_query("""
-        SELECT c.case_id, c.cert_from, c.cert_to, c.capacity, c.days_per_week, c.hours_per_day,
-               cs.worker_name
-        FROM certificates c
-        JOIN cases cs ON c.case_id = cs.id
-        WHERE c.id IN (
-            SELECT id FROM certificates c2
-            WHERE c2.case_id = c.case_id
-            ORDER BY c2.cert_to DESC
-            LIMIT 1
-        )
-        ORDER BY c.cert_to ASC
-    """, conn)
-    conn.close()
+    df = pd.read_sql_query(LATEST_COCS_SQL, conn)
     return df
 
 
+@data_cache.cached_loader("terminations", "cases")
 def get_terminations():
     conn = db.get_connection()
     df = pd.read_sql_query("""
@@ -680,64 +739,35 @@ def get_terminations():
         JOIN cases c ON t.case_id = c.id
         ORDER BY t.status, c.worker_name
     """, conn)
-    conn.close()
     return df
 
 
 def get_documents(case_id):
     conn = db.get_connection()
-    df = pd.read_sql_query(
-        "SELECT * FROM documents WHERE case_id = ? ORDER BY doc_type", conn, params=(case_id,)
-    )
-    conn.close()
+    df = pd.read_sql_query(CASE_DOCUMENTS_SQL, conn, params=(case_id,))
     return df
 
 
 def get_activity_log(case_id=None, limit=50):
+    log_writer.flush()
     conn = db.get_connection()
     if case_id:
-        df = pd.read_sql_query(
-            """SELECT a.*, c.worker_name FROM activity_log a
-               LEFT JOIN cases c ON a.case_id = c.id
-               WHERE a.case_id = ? ORDER BY a.created_at DESC LIMIT ?""",
-            conn, params=(case_id, limit)
-        )
+        df = pd.read_sql_query(CASE_ACTIVITY_SQL, conn, params=(case_id, limit))
     else:
-        df = pd.read_sql_query(
-            """SELECT a.*, c.worker_name FROM activity_log a
-               LEFT JOIN cases c ON a.case_id = c.id
-               ORDER BY a.created_at DESC LIMIT ?""",
-            conn, params=(limit,)
-        )
-    conn.close()
+        df = pd.read_sql_query(RECENT_ACTIVITY_SQL, conn, params=(limit,))
     return df
 
 
 def log_activity(case_id, action, details=""):
-    conn = db.get_connection()
-    conn.execute(
-        "INSERT INTO activity_log (case_id, action, details) VALUES (?, ?, ?)",
-        (case_id, action, details)
-    )
-    conn.commit()
-    conn.close()
+    log_writer.log_activity(case_id, action, details)
 
 
 def log_audit(action, table_name=None, record_id=None, case_id=None,
               field_changed=None, old_value=None, new_value=None, details=None):
-    """Log an audit trail entry."""
+    """Log an audit trail entry (written in the background by log_writer)."""
     user = st.session_state.get("current_user", "system")
-    conn = db.get_connection()
-    conn.execute(
-        """INSERT INTO audit_log (user, action, table_name, record_id, case_id,
-           field_changed, old_value, new_value, details)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (user, action, table_name, record_id, case_id,
-         field_changed, str(old_value) if old_value is not None else None,
-         str(new_value) if new_value is not None else None, details)
-    )
-    conn.commit()
-    conn.close()
+    log_writer.log_audit(user, action, table_name, record_id, case_id,
+                         field_changed, old_value, new_value, details)
 
 
 def coc_status(cert_to_str):
@@ -778,12 +808,6 @@ def coc_status_emoji(color):
     return {"red": "🔴", "orange": "🟠", "green": "🟢"}.get(color, "⚪")
 
 
-def row_to_dict(conn, table, row):
-    """Convert a sqlite3.Row to a dict using table column names."""
-    cols = [desc[0] for desc in conn.execute(f"SELECT * FROM {table} LIMIT 0").description]
-    return dict(zip(cols, row))
-
-
 def save_coc_to_onedrive(worker_name: str, file_bytes: bytes, filename: str) -> str | None:
     """Save a COC PDF to the worker's Active Cases folder. Returns saved path or None."""
     if not os.path.isdir(ACTIVE_CASES_DIR):
@@ -817,34 +841,89 @@ def save_coc_to_onedrive(worker_name: str, file_bytes: bytes, filename: str) ->
     return dest
 
 
+@data_cache.cached_loader("cases")
 def get_worker_names_list():
     """Get list of worker names for COC matching."""
     conn = db.get_connection()
-    rows = conn.execute("SELECT worker_name FROM cases ORDER BY worker_name").fetchall()
-    conn.close()
+    rows = conn.execute(WORKER_NAMES_SQL).fetchall()
     return [r[0] for r in rows]
 
 
-def get_processed_coc_paths():
-    """Get set of already-processed COC file paths."""
-    conn = db.get_connection()
-    rows = conn.execute("SELECT file_path FROM processed_coc_files").fetchall()
-    conn.close()
-    return {r[0] for r in rows}
-
-
 def mark_coc_processed(file_path: str, case_id: int | None = None):
     """Mark a COC file as processed in the database."""
-    conn = db.get_connection()
-    try:
-        conn.execute(
-            "INSERT OR IGNORE INTO processed_coc_files (file_path, case_id) VALUES (?, ?)",
-            (file_path, case_id)
-        )
-        conn.commit()
-    except Exception:
-        pass
-    conn.close()
+    with db.transaction() as conn:
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO processed_coc_files (file_path, case_id) VALUES (?, ?)",
+                (file_path, case_id)
+            )
+        except Exception:
+            pass
+
+
+def import_coc_file(case_id: int, file_path: str, cert_from: str, cert_to: str, capacity: str = "Unknown",
+                    days_per_week=None, hours_per_day=None, notes: str = "", activity: str = "") -> bool:
+    """Add a certificate from a scanned COC file, mark the file processed and tick the checklist.
+
+    Returns False if the file had already been imported.
+    """
+    result = db.bulk_import_cocs([{
+        "case_id": case_id, "file_path": file_path, "cert_from": cert_from, "cert_to": cert_to,
+        "capacity": capacity, "days_per_week": days_per_week, "hours_per_day": hours_per_day,
+        "notes": notes, "activity": activity,
+    }])
+    return result["imported"] == 1
+
+
+def case_list_page(active: bool, key: str, states, capacities, priorities) -> list:
+    """Pager controls for one All Cases tab; returns the rows of the current page.
+
+    Visited pages are kept as a stack of keyset cursors in session state and
+    reset whenever the filters change.
+    """
+    filters = {"states": states, "capacities": capacities, "priorities": priorities}
+    signature = (tuple(states), tuple(capacities), tuple(priorities))
+    if st.session_state.get(f"{key}_filters") != signature:
+        st.session_state[f"{key}_filters"] = signature
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+
+    rows, has_more = case_listing.fetch_page(active, after=cursors[-1], **filters)
+    total = case_listing.count_cases(active, **filters)
+    if total > case_listing.PAGE_SIZE:
+        first = (len(cursors) - 1) * case_listing.PAGE_SIZE
+        pc1, pc2, pc3 = st.columns([1, 4, 1])
+        if pc1.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        pc2.caption(f"Showing {first + 1}–{first + len(rows)} of {total:,} cases")
+        if pc3.button("Next ▶", key=f"{key}_next", disabled=not has_more):
+            cursors.append(case_listing.page_key(rows[-1]))
+            st.rerun()
+    return rows
+
+
+# Search result kinds each role may see; None means all.
+SEARCH_KINDS_BY_ROLE = {
+    "admin": None,
+    "manager": ["case", "correspondence", "coc"],
+    "viewer": ["case"],
+}
+SEARCH_KIND_LABELS = {"case": "📁 Case", "correspondence": "✉️ Correspondence",
+                      "incident": "⚠️ Incident", "coc": "📄 Certificate"}
+
+
+def open_search():
+    """Sidebar search box callback: show the Search page for the new query."""
+    if st.session_state.global_search.strip() and st.session_state.page != "Search":
+        st.session_state.prev_page = st.session_state.page
+        st.session_state.page = "Search"
+        st.session_state.selected_case_id = None
+
+
+def toggle_profiling():
+    """Performance tab toggle callback; kept outside the widget key so it survives page changes."""
+    st.session_state.profile_reruns = st.session_state.profile_toggle
 
 
 # --- Session State Init ---
@@ -892,6 +971,10 @@ NAV_ITEMS = ["Dashboard", "All Cases", "Entitlements", "Calendar",
              "Incident Report", "Incidents Review", "Manage Users"]
 
 page = st.session_state.page
+db.set_query_label(page)
+# Opt-in rerun profile, stopped at the end of this script.
+_rerun_profile = (profiler.start(page)
+                  if profiler.ENABLED or st.session_state.get("profile_reruns") else None)
 
 # --- Navigation: query params handled FIRST ---
 _nav_param = st.query_params.get("nav")
@@ -1001,6 +1084,8 @@ if page not in ("Landing", "Login"):
     _disp = st.session_state.user_display_name or st.session_state.current_user or ""
     _role_label = (st.session_state.user_role or "").title()
     st.sidebar.markdown(f"**{_disp}** ({_role_label})")
+    st.sidebar.text_input("🔍 Search", key="global_search", on_change=open_search,
+                          placeholder="Worker, claim no., notes…")
     st.sidebar.divider()
     st.sidebar.caption("Filters")
 
@@ -1417,25 +1502,23 @@ elif page == "Incident Report":
             if not _inc_worker or not _inc_desc:
                 st.error("Worker name and incident description are required.")
             else:
-                conn = db.get_connection()
-                conn.execute("""
-                    INSERT INTO incidents (submitted_by, worker_name, date_of_incident, time_of_incident,
-                        site, entity, state, location_detail, injury_description, body_part, injury_type,
-                        first_aid_given, first_aid_details, witnesses, immediate_action,
-                        supervisor_name, supervisor_phone, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    st.session_state.user_id,
-                    _inc_worker, str(_inc_date), _inc_time,
-                    _inc_site, _inc_entity, _inc_state, _inc_location,
-                    _inc_desc, _inc_body,
-                    _inc_type if _inc_type != "-- Select --" else None,
-                    _inc_firstaid, _inc_firstaid_detail,
-                    _inc_witnesses, _inc_action,
-                    _inc_super_name, _inc_super_phone, _inc_notes,
-                ))
-                conn.commit()
-                conn.close()
+                with db.transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO incidents (submitted_by, worker_name, date_of_incident, time_of_incident,
+                            site, entity, state, location_detail, injury_description, body_part, injury_type,
+                            first_aid_given, first_aid_details, witnesses, immediate_action,
+                            supervisor_name, supervisor_phone, notes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        st.session_state.user_id,
+                        _inc_worker, str(_inc_date), _inc_time,
+                        _inc_site, _inc_entity, _inc_state, _inc_location,
+                        _inc_desc, _inc_body,
+                        _inc_type if _inc_type != "-- Select --" else None,
+                        _inc_firstaid, _inc_firstaid_detail,
+                        _inc_witnesses, _inc_action,
+                        _inc_super_name, _inc_super_phone, _inc_notes,
+                    ))
                 st.success("Incident report submitted successfully! The admin team will review it shortly.")
                 log_activity(None, "Incident submitted", f"Worker: {_inc_worker}, by {st.session_state.current_user}")
 
@@ -1459,7 +1542,6 @@ elif page == "Incidents Review":
                 CASE i.status WHEN 'Pending' THEN 0 WHEN 'Reviewed' THEN 1 ELSE 2 END,
                 i.created_at DESC
         """, conn)
-        conn.close()
 
         if len(incidents) == 0:
             st.info("No incident reports yet.")
@@ -1481,47 +1563,42 @@ elif page == "Incidents Review":
                         with _c3:
                             if st.button("Convert to Case", key=f"convert_{inc['id']}", type="primary"):
                                 # Create case from incident
-                                _conn = db.get_connection()
-                                _conn.execute("""
-                                    INSERT INTO cases (worker_name, state, entity, site, date_of_injury,
-                                        injury_description, injury_type, current_capacity, status, priority,
-                                        notes)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, 'Unknown', 'Active', 'MEDIUM', ?)
-                                """, (
-                                    inc["worker_name"], inc["state"] or "VIC",
-                                    inc["entity"], inc["site"], inc["date_of_incident"],
-                                    inc["injury_description"], inc["injury_type"],
-                                    f"From incident report. First aid: {inc['first_aid_given']}. Witnesses: {inc['witnesses'] or 'None'}",
-                                ))
-                                _new_case_id = _conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-                                # Mark incident as reviewed
-                                _conn.execute("""
-                                    UPDATE incidents SET status = 'Converted', reviewed_by = ?,
-                                        reviewed_at = ?, converted_case_id = ?
-                                    WHERE id = ?
-                                """, (st.session_state.user_id, datetime.now().isoformat(), _new_case_id, inc["id"]))
-                                _conn.commit()
-                                # Seed document checklist for new case
-                                _doc_types = ["Incident Report", "Claim Form", "Payslips (12 months)",
-                                    "PIAWE Calculation", "Certificate of Capacity (Current)",
-                                    "RTW Plan (Current)", "Suitable Duties Plan", "Medical Certificates",
-                                    "Insurance Correspondence", "Wage Records"]
-                                for _dt in _doc_types:
-                                    _is_present = 1 if _dt == "Incident Report" else 0
-                                    _conn.execute("INSERT INTO documents (case_id, doc_type, is_present) VALUES (?, ?, ?)",
-                                                  (_new_case_id, _dt, _is_present))
-                                _conn.commit()
-                                _conn.close()
+                                with db.transaction() as _conn:
+                                    _conn.execute("""
+                                        INSERT INTO cases (worker_name, state, entity, site, date_of_injury,
+                                            injury_description, injury_type, current_capacity, status, priority,
+                                            notes)
+                                        VALUES (?, ?, ?, ?, ?, ?, ?, 'Unknown', 'Active', 'MEDIUM', ?)
+                                    """, (
+                                        inc["worker_name"], inc["state"] or "VIC",
+                                        inc["entity"], inc["site"], inc["date_of_incident"],
+                                        inc["injury_description"], inc["injury_type"],
+                                        f"From incident report. First aid: {inc['first_aid_given']}. Witnesses: {inc['witnesses'] or 'None'}",
+                                    ))
+                                    _new_case_id = _conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                                    # Mark incident as reviewed
+                                    _conn.execute("""
+                                        UPDATE incidents SET status = 'Converted', reviewed_by = ?,
+                                            reviewed_at = ?, converted_case_id = ?
+                                        WHERE id = ?
+                                    """, (st.session_state.user_id, datetime.now().isoformat(), _new_case_id, inc["id"]))
+                                    # Seed document checklist for new case
+                                    _doc_types = ["Incident Report", "Claim Form", "Payslips (12 months)",
+                                        "PIAWE Calculation", "Certificate of Capacity (Current)",
+                                        "RTW Plan (Current)", "Suitable Duties Plan", "Medical Certificates",
+                                        "Insurance Correspondence", "Wage Records"]
+                                    for _dt in _doc_types:
+                                        _is_present = 1 if _dt == "Incident Report" else 0
+                                        _conn.execute("INSERT INTO documents (case_id, doc_type, is_present) VALUES (?, ?, ?)",
+                                                      (_new_case_id, _dt, _is_present))
                                 log_activity(_new_case_id, "Case created from incident", f"Incident #{inc['id']} by {st.session_state.current_user}")
                                 st.success(f"Case created for {inc['worker_name']}! (Case #{_new_case_id})")
                                 st.rerun()
 
                             if st.button("Dismiss", key=f"dismiss_{inc['id']}"):
-                                _conn = db.get_connection()
-                                _conn.execute("UPDATE incidents SET status = 'Dismissed', reviewed_by = ?, reviewed_at = ? WHERE id = ?",
-                                              (st.session_state.user_id, datetime.now().isoformat(), inc["id"]))
-                                _conn.commit()
-                                _conn.close()
+                                with db.transaction() as _conn:
+                                    _conn.execute("UPDATE incidents SET status = 'Dismissed', reviewed_by = ?, reviewed_at = ? WHERE id = ?",
+                                                  (st.session_state.user_id, datetime.now().isoformat(), inc["id"]))
                                 st.rerun()
 
             if len(_reviewed) > 0:
@@ -1709,36 +1786,33 @@ elif page == "New Case":
 
         submitted = st.form_submit_button("Create Case", type="primary")
         if submitted and new_name:
-            conn = db.get_connection()
-            conn.execute("""
-                INSERT INTO cases (worker_name, state, entity, site, date_of_injury,
-                    injury_description, current_capacity, shift_structure, piawe,
-                    reduction_rate, claim_number, priority, strategy, next_action, notes,
-                    email, phone, injury_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (new_name, new_state, new_entity, new_site,
-                  new_doi.isoformat() if new_doi else None,
-                  new_injury, new_capacity, new_shift,
-                  new_piawe if new_piawe > 0 else None,
-                  new_reduction, new_claim or None, new_priority,
-                  new_strategy, new_next, new_notes,
-                  new_email or None, new_phone or None, new_injury_type))
-            conn.commit()
-            new_case_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-            # Create document checklist — auto-mark incident report if uploaded
-            doc_types = [
-                "Incident Report", "Claim Form", "Payslips (12 months)",
-                "PIAWE Calculation", "Certificate of Capacity (Current)",
-                "RTW Plan (Current)", "Suitable Duties Plan", "Medical Certificates",
-                "Insurance Correspondence", "Wage Records"
-            ]
-            for dt in doc_types:
-                is_present = 1 if dt == "Incident Report" and has_report else 0
-                conn.execute("INSERT INTO documents (case_id, doc_type, is_present) VALUES (?, ?, ?)",
-                             (new_case_id, dt, is_present))
-            conn.commit()
-            conn.close()
+            with db.transaction() as conn:
+                conn.execute("""
+                    INSERT INTO cases (worker_name, state, entity, site, date_of_injury,
+                        injury_description, current_capacity, shift_structure, piawe,
+                        reduction_rate, claim_number, priority, strategy, next_action, notes,
+                        email, phone, injury_type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (new_name, new_state, new_entity, new_site,
+                      new_doi.isoformat() if new_doi else None,
+                      new_injury, new_capacity, new_shift,
+                      new_piawe if new_piawe > 0 else None,
+                      new_reduction, new_claim or None, new_priority,
+                      new_strategy, new_next, new_notes,
+                      new_email or None, new_phone or None, new_injury_type))
+                new_case_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+                # Create document checklist — auto-mark incident report if uploaded
+                doc_types = [
+                    "Incident Report", "Claim Form", "Payslips (12 months)",
+                    "PIAWE Calculation", "Certificate of Capacity (Current)",
+                    "RTW Plan (Current)", "Suitable Duties Plan", "Medical Certificates",
+                    "Insurance Correspondence", "Wage Records"
+                ]
+                for dt in doc_types:
+                    is_present = 1 if dt == "Incident Report" and has_report else 0
+                    conn.execute("INSERT INTO documents (case_id, doc_type, is_present) VALUES (?, ?, ?)",
+                                 (new_case_id, dt, is_present))
             log_activity(new_case_id, "Case Created", f"New case added for {new_name}")
 
             # Generate Register of Injury for download
@@ -1750,13 +1824,12 @@ elif page == "New Case":
             }
             incident_data.update({k: v for k, v in pre.items() if k not in incident_data or not incident_data[k]})
 
-            roi_bytes = doc_generator.generate_register_of_injury(incident_data)
-
             st.success(f"✅ Case created for {new_name}!")
             dl_col, nav_col = st.columns(2)
             dl_col.download_button(
                 label="📥 Download Register of Injury",
-                data=roi_bytes,
+                data=doc_generator.deferred(doc_generator.generate_register_of_injury, incident_data),
+                on_click="ignore",
                 file_name=f"Register_of_Injury_{new_name.replace(' ', '_')}.docx",
                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
             )
@@ -1781,29 +1854,14 @@ elif page == "Case Detail":
         st.warning("No case selected. Use the Back or Home button above.")
     else:
         # Fetch all data up front
-        conn = db.get_connection()
-        case_row = conn.execute("SELECT * FROM cases WHERE id = ?", (case_id,)).fetchone()
+        bundle = case_bundle.load_case_bundle(case_id)
 
-        if case_row is None:
-            conn.close()
+        if bundle is None:
             st.error("Case not found.")
         else:
-            case = row_to_dict(conn, "cases", case_row)
-
-            # Fetch latest COC
-            latest_coc_row = conn.execute(
-                "SELECT * FROM certificates WHERE case_id = ? ORDER BY cert_to DESC LIMIT 1",
-                (case_id,)
-            ).fetchone()
-            latest_coc = row_to_dict(conn, "certificates", latest_coc_row) if latest_coc_row else None
-
-            # Fetch termination
-            term_row = conn.execute(
-                "SELECT * FROM terminations WHERE case_id = ?", (case_id,)
-            ).fetchone()
-            termination = row_to_dict(conn, "terminations", term_row) if term_row else None
-
-            conn.close()
+            case = bundle.case
+            latest_coc = bundle.latest_coc
+            termination = bundle.termination
 
             # === HEADER ===
             back_col, spacer = st.columns([1, 5])
@@ -1817,7 +1875,10 @@ elif page == "Case Detail":
             st.caption(
                 f"Case #{case['id']} · {case['state']} · "
                 f"{case['entity'] or 'Unknown'} – {case['site'] or 'Unknown'} · "
-                f"Status: {case['status']} · {pri_e} {case['priority']}"
+                f"Status: {case['status']} · {pri_e} {case['priority']} · "
+                f"✉️ {bundle.correspondence_count} correspondence"
+                + (f" ({bundle.open_follow_ups} follow-up{'s' if bundle.open_follow_ups != 1 else ''} open)"
+                   if bundle.open_follow_ups else "")
             )
 
             # Key metrics row
@@ -1880,18 +1941,14 @@ elif page == "Case Detail":
             with _status_col2:
                 if current_status == "Active":
                     if st.button("Mark Inactive", key="cd_mark_inactive"):
-                        conn2 = db.get_connection()
-                        conn2.execute("UPDATE cases SET status = 'Inactive' WHERE id = ?", (case_id,))
-                        conn2.commit()
-                        conn2.close()
+                        with db.transaction() as conn2:
+                            conn2.execute("UPDATE cases SET status = 'Inactive' WHERE id = ?", (case_id,))
                         log_activity(case_id, "Status Changed", f"Case marked as Inactive")
                         st.rerun()
                 else:
                     if st.button("Mark Active", key="cd_mark_active"):
-                        conn2 = db.get_connection()
-                        conn2.execute("UPDATE cases SET status = 'Active' WHERE id = ?", (case_id,))
-                        conn2.commit()
-                        conn2.close()
+                        with db.transaction() as conn2:
+                            conn2.execute("UPDATE cases SET status = 'Active' WHERE id = ?", (case_id,))
                         log_activity(case_id, "Status Changed", f"Case marked as Active")
                         st.rerun()
 
@@ -1946,29 +2003,28 @@ elif page == "Case Detail":
                 injury_label = case.get("injury_type") or "General"
                 worker_slug = case['worker_name'].replace(' ', '_')
                 with dl1:
-                    tbt_bytes = doc_generator.generate_toolbox_talk(case)
                     st.download_button(
                         label=f"Toolbox Talk ({injury_label})",
-                        data=tbt_bytes,
+                        data=doc_generator.deferred(doc_generator.generate_toolbox_talk, case),
+                        on_click="ignore",
                         file_name=f"Toolbox_Talk_{worker_slug}.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                         use_container_width=True,
                     )
                 with dl2:
-                    coc_dict = dict(latest_coc) if latest_coc else None
-                    rtw_bytes = doc_generator.generate_rtw_plan(case, coc_dict)
                     st.download_button(
                         label="RTW Plan",
-                        data=rtw_bytes,
+                        data=doc_generator.deferred(doc_generator.generate_rtw_plan, case, latest_coc),
+                        on_click="ignore",
                         file_name=f"RTW_Plan_{worker_slug}.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                         use_container_width=True,
                     )
                 with dl3:
-                    roi_bytes = doc_generator.generate_register_of_injury(case)
                     st.download_button(
                         label="Register of Injury",
-                        data=roi_bytes,
+                        data=doc_generator.deferred(doc_generator.generate_register_of_injury, case),
+                        on_click="ignore",
                         file_name=f"Register_of_Injury_{worker_slug}.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                         use_container_width=True,
@@ -1977,11 +2033,7 @@ elif page == "Case Detail":
             # --- Certificates Tab ---
             with tab_coc:
                 conn = db.get_connection()
-                all_cocs = pd.read_sql_query(
-                    "SELECT * FROM certificates WHERE case_id = ? ORDER BY cert_to DESC",
-                    conn, params=(case_id,)
-                )
-                conn.close()
+                all_cocs = pd.read_sql_query(CASE_CERTIFICATES_SQL, conn, params=(case_id,))
 
                 # Latest COC summary
                 if len(all_cocs) > 0:
@@ -2051,6 +2103,17 @@ elif page == "Case Detail":
                                             st.markdown(f"**{field.replace('_', ' ').title()}:** {value}")
                                 else:
                                     st.warning("Could not extract fields from OCR. Please fill in manually below.")
+                                ocr_timings = parsed.get("_ocr_timings") or []
+                                if parsed.get("_ocr_cached"):
+                                    st.caption("OCR: reused cached result for this file.")
+                                elif ocr_timings:
+                                    method = parsed.get("_extraction_method", "ocr").replace("_", " ")
+                                    st.caption(
+                                        f"Read via {method}: {len(ocr_timings)} page(s) · "
+                                        f"text layer {sum(t['extract_s'] for t in ocr_timings):.1f}s · "
+                                        f"render {sum(t['render_s'] for t in ocr_timings):.1f}s · "
+                                        f"OCR {sum(t['ocr_s'] for t in ocr_timings):.1f}s"
+                                    )
                             except Exception as e:
                                 st.error(f"Error parsing COC: {e}")
                                 st.session_state["coc_prefill"] = {}
@@ -2108,20 +2171,17 @@ elif page == "Case Detail":
                             value=coc_pre.get("diagnosis", ""), key="cd_coc_notes_u")
 
                         if st.form_submit_button("Save Certificate", type="primary"):
-                            conn = db.get_connection()
-                            conn.execute("""
-                                INSERT INTO certificates (case_id, cert_from, cert_to, capacity,
-                                                         days_per_week, hours_per_day, notes)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (case_id, coc_from.isoformat(), coc_to.isoformat(),
-                                  coc_capacity, coc_days if coc_days > 0 else None,
-                                  coc_hours if coc_hours > 0 else None, coc_notes))
-                            conn.commit()
-                            conn.execute(
-                                "UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-                                (coc_capacity, case_id))
-                            conn.commit()
-                            conn.close()
+                            with db.transaction() as conn:
+                                conn.execute("""
+                                    INSERT INTO certificates (case_id, cert_from, cert_to, capacity,
+                                                             days_per_week, hours_per_day, notes)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                                """, (case_id, coc_from.isoformat(), coc_to.isoformat(),
+                                      coc_capacity, coc_days if coc_days > 0 else None,
+                                      coc_hours if coc_hours > 0 else None, coc_notes))
+                                conn.execute(
+                                    "UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                                    (coc_capacity, case_id))
 
                             # Save PDF to OneDrive folder
                             coc_bytes = st.session_state.get("coc_upload_bytes")
@@ -2132,12 +2192,10 @@ elif page == "Case Detail":
                                     mark_coc_processed(saved_path, case_id)
 
                             # Mark COC document as present
-                            conn2 = db.get_connection()
-                            conn2.execute(
-                                "UPDATE documents SET is_present=1 WHERE case_id=? AND doc_type LIKE '%Certificate of Capacity%'",
-                                (case_id,))
-                            conn2.commit()
-                            conn2.close()
+                            with db.transaction() as conn2:
+                                conn2.execute(
+                                    "UPDATE documents SET is_present=1 WHERE case_id=? AND doc_type LIKE '%Certificate of Capacity%'",
+                                    (case_id,))
 
                             log_activity(case_id, "COC Added (Upload)",
                                         f"COC {coc_from} to {coc_to} — {coc_capacity}. Saved to OneDrive.")
@@ -2164,20 +2222,17 @@ elif page == "Case Detail":
                         coc_notes = st.text_area("Notes", key="cd_coc_notes")
 
                         if st.form_submit_button("Add Certificate", type="primary"):
-                            conn = db.get_connection()
-                            conn.execute("""
-                                INSERT INTO certificates (case_id, cert_from, cert_to, capacity,
-                                                         days_per_week, hours_per_day, notes)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (case_id, coc_from.isoformat(), coc_to.isoformat(),
-                                  coc_capacity, coc_days if coc_days > 0 else None,
-                                  coc_hours if coc_hours > 0 else None, coc_notes))
-                            conn.commit()
-                            conn.execute(
-                                "UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-                                (coc_capacity, case_id))
-                            conn.commit()
-                            conn.close()
+                            with db.transaction() as conn:
+                                conn.execute("""
+                                    INSERT INTO certificates (case_id, cert_from, cert_to, capacity,
+                                                             days_per_week, hours_per_day, notes)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                                """, (case_id, coc_from.isoformat(), coc_to.isoformat(),
+                                      coc_capacity, coc_days if coc_days > 0 else None,
+                                      coc_hours if coc_hours > 0 else None, coc_notes))
+                                conn.execute(
+                                    "UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                                    (coc_capacity, case_id))
                             log_activity(case_id, "COC Added",
                                         f"New COC {coc_from} to {coc_to} — {coc_capacity}")
                             st.success("Certificate added!")
@@ -2186,11 +2241,7 @@ elif page == "Case Detail":
             # --- Payroll Tab ---
             with tab_payroll:
                 conn = db.get_connection()
-                payroll = pd.read_sql_query(
-                    "SELECT * FROM payroll_entries WHERE case_id = ? ORDER BY period_to DESC",
-                    conn, params=(case_id,)
-                )
-                conn.close()
+                payroll = pd.read_sql_query(CASE_PAYROLL_SQL, conn, params=(case_id,))
 
                 # Financial summary
                 st.markdown("#### Financial Summary")
@@ -2273,17 +2324,15 @@ elif page == "Case Detail":
                             top_up = 0
                         total = pay_wages + compensation + pay_backpay
 
-                        conn = db.get_connection()
-                        conn.execute("""
-                            INSERT INTO payroll_entries (case_id, period_from, period_to, piawe,
-                                reduction_rate, days_off, hours_worked, estimated_wages,
-                                compensation_payable, top_up, back_pay_expenses, total_payable, notes)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (case_id, pay_from.isoformat(), pay_to.isoformat(), pay_piawe,
-                              pay_rate, pay_days, pay_hours, pay_wages, compensation, top_up,
-                              pay_backpay, total, pay_notes))
-                        conn.commit()
-                        conn.close()
+                        with db.transaction() as conn:
+                            conn.execute("""
+                                INSERT INTO payroll_entries (case_id, period_from, period_to, piawe,
+                                    reduction_rate, days_off, hours_worked, estimated_wages,
+                                    compensation_payable, top_up, back_pay_expenses, total_payable, notes)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            """, (case_id, pay_from.isoformat(), pay_to.isoformat(), pay_piawe,
+                                  pay_rate, pay_days, pay_hours, pay_wages, compensation, top_up,
+                                  pay_backpay, total, pay_notes))
                         log_activity(case_id, "Payroll Entry",
                                     f"Period {pay_from} to {pay_to}: Total ${total:,.2f}")
                         st.success(f"Saved! Compensation: ${compensation:,.2f} | Total: ${total:,.2f}")
@@ -2339,16 +2388,14 @@ elif page == "Case Detail":
                         u_notes = st.text_area("Notes", value=t.get('notes') or "", key="cd_term_notes")
 
                         if st.form_submit_button("Update Termination", type="primary"):
-                            conn = db.get_connection()
-                            conn.execute("""
-                                UPDATE terminations SET status=?, letter_drafted=?, letter_sent=?,
-                                    response_received=?, notes=?, completed_date=?
-                                WHERE id=?
-                            """, (u_status, int(u_drafted), int(u_sent), int(u_response), u_notes,
-                                  date.today().isoformat() if u_status == "Completed" else None,
-                                  int(t['id'])))
-                            conn.commit()
-                            conn.close()
+                            with db.transaction() as conn:
+                                conn.execute("""
+                                    UPDATE terminations SET status=?, letter_drafted=?, letter_sent=?,
+                                        response_received=?, notes=?, completed_date=?
+                                    WHERE id=?
+                                """, (u_status, int(u_drafted), int(u_sent), int(u_response), u_notes,
+                                      date.today().isoformat() if u_status == "Completed" else None,
+                                      int(t['id'])))
                             log_activity(case_id, "Termination Updated", f"Status: {u_status}")
                             st.success("Termination updated!")
                             st.rerun()
@@ -2367,15 +2414,13 @@ elif page == "Case Detail":
                         term_notes = st.text_area("Notes", key="cd_new_term_notes")
 
                         if st.form_submit_button("Initiate Termination", type="primary"):
-                            conn = db.get_connection()
-                            conn.execute("""
-                                INSERT INTO terminations (case_id, termination_type, approved_by,
-                                                         approved_date, assigned_to, notes)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            """, (case_id, term_type, approved_by,
-                                  date.today().isoformat(), assigned_to, term_notes))
-                            conn.commit()
-                            conn.close()
+                            with db.transaction() as conn:
+                                conn.execute("""
+                                    INSERT INTO terminations (case_id, termination_type, approved_by,
+                                                             approved_date, assigned_to, notes)
+                                    VALUES (?, ?, ?, ?, ?, ?)
+                                """, (case_id, term_type, approved_by,
+                                      date.today().isoformat(), assigned_to, term_notes))
                             log_activity(case_id, "Termination Initiated",
                                         f"Type: {term_type}, Assigned to: {assigned_to}")
                             st.success("Termination initiated!")
@@ -2383,14 +2428,14 @@ elif page == "Case Detail":
 
             # --- Documents Tab ---
             with tab_docs:
-                docs = get_documents(case_id)
+                docs = bundle.documents
                 if len(docs) > 0:
-                    present = len(docs[docs['is_present'] == 1])
+                    present = bundle.documents_present
                     total = len(docs)
                     st.progress(present / total, text=f"Documents: {present}/{total} complete")
 
                     doc_cols = st.columns(5)
-                    for i, (_, doc) in enumerate(docs.iterrows()):
+                    for i, doc in enumerate(docs):
                         col_idx = i % 5
                         check = "✅" if doc["is_present"] else "❌"
                         doc_cols[col_idx].markdown(f"{check} {doc['doc_type']}")
@@ -2399,19 +2444,17 @@ elif page == "Case Detail":
                     st.markdown("#### Update Checklist")
                     doc_changes = {}
                     dcols = st.columns(2)
-                    for i, (_, doc) in enumerate(docs.iterrows()):
+                    for i, doc in enumerate(docs):
                         col = dcols[i % 2]
                         doc_changes[doc["id"]] = col.checkbox(
                             doc["doc_type"], value=bool(doc["is_present"]),
                             key=f"cd_doc_{doc['id']}")
 
                     if st.button("Save Document Checklist", key="cd_save_docs", type="primary"):
-                        conn = db.get_connection()
-                        for doc_id, present_val in doc_changes.items():
-                            conn.execute("UPDATE documents SET is_present=? WHERE id=?",
-                                       (int(present_val), int(doc_id)))
-                        conn.commit()
-                        conn.close()
+                        with db.transaction() as conn:
+                            for doc_id, present_val in doc_changes.items():
+                                conn.execute("UPDATE documents SET is_present=? WHERE id=?",
+                                           (int(present_val), int(doc_id)))
                         log_activity(case_id, "Documents Updated",
                                     f"Document checklist updated for {case['worker_name']}")
                         st.success("Document checklist saved!")
@@ -2457,32 +2500,30 @@ elif page == "Case Detail":
 
                     save = st.form_submit_button("Save Changes", type="primary")
                     if save:
-                        conn = db.get_connection()
-                        conn.execute("""
-                            UPDATE cases SET entity=?, site=?, injury_type=?,
-                                current_capacity=?, shift_structure=?, piawe=?,
-                                reduction_rate=?, priority=?, status=?, strategy=?,
-                                next_action=?, notes=?, email=?, phone=?,
-                                updated_at=CURRENT_TIMESTAMP
-                            WHERE id=?
-                        """, (edit_entity or None, edit_site or None, edit_injury_type,
-                              edit_capacity, edit_shift,
-                              edit_piawe if edit_piawe > 0 else None,
-                              edit_reduction, edit_priority, edit_status,
-                              edit_strategy, edit_next, edit_notes,
-                              edit_email or None, edit_phone or None,
-                              case_id))
-                        conn.commit()
-                        conn.close()
+                        with db.transaction() as conn:
+                            conn.execute("""
+                                UPDATE cases SET entity=?, site=?, injury_type=?,
+                                    current_capacity=?, shift_structure=?, piawe=?,
+                                    reduction_rate=?, priority=?, status=?, strategy=?,
+                                    next_action=?, notes=?, email=?, phone=?,
+                                    updated_at=CURRENT_TIMESTAMP
+                                WHERE id=?
+                            """, (edit_entity or None, edit_site or None, edit_injury_type,
+                                  edit_capacity, edit_shift,
+                                  edit_piawe if edit_piawe > 0 else None,
+                                  edit_reduction, edit_priority, edit_status,
+                                  edit_strategy, edit_next, edit_notes,
+                                  edit_email or None, edit_phone or None,
+                                  case_id))
                         log_activity(case_id, "Case Updated", f"Updated details for {case['worker_name']}")
                         st.success("Case updated!")
                         st.rerun()
 
             # --- Activity Tab ---
             with tab_log:
-                activity = get_activity_log(case_id=case_id, limit=50)
+                activity = bundle.activity
                 if len(activity) > 0:
-                    for _, entry in activity.iterrows():
+                    for entry in activity:
                         with st.container(border=True):
                             lc1, lc2 = st.columns([1, 3])
                             lc1.caption(entry['created_at'][:16] if entry['created_at'] else '')
@@ -2505,15 +2546,11 @@ elif page == "Dashboard":
     # Key metrics row — clickable
     col1, col2, col3, col4, col5, col6 = st.columns(6)
 
-    no_cap_count = len(active[active["current_capacity"] == "No Capacity"])
-    mod_count = len(active[active["current_capacity"] == "Modified Duties"])
-    pend_terms = terms[terms["status"] == "Pending"] if len(terms) > 0 else terms
-    expired_count = 0
-    for _, row in cocs.iterrows():
-        status_str, _ = coc_status(row["cert_to"])
-        if "EXPIRED" in status_str:
-            expired_count += 1
-    total_days_lost = sum(calculate_days_lost(row) for _, row in active.iterrows())
+    metrics = dashboard_metrics.dashboard_metrics(active, cocs, terms)
+    no_cap_count = metrics["no_capacity"]
+    mod_count = metrics["modified"]
+    expired_count = metrics["expired_cocs"]
+    total_days_lost = metrics["days_lost"]
 
     with col1:
         if st.button(f"**Active Cases**\n\n### {len(active)}", key="metric_active", use_container_width=True):
@@ -2530,7 +2567,7 @@ elif page == "Dashboard":
             st.session_state.metric_filter = "Modified Duties"
             st.rerun()
     with col4:
-        if st.button(f"**Terminations Pending**\n\n### {len(pend_terms)}", key="metric_term", use_container_width=True):
+        if st.button(f"**Terminations Pending**\n\n### {metrics['pending_terminations']}", key="metric_term", use_container_width=True):
             st.session_state.page = "Terminations"
             st.rerun()
     with col5:
@@ -2545,60 +2582,10 @@ elif page == "Dashboard":
     # Alerts section
     st.subheader("Alerts & Actions Required")
 
-    alerts = []
-
-    # COC alerts
-    for _, row in cocs.iterrows():
-        status, color = coc_status(row["cert_to"])
-        if color in ("red", "orange"):
-            alerts.append({
-                "type": "COC",
-                "severity": "URGENT" if color == "red" else "WARNING",
-                "worker": row["worker_name"],
-                "case_id": int(row["case_id"]),
-                "message": f"COC {status}",
-                "action": "Obtain new Certificate of Capacity"
-            })
-
-    # Check for cases with no COC at all
-    cases_with_coc = set(cocs["case_id"].tolist()) if len(cocs) > 0 else set()
-    for _, case in active.iterrows():
-        if case["id"] not in cases_with_coc and case["current_capacity"] not in ("Full Capacity",):
-            alerts.append({
-                "type": "COC",
-                "severity": "WARNING",
-                "worker": case["worker_name"],
-                "case_id": int(case["id"]),
-                "message": "No COC on record",
-                "action": "Obtain Certificate of Capacity from insurer"
-            })
+    alerts = dashboard_metrics.dashboard_alerts(active, cocs, terms)
 
-    # Termination alerts
-    for _, t in terms.iterrows():
-        if t["status"] == "Pending":
-            alerts.append({
-                "type": "TERMINATION",
-                "severity": "ACTION",
-                "worker": t["worker_name"],
-                "case_id": int(t["case_id"]),
-                "message": f"Termination pending - {t['termination_type']}",
-                "action": f"Follow up with {t['assigned_to']}"
-            })
-
-    # Missing PIAWE
-    for _, case in active.iterrows():
-        if pd.isna(case["piawe"]) and case["current_capacity"] not in ("Full Capacity",) and case["reduction_rate"] != "N/A":
-            alerts.append({
-                "type": "PAYROLL",
-                "severity": "INFO",
-                "worker": case["worker_name"],
-                "case_id": int(case["id"]),
-                "message": "PIAWE data missing",
-                "action": "Obtain PIAWE from insurer for payroll calculation"
-            })
-
-    if alerts:
-        for i, alert in enumerate(sorted(alerts, key=lambda x: {"URGENT": 0, "WARNING": 1, "ACTION": 2, "INFO": 3}[x["severity"]])):
+    if len(alerts) > 0:
+        for i, alert in enumerate(alerts.to_dict("records")):
             icon = {"URGENT": "🚨", "WARNING": "⚠️", "ACTION": "📋", "INFO": "ℹ️"}[alert["severity"]]
             _al, _ar = st.columns([3, 2])
             with _al:
@@ -2640,22 +2627,13 @@ elif page == "Dashboard":
 elif page == "All Cases":
     st.title("All Cases")
 
-    cases_df = get_cases_df()
-    filtered = cases_df[
-        (cases_df["state"].isin(filter_state)) &
-        (cases_df["current_capacity"].isin(filter_capacity)) &
-        (cases_df["priority"].isin(filter_priority))
-    ]
-
-    active_cases = filtered[filtered["status"] == "Active"]
-    inactive_cases = filtered[filtered["status"] != "Active"]
-
     tab_view, tab_inactive, tab_add, tab_edit = st.tabs(["Active Cases", "Inactive Cases", "Add New Case", "Edit Case"])
 
     with tab_view:
+        active_cases = case_list_page(True, "allcases_active", filter_state, filter_capacity, filter_priority)
         if len(active_cases) == 0:
             st.info("No active cases match the current filters.")
-        for _, case in active_cases.iterrows():
+        for case in active_cases:
             cap = capacity_emoji(case["current_capacity"])
             pri = priority_emoji(case["priority"])
             label = f"{pri} **{case['worker_name']}** · {case['state']} - {case['site'] or ''} | {cap} {case['current_capacity']} · {case['priority']}"
@@ -2666,9 +2644,10 @@ elif page == "All Cases":
                 st.rerun()
 
     with tab_inactive:
+        inactive_cases = case_list_page(False, "allcases_inactive", filter_state, filter_capacity, filter_priority)
         if len(inactive_cases) == 0:
             st.info("No inactive cases.")
-        for _, case in inactive_cases.iterrows():
+        for case in inactive_cases:
             cap = capacity_emoji(case["current_capacity"])
             label = f"**{case['worker_name']}** · {case['state']} - {case['site'] or ''} | {cap} {case['current_capacity']}"
             if st.button(label, key=f"inactive_{case['id']}", use_container_width=True):
@@ -2710,44 +2689,44 @@ elif page == "All Cases":
 
             submitted = st.form_submit_button("Add Case")
             if submitted and new_name:
-                conn = db.get_connection()
-                conn.execute("""
-                    INSERT INTO cases (worker_name, state, entity, site, date_of_injury,
-                        injury_description, current_capacity, shift_structure, piawe,
-                        reduction_rate, claim_number, priority, strategy, next_action, notes,
-                        email, phone, injury_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (new_name, new_state, new_entity, new_site,
-                      new_doi.isoformat() if new_doi else None,
-                      new_injury, new_capacity, new_shift,
-                      new_piawe if new_piawe > 0 else None,
-                      new_reduction, new_claim or None, new_priority,
-                      new_strategy, new_next, new_notes,
-                      new_email or None, new_phone or None, new_injury_type))
-                conn.commit()
-                case_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-
-                # Create document checklist
-                doc_types = [
-                    "Incident Report", "Claim Form", "Payslips (12 months)",
-                    "PIAWE Calculation", "Certificate of Capacity (Current)",
-                    "RTW Plan (Current)", "Suitable Duties Plan", "Medical Certificates",
-                    "Insurance Correspondence", "Wage Records"
-                ]
-                for dt in doc_types:
-                    conn.execute("INSERT INTO documents (case_id, doc_type) VALUES (?, ?)", (case_id, dt))
-                conn.commit()
-                conn.close()
+                with db.transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO cases (worker_name, state, entity, site, date_of_injury,
+                            injury_description, current_capacity, shift_structure, piawe,
+                            reduction_rate, claim_number, priority, strategy, next_action, notes,
+                            email, phone, injury_type)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (new_name, new_state, new_entity, new_site,
+                          new_doi.isoformat() if new_doi else None,
+                          new_injury, new_capacity, new_shift,
+                          new_piawe if new_piawe > 0 else None,
+                          new_reduction, new_claim or None, new_priority,
+                          new_strategy, new_next, new_notes,
+                          new_email or None, new_phone or None, new_injury_type))
+                    case_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+                    # Create document checklist
+                    doc_types = [
+                        "Incident Report", "Claim Form", "Payslips (12 months)",
+                        "PIAWE Calculation", "Certificate of Capacity (Current)",
+                        "RTW Plan (Current)", "Suitable Duties Plan", "Medical Certificates",
+                        "Insurance Correspondence", "Wage Records"
+                    ]
+                    for dt in doc_types:
+                        conn.execute("INSERT INTO documents (case_id, doc_type) VALUES (?, ?)", (case_id, dt))
                 log_activity(case_id, "Case Created", f"New case added for {new_name}")
                 st.success(f"Case added for {new_name}!")
                 st.rerun()
 
     with tab_edit:
         st.subheader("Edit Case")
-        cases_list = cases_df["worker_name"].tolist()
-        selected_name = st.selectbox("Select Case to Edit", cases_list)
-        if selected_name:
-            case = cases_df[cases_df["worker_name"] == selected_name].iloc[0]
+        conn = db.get_connection()
+        case_names = {row["id"]: row["worker_name"] for row in conn.execute(
+            "SELECT id, worker_name FROM cases ORDER BY state, worker_name")}
+        selected_id = st.selectbox("Select Case to Edit", list(case_names), format_func=case_names.get)
+        if selected_id:
+            selected_name = case_names[selected_id]
+            case = pd.read_sql_query("SELECT * FROM cases WHERE id = ?", conn, params=(selected_id,)).iloc[0]
             with st.form("edit_case_form"):
                 ec1, ec2 = st.columns(2)
                 edit_entity_ac = ec1.text_input("Entity", value=case["entity"] or "", key="ec_entity")
@@ -2782,20 +2761,18 @@ elif page == "All Cases":
 
                 save = st.form_submit_button("Save Changes")
                 if save:
-                    conn = db.get_connection()
-                    conn.execute("""
-                        UPDATE cases SET entity=?, site=?, injury_type=?,
-                            current_capacity=?, shift_structure=?, piawe=?,
-                            reduction_rate=?, priority=?, status=?, strategy=?,
-                            next_action=?, notes=?, updated_at=CURRENT_TIMESTAMP
-                        WHERE id=?
-                    """, (edit_entity_ac or None, edit_site_ac or None, edit_injury_type_ac,
-                          edit_capacity, edit_shift,
-                          edit_piawe if edit_piawe > 0 else None,
-                          edit_reduction, edit_priority, edit_status,
-                          edit_strategy, edit_next, edit_notes, int(case["id"])))
-                    conn.commit()
-                    conn.close()
+                    with db.transaction() as conn:
+                        conn.execute("""
+                            UPDATE cases SET entity=?, site=?, injury_type=?,
+                                current_capacity=?, shift_structure=?, piawe=?,
+                                reduction_rate=?, priority=?, status=?, strategy=?,
+                                next_action=?, notes=?, updated_at=CURRENT_TIMESTAMP
+                            WHERE id=?
+                        """, (edit_entity_ac or None, edit_site_ac or None, edit_injury_type_ac,
+                              edit_capacity, edit_shift,
+                              edit_piawe if edit_piawe > 0 else None,
+                              edit_reduction, edit_priority, edit_status,
+                              edit_strategy, edit_next, edit_notes, int(case["id"])))
                     log_activity(int(case["id"]), "Case Updated", f"Updated details for {selected_name}")
                     st.success("Case updated!")
                     st.rerun()
@@ -2813,16 +2790,47 @@ elif page == "All Cases":
                         doc["doc_type"], value=bool(doc["is_present"]), key=f"doc_{doc['id']}"
                     )
                 if st.button("Save Document Checklist"):
-                    conn = db.get_connection()
-                    for doc_id, present in doc_changes.items():
-                        conn.execute("UPDATE documents SET is_present=? WHERE id=?", (int(present), int(doc_id)))
-                    conn.commit()
-                    conn.close()
+                    with db.transaction() as conn:
+                        for doc_id, present in doc_changes.items():
+                            conn.execute("UPDATE documents SET is_present=? WHERE id=?", (int(present), int(doc_id)))
                     log_activity(int(case["id"]), "Documents Updated", f"Document checklist updated for {selected_name}")
                     st.success("Document checklist saved!")
                     st.rerun()
 
 
+# ============================================================
+# SEARCH PAGE
+# ============================================================
+elif page == "Search":
+    st.title("Search")
+
+    query = st.session_state.get("global_search", "").strip()
+    if not query:
+        st.info("Type in the 🔍 Search box in the sidebar to search cases, correspondence, incidents and certificates.")
+    else:
+        results = search.search(query, kinds=SEARCH_KINDS_BY_ROLE.get(st.session_state.user_role, ["case"]))
+        st.caption(f"{len(results)} result{'s' if len(results) != 1 else ''} for “{query}”")
+        if not results:
+            st.info("No matches. Try fewer or shorter words.")
+        for hit in results:
+            name = hit["worker_name"] or hit["title"] or "(no name)"
+            label = f"{SEARCH_KIND_LABELS[hit['kind']]} · **{name}**"
+            if hit["kind"] != "case" and hit["title"] and hit["title"] != name:
+                label += f" — {hit['title']}"
+            if hit["state"]:
+                label += f" · {hit['state']} · {hit['status']}"
+            if hit["case_id"] and hit["worker_name"]:
+                if st.button(label, key=f"search_{hit['kind']}_{hit['id']}", use_container_width=True):
+                    st.session_state.selected_case_id = int(hit["case_id"])
+                    st.session_state.prev_page = "Search"
+                    st.session_state.page = "Case Detail"
+                    st.rerun()
+            else:
+                st.markdown(label)
+            if hit["snippet"]:
+                st.caption(hit["snippet"])
+
+
 # ============================================================
 # INJURY ANALYTICS PAGE
 # ============================================================
@@ -3179,7 +3187,11 @@ elif page == "COC Tracker":
 
     st.divider()
 
-    tab_view, tab_add, tab_scan = st.tabs(["COC Status", "Add New COC", "Scan OneDrive Folders"])
+    worker_queue = coc_worker.queue_counts()
+    tab_view, tab_add, tab_scan, tab_suggest = st.tabs([
+        "COC Status", "Add New COC", "Scan OneDrive Folders",
+        f"Worker Suggestions ({worker_queue['suggestions']})",
+    ])
 
     with tab_view:
         st.subheader("Certificate Status (sorted by expiry)")
@@ -3216,20 +3228,17 @@ elif page == "COC Tracker":
             add_coc = st.form_submit_button("Add Certificate")
             if add_coc and selected_case:
                 case_id = case_options[selected_case]
-                conn = db.get_connection()
-                conn.execute("""
-                    INSERT INTO certificates (case_id, cert_from, cert_to, capacity, days_per_week, hours_per_day, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (case_id, coc_from.isoformat(), coc_to.isoformat(),
-                      coc_capacity, coc_days if coc_days > 0 else None,
-                      coc_hours if coc_hours > 0 else None, coc_notes))
-                conn.commit()
-
-                # Also update the case's current capacity
-                conn.execute("UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-                             (coc_capacity, case_id))
-                conn.commit()
-                conn.close()
+                with db.transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO certificates (case_id, cert_from, cert_to, capacity, days_per_week, hours_per_day, notes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, (case_id, coc_from.isoformat(), coc_to.isoformat(),
+                          coc_capacity, coc_days if coc_days > 0 else None,
+                          coc_hours if coc_hours > 0 else None, coc_notes))
+
+                    # Also update the case's current capacity
+                    conn.execute("UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                                 (coc_capacity, case_id))
 
                 worker_name = selected_case.split(" (")[0]
                 log_activity(case_id, "COC Added", f"New COC {coc_from} to {coc_to} - {coc_capacity}")
@@ -3240,35 +3249,99 @@ elif page == "COC Tracker":
         st.subheader("Auto-Detect COCs from OneDrive Folders")
         st.caption("Scans Active Cases folders for new COC PDFs that haven't been added to the system yet.")
 
-        if st.button("🔍 Scan for New COCs", type="primary"):
+        sc1, sc2 = st.columns([1, 3])
+        run_scan = sc1.button("🔍 Scan for New COCs", type="primary")
+        full_scan = sc2.checkbox("Full rescan", key="scan_full",
+                                 help="List every folder again instead of skipping unchanged ones.")
+        if run_scan:
             with st.spinner("Scanning Active Cases folders..."):
-                all_coc_files = coc_parser.scan_active_cases_for_cocs(ACTIVE_CASES_DIR)
-                processed_paths = get_processed_coc_paths()
-                new_files = [f for f in all_coc_files if f["file_path"] not in processed_paths]
-                st.session_state["scan_results"] = new_files
-                st.session_state["scan_total"] = len(all_coc_files)
+                scan_info = {}
+                changed = list(coc_scanner.scan_changes(ACTIVE_CASES_DIR, full=full_scan, stats=scan_info))
+                st.session_state["scan_results"] = coc_scanner.pending_cocs(ACTIVE_CASES_DIR)
+                st.session_state["scan_total"] = coc_scanner.count_cocs(ACTIVE_CASES_DIR)
+                st.session_state["scan_info"] = scan_info
+                st.session_state.pop("scan_parsed", None)
 
         scan_results = st.session_state.get("scan_results", None)
         scan_total = st.session_state.get("scan_total", 0)
 
         if scan_results is not None:
             st.info(f"Found **{scan_total}** total COC files. **{len(scan_results)}** are new (not yet in system).")
+            scan_info = st.session_state.get("scan_info")
+            if scan_info:
+                st.caption(
+                    f"Scanned in {scan_info['elapsed_s']:.2f}s · {scan_info['dirs_listed']} folder(s) listed, "
+                    f"{scan_info['dirs_skipped']} unchanged · {scan_info['changed']} new/changed file(s)"
+                )
+
+            import_msg = st.session_state.pop("scan_import_msg", None)
+            if import_msg:
+                st.success(import_msg)
 
             if len(scan_results) == 0:
                 st.success("All COC files are already tracked in the system!")
             else:
-                worker_names = get_worker_names_list()
+                name_index = coc_parser.get_name_index(tuple(get_worker_names_list()))
+                scan_parsed = st.session_state.get("scan_parsed", {})
+
+                if st.button(f"📄 Read certificates with OCR ({len(scan_results)} files)", key="scan_ocr",
+                             help=f"Parses the new files in parallel on {coc_parser.OCR_WORKERS} worker process(es)."):
+                    ocr_progress = st.progress(0.0, text="Reading certificates...")
+                    ocr_started = datetime.now()
+                    scan_parsed = {}
+                    for done, (path, fields) in enumerate(
+                            coc_parser.parse_coc_files([f["file_path"] for f in scan_results]), start=1):
+                        fields.pop("_raw_text", None)
+                        scan_parsed[path] = fields
+                        ocr_progress.progress(done / len(scan_results), text=f"Read {done} of {len(scan_results)}")
+                    st.session_state["scan_parsed"] = scan_parsed
+                    ocr_progress.empty()
+                    st.caption(f"Read {len(scan_parsed)} file(s) in {(datetime.now() - ocr_started).total_seconds():.1f}s.")
+
+                # Match every new file up front so all matched files can be imported at once.
+                scan_matches = []
+                for file_info in scan_results:
+                    fpath = file_info["file_path"]
+                    matched_worker = coc_parser.match_worker_from_path(fpath, name_index)
+
+                    # Try to extract dates from filename, then from OCR if it has been run
+                    fn_dates = coc_parser._extract_dates_from_filename(file_info["filename"])
+                    ocr_fields = scan_parsed.get(fpath, {})
+                    if not matched_worker and ocr_fields.get("worker_name"):
+                        matched_worker = coc_parser.match_worker_from_text(ocr_fields["worker_name"], name_index)
+                    if not (fn_dates.get("cert_from") and fn_dates.get("cert_to")) and ocr_fields.get("cert_to"):
+                        fn_dates = {"cert_from": ocr_fields.get("cert_from"), "cert_to": ocr_fields["cert_to"]}
+                    scan_matches.append((matched_worker, fn_dates))
+
+                ready = [(f, w, d) for f, (w, d) in zip(scan_results, scan_matches)
+                         if w and d.get("cert_from") and d.get("cert_to")]
+                if ready and st.button(f"📥 Import all matched ({len(ready)} files)", key="scan_import_all",
+                                       help="Adds a certificate for every file with a matched worker and dates."):
+                    conn = db.get_connection()
+                    case_ids = {row["worker_name"]: row["id"] for row in conn.execute(
+                        "SELECT id, worker_name FROM cases WHERE worker_name IN (SELECT value FROM json_each(?))",
+                        (json.dumps(sorted({w for _, w, _ in ready})),))}
+                    records = [{
+                        "case_id": case_ids[w], "file_path": f["file_path"],
+                        "cert_from": d["cert_from"], "cert_to": d["cert_to"],
+                        "capacity": scan_parsed.get(f["file_path"], {}).get("capacity") or "Unknown",
+                        "activity": f"From file: {f['filename']}",
+                    } for f, w, d in ready if w in case_ids]
+                    result = db.bulk_import_cocs(records)
+                    imported = {r["file_path"] for r in records}
+                    st.session_state["scan_results"] = [f for f in scan_results if f["file_path"] not in imported]
+                    st.session_state["scan_import_msg"] = (
+                        f"Imported {result['imported']} certificate(s)"
+                        + (f", skipped {result['skipped']} already imported" if result["skipped"] else "")
+                        + f" · {result['rows']} rows in {result['elapsed_s']:.2f}s ({result['rows_per_s']:,} rows/s)"
+                    )
+                    st.rerun()
 
                 for i, file_info in enumerate(scan_results[:20]):  # Show max 20
                     fname = file_info["filename"]
                     folder = file_info["folder_name"]
                     fpath = file_info["file_path"]
-
-                    # Try to match worker
-                    matched_worker = coc_parser.match_worker_from_path(fpath, worker_names)
-
-                    # Try to extract dates from filename
-                    fn_dates = coc_parser._extract_dates_from_filename(fname)
+                    matched_worker, fn_dates = scan_matches[i]
 
                     with st.container(border=True):
                         fc1, fc2, fc3 = st.columns([3, 2, 1])
@@ -3292,32 +3365,14 @@ elif page == "COC Tracker":
                                 if case_row:
                                     matched_case_id = case_row[0]
                                     # Add certificate with filename dates
-                                    conn.execute("""
-                                        INSERT INTO certificates (case_id, cert_from, cert_to, capacity, notes)
-                                        VALUES (?, ?, ?, ?, ?)
-                                    """, (matched_case_id, fn_dates["cert_from"], fn_dates["cert_to"],
-                                          "Unknown", f"Auto-imported from: {fname}"))
-                                    conn.commit()
-                                    # Mark as processed
-                                    conn.execute(
-                                        "INSERT OR IGNORE INTO processed_coc_files (file_path, case_id) VALUES (?, ?)",
-                                        (fpath, matched_case_id))
-                                    conn.commit()
-                                    # Update document checklist
-                                    conn.execute(
-                                        "UPDATE documents SET is_present=1 WHERE case_id=? AND doc_type LIKE '%Certificate%'",
-                                        (matched_case_id,))
-                                    conn.commit()
-                                    conn.close()
-                                    log_activity(matched_case_id, "COC Auto-Imported",
-                                                f"From file: {fname}")
+                                    import_coc_file(matched_case_id, fpath, fn_dates["cert_from"], fn_dates["cert_to"],
+                                                    activity=f"From file: {fname}")
                                     st.success(f"Added for {matched_worker}!")
                                     # Remove from scan results
                                     scan_results.pop(i)
                                     st.session_state["scan_results"] = scan_results
                                     st.rerun()
                                 else:
-                                    conn.close()
                                     st.warning("Could not find matching case.")
                         else:
                             fc3.button("Review", key=f"scan_review_{i}", disabled=True,
@@ -3327,6 +3382,66 @@ elif page == "COC Tracker":
                     st.caption(f"Showing first 20 of {len(scan_results)} new files.")
 
 
+    with tab_suggest:
+        st.subheader("Certificates Read by the Background Worker")
+        st.caption(
+            "Run `python -m coc_worker` alongside the app to read new COC PDFs in the background. "
+            f"Queue: {worker_queue['queued']} queued · {worker_queue['running']} running · "
+            f"{worker_queue['done']} done · {worker_queue['failed']} failed"
+        )
+        conn = db.get_connection()
+        suggestions = conn.execute("""
+            SELECT s.*, c.worker_name AS case_worker_name
+            FROM coc_suggestions s
+            LEFT JOIN cases c ON s.case_id = c.id
+            WHERE s.status = 'pending'
+            ORDER BY s.created_at DESC
+            LIMIT 50
+        """).fetchall()
+        if not suggestions:
+            st.info("No pending suggestions.")
+        for sug in suggestions:
+            with st.container(border=True):
+                sg1, sg2, sg3 = st.columns([3, 3, 2])
+                sg1.markdown(f"**{os.path.basename(sug['file_path'])}**")
+                sg1.caption(f"{sug['template'] or 'Unknown template'} · read via "
+                            f"{(sug['extraction_method'] or 'none').replace('_', ' ')}")
+                if sug["case_id"]:
+                    sg2.markdown(f"Worker: **{sug['case_worker_name']}**")
+                else:
+                    sg2.markdown(f"Worker: *Unmatched*{' (' + sug['worker_name'] + ')' if sug['worker_name'] else ''}")
+                if sug["cert_from"] and sug["cert_to"]:
+                    sg2.caption(f"{sug['cert_from']} to {sug['cert_to']} · {sug['capacity'] or 'Capacity unknown'}")
+                else:
+                    sg2.caption("Dates not found")
+
+                can_approve = bool(sug["case_id"] and sug["cert_from"] and sug["cert_to"])
+                if sg3.button("Approve", key=f"sug_ok_{sug['id']}", type="primary", disabled=not can_approve,
+                              help=None if can_approve else "Worker or dates missing. Add manually via Case Detail."):
+                    with db.transaction() as conn:
+                        import_coc_file(sug["case_id"], sug["file_path"], sug["cert_from"], sug["cert_to"],
+                                        sug["capacity"] or "Unknown", sug["days_per_week"], sug["hours_per_day"],
+                                        activity=f"Approved worker suggestion from file: "
+                                                 f"{os.path.basename(sug['file_path'])}")
+                        conn.execute("""
+                            UPDATE coc_suggestions
+                            SET status='approved', decided_at=CURRENT_TIMESTAMP, decided_by=?
+                            WHERE id=?
+                        """, (st.session_state.current_user, sug["id"]))
+                    st.rerun()
+                if sg3.button("Dismiss", key=f"sug_no_{sug['id']}"):
+                    with db.transaction() as conn:
+                        conn.execute("""
+                            UPDATE coc_suggestions
+                            SET status='dismissed', decided_at=CURRENT_TIMESTAMP, decided_by=?
+                            WHERE id=?
+                        """, (st.session_state.current_user, sug["id"]))
+                        conn.execute(
+                            "INSERT OR IGNORE INTO processed_coc_files (file_path, case_id, status) VALUES (?, ?, 'dismissed')",
+                            (sug["file_path"], sug["case_id"]))
+                    st.rerun()
+
+
 # ============================================================
 # TERMINATIONS PAGE
 # ============================================================
@@ -3392,13 +3507,11 @@ elif page == "Terminations":
 
                 if st.form_submit_button("Initiate Termination"):
                     case_id = case_options[sel]
-                    conn = db.get_connection()
-                    conn.execute("""
-                        INSERT INTO terminations (case_id, termination_type, approved_by, approved_date, assigned_to, notes)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (case_id, term_type, approved_by, date.today().isoformat(), assigned_to, term_notes))
-                    conn.commit()
-                    conn.close()
+                    with db.transaction() as conn:
+                        conn.execute("""
+                            INSERT INTO terminations (case_id, termination_type, approved_by, approved_date, assigned_to, notes)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        """, (case_id, term_type, approved_by, date.today().isoformat(), assigned_to, term_notes))
                     log_activity(case_id, "Termination Initiated", f"Type: {term_type}, Assigned to: {assigned_to}")
                     st.success("Termination initiated!")
                     st.rerun()
@@ -3424,16 +3537,14 @@ elif page == "Terminations":
                 u_notes = st.text_area("Notes", value=t["notes"] or "")
 
                 if st.form_submit_button("Update"):
-                    conn = db.get_connection()
-                    conn.execute("""
-                        UPDATE terminations SET status=?, letter_drafted=?, letter_sent=?,
-                            response_received=?, notes=?, completed_date=?
-                        WHERE id=?
-                    """, (u_status, int(u_drafted), int(u_sent), int(u_response), u_notes,
-                          date.today().isoformat() if u_status == "Completed" else None,
-                          int(t["id"])))
-                    conn.commit()
-                    conn.close()
+                    with db.transaction() as conn:
+                        conn.execute("""
+                            UPDATE terminations SET status=?, letter_drafted=?, letter_sent=?,
+                                response_received=?, notes=?, completed_date=?
+                            WHERE id=?
+                        """, (u_status, int(u_drafted), int(u_sent), int(u_response), u_notes,
+                              date.today().isoformat() if u_status == "Completed" else None,
+                              int(t["id"])))
                     log_activity(int(t["case_id"]), "Termination Updated", f"Status: {u_status}")
                     st.success("Updated!")
                     st.rerun()
@@ -3567,16 +3678,14 @@ elif page == "Payroll":
                 total = pay_wages + compensation + pay_backpay
 
                 case_id = case_options[sel_case]
-                conn = db.get_connection()
-                conn.execute("""
-                    INSERT INTO payroll_entries (case_id, period_from, period_to, piawe, reduction_rate,
-                        days_off, hours_worked, estimated_wages, compensation_payable, top_up,
-                        back_pay_expenses, total_payable, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (case_id, pay_from.isoformat(), pay_to.isoformat(), pay_piawe, pay_rate,
-                      pay_days, pay_hours, pay_wages, compensation, top_up, pay_backpay, total, pay_notes))
-                conn.commit()
-                conn.close()
+                with db.transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO payroll_entries (case_id, period_from, period_to, piawe, reduction_rate,
+                            days_off, hours_worked, estimated_wages, compensation_payable, top_up,
+                            back_pay_expenses, total_payable, notes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (case_id, pay_from.isoformat(), pay_to.isoformat(), pay_piawe, pay_rate,
+                          pay_days, pay_hours, pay_wages, compensation, top_up, pay_backpay, total, pay_notes))
                 log_activity(case_id, "Payroll Entry", f"Period {pay_from} to {pay_to}: Total ${total:,.2f}")
 
                 st.success(f"Saved! Compensation: ${compensation:,.2f} | Wages: ${pay_wages:,.2f} | Total: ${total:,.2f}")
@@ -3584,13 +3693,7 @@ elif page == "Payroll":
     with tab_history:
         st.subheader("Payroll History")
         conn = db.get_connection()
-        history = pd.read_sql_query("""
-            SELECT p.*, c.worker_name, c.state
-            FROM payroll_entries p
-            JOIN cases c ON p.case_id = c.id
-            ORDER BY p.period_to DESC
-        """, conn)
-        conn.close()
+        history = pd.read_sql_query(PAYROLL_HISTORY_SQL, conn)
 
         if len(history) > 0:
             st.dataframe(
@@ -3622,7 +3725,7 @@ elif page == "Payroll":
 elif page == "Activity Log":
     st.title("Activity Log")
 
-    tab_activity, tab_audit = st.tabs(["Activity Log", "Audit Trail"])
+    tab_activity, tab_audit, tab_perf = st.tabs(["Activity Log", "Audit Trail", "Performance"])
 
     with tab_activity:
         log = get_activity_log(limit=100)
@@ -3637,11 +3740,9 @@ elif page == "Activity Log":
             st.info("No activity recorded yet.")
 
     with tab_audit:
+        log_writer.flush()
         conn = db.get_connection()
-        audit = pd.read_sql_query(
-            "SELECT * FROM audit_log ORDER BY created_at DESC LIMIT 200", conn
-        )
-        conn.close()
+        audit = pd.read_sql_query(AUDIT_LOG_SQL, conn)
         if len(audit) > 0:
             st.dataframe(audit, use_container_width=True, hide_index=True,
                          column_config={
@@ -3658,6 +3759,147 @@ elif page == "Activity Log":
         else:
             st.info("No audit entries yet. Changes will be tracked here.")
 
+    with tab_perf:
+        _qstats = db.query_stats()
+        _qp1, _qp2, _qp3, _qp4 = st.columns(4)
+        _qp1.metric("Statements sampled", sum(q["count"] for q in _qstats),
+                    help=f"The most recent {db.QUERY_SAMPLES:,} statements run by this server process.")
+        _qp2.metric("Distinct statements", len(_qstats))
+        _qp3.metric("Time in SQLite", f"{sum(q['total_ms'] for q in _qstats):,.0f} ms")
+        _qp4.metric("Slow threshold", f"{db.SLOW_QUERY_MS:,.0f} ms")
+
+        st.markdown("#### Statements by total time")
+        if _qstats:
+            _qdf = pd.DataFrame(_qstats[:100])
+            _qdf["labels"] = _qdf["labels"].apply(lambda labels: ", ".join(labels[:3]))
+            st.dataframe(_qdf, use_container_width=True, hide_index=True,
+                         column_config={
+                             "sql": st.column_config.TextColumn("Statement", width="large"),
+                             "count": st.column_config.NumberColumn("Count"),
+                             "total_ms": st.column_config.NumberColumn("Total ms", format="%.1f"),
+                             "p50_ms": st.column_config.NumberColumn("p50 ms", format="%.2f"),
+                             "p95_ms": st.column_config.NumberColumn("p95 ms", format="%.2f"),
+                             "max_ms": st.column_config.NumberColumn("Max ms", format="%.2f"),
+                             "labels": st.column_config.TextColumn("Where", width="medium"),
+                         })
+        else:
+            st.info("No statements timed yet.")
+
+        st.markdown("#### Slow query log")
+        log_writer.flush()
+        slow = pd.read_sql_query(
+            "SELECT created_at, duration_ms, label, sql, params FROM slow_query_log "
+            "ORDER BY created_at DESC, id DESC LIMIT 200", db.get_connection()
+        )
+        if len(slow) > 0:
+            st.dataframe(slow, use_container_width=True, hide_index=True,
+                         column_config={
+                             "created_at": st.column_config.TextColumn("When", width="small"),
+                             "duration_ms": st.column_config.NumberColumn("ms", format="%.0f"),
+                             "label": st.column_config.TextColumn("Where", width="small"),
+                             "sql": st.column_config.TextColumn("Statement", width="large"),
+                             "params": st.column_config.TextColumn("Parameter types", width="medium"),
+                         })
+        else:
+            st.info(f"No statements have taken longer than {db.SLOW_QUERY_MS:,.0f} ms.")
+
+        st.markdown("#### Rerun profiles")
+        st.toggle("Profile my page reruns", value=st.session_state.get("profile_reruns", False),
+                  key="profile_toggle", on_change=toggle_profiling, disabled=profiler.ENABLED,
+                  help="Samples each rerun's stack every "
+                       f"{profiler.SAMPLE_INTERVAL_MS:g} ms. PROFILE_RERUNS=1 profiles every session.")
+        _profiles = profiler.recent_profiles()
+        if _profiles:
+            st.dataframe(pd.DataFrame([
+                {"when": p.started_at.strftime("%d/%m %H:%M:%S"), "page": p.label,
+                 "duration_ms": p.duration_ms, **{s: round(ms) for s, ms in p.sections.items()}}
+                for p in _profiles
+            ]), use_container_width=True, hide_index=True,
+                column_config={
+                    "when": st.column_config.TextColumn("When", width="small"),
+                    "page": st.column_config.TextColumn("Page", width="small"),
+                    "duration_ms": st.column_config.NumberColumn("Rerun ms", format="%.0f"),
+                    **{s: st.column_config.NumberColumn(f"{s.capitalize()} ms") for s in profiler.SECTIONS},
+                })
+            _stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            _pd1, _pd2, _pd3, _ = st.columns([1, 1, 1, 1])
+            _pd1.download_button("speedscope", data=lambda: profiler.to_speedscope(profiler.recent_profiles()),
+                                 file_name=f"reruns-{_stamp}.speedscope.json", mime="application/json",
+                                 on_click="ignore", use_container_width=True, key="perf_dl_speedscope",
+                                 help="Open at speedscope.app")
+            _pd2.download_button("Collapsed stacks", data=lambda: profiler.to_collapsed(profiler.recent_profiles()),
+                                 file_name=f"reruns-{_stamp}.collapsed.txt", mime="text/plain",
+                                 on_click="ignore", use_container_width=True, key="perf_dl_collapsed",
+                                 help="For flamegraph.pl, inferno or speedscope")
+            if _pd3.button("Clear profiles", key="perf_clear_profiles", use_container_width=True):
+                profiler.clear_profiles()
+                st.rerun()
+        else:
+            st.info(f"No profiles yet. The last {profiler.MAX_PROFILES} profiled reruns are kept here.")
+
+        _qb1, _qb2, _ = st.columns([1, 1, 2])
+        if _qb1.button("Reset statistics", key="perf_reset_stats", use_container_width=True):
+            db.reset_query_stats()
+            st.rerun()
+        if _qb2.button("Clear slow query log", key="perf_clear_slow", use_container_width=True):
+            with db.transaction() as conn:
+                conn.execute("DELETE FROM slow_query_log")
+            log_audit("Cleared slow query log", table_name="slow_query_log")
+            st.rerun()
+
+    with st.expander("Database connections"):
+        _pool = db.pool_stats()
+        _pc1, _pc2, _pc3, _pc4 = st.columns(4)
+        _pc1.metric("Opened this rerun", _pool["opened_this_run"])
+        _pc2.metric("Checkouts this rerun", _pool["checkouts_this_run"])
+        _pc3.metric("Opened since start", _pool["opened"])
+        _pc4.metric("Reused from pool", _pool["reused"])
+        st.caption(f"{_pool['in_use']} connection(s) held by script threads, {_pool['idle']} idle · "
+                   f"{_pool['statements_this_run']} SQL statement(s) so far this rerun.")
+
+    with st.expander("Log writer"):
+        _lw = log_writer.writer_stats()
+        _lc1, _lc2, _lc3, _lc4 = st.columns(4)
+        _lc1.metric("Queue depth", f"{_lw['queue_depth']} / {_lw['max_queue']}")
+        _lc2.metric("Rows written", _lw["written"])
+        _lc3.metric("Batches", _lw["batches"])
+        _lc4.metric("Flush latency", f"{_lw['flush_ms_avg']:.1f} ms",
+                    help=f"Last {_lw['flush_ms_last']:.1f} ms, max {_lw['flush_ms_max']:.1f} ms")
+        st.caption(
+            f"{_lw['inline']} row(s) written inside an open transaction · "
+            f"{_lw['waited']} wait(s) on a full queue · {_lw['errors']} write error(s), "
+            f"{_lw['dropped']} row(s) dropped · writer {'running' if _lw['running'] else 'idle'}"
+        )
+
+    with st.expander("Data cache"):
+        _cache_rows = data_cache.cache_stats()
+        if _cache_rows:
+            st.dataframe(pd.DataFrame(_cache_rows), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No cached loaders have been called yet.")
+        if st.button("Clear data cache", key="clear_data_cache"):
+            data_cache.clear_cache()
+            st.rerun()
+
+    with st.expander("OCR cache"):
+        _ocr = ocr_cache.cache_stats()
+        _oc1, _oc2, _oc3, _oc4 = st.columns(4)
+        _oc1.metric("Hit rate", f"{_ocr['hit_rate']:.0%}")
+        _oc2.metric("Hits / misses", f"{_ocr['hits']} / {_ocr['misses']}")
+        _oc3.metric("Entries", _ocr["entries"])
+        _oc4.metric("Size", f"{_ocr['size_bytes'] / 1024:,.0f} KB")
+        st.caption(
+            f"Limit {_ocr['max_bytes'] / 1024 / 1024:,.0f} MB · {_ocr['evictions']} evicted this session · "
+            f"{_ocr['lifetime_hits']} hits on stored entries"
+        )
+        _methods = coc_parser.extraction_stats()
+        st.caption(
+            "Parses this session: " + " · ".join(f"{k.replace('_', ' ')} {v}" for k, v in _methods.items())
+        )
+        if st.button("Clear OCR cache", key="clear_ocr_cache"):
+            ocr_cache.clear()
+            st.rerun()
+
 
 # ============================================================
 # ENTITLEMENTS PAGE
@@ -3876,12 +4118,7 @@ elif page == "Calendar":
 
         # Correspondence follow-ups
         conn = db.get_connection()
-        follow_ups = pd.read_sql_query("""
-            SELECT co.*, c.worker_name FROM correspondence co
-            JOIN cases c ON co.case_id = c.id
-            WHERE co.follow_up_date IS NOT NULL AND co.follow_up_done = 0
-            ORDER BY co.follow_up_date
-        """, conn)
+        follow_ups = pd.read_sql_query(FOLLOW_UPS_SQL, conn)
 
         for _, fu in follow_ups.iterrows():
             try:
@@ -3898,13 +4135,7 @@ elif page == "Calendar":
                 pass
 
         # Manual calendar events
-        manual_events = pd.read_sql_query("""
-            SELECT ce.*, c.worker_name FROM calendar_events ce
-            LEFT JOIN cases c ON ce.case_id = c.id
-            WHERE ce.is_completed = 0
-            ORDER BY ce.event_date
-        """, conn)
-        conn.close()
+        manual_events = pd.read_sql_query(OPEN_EVENTS_SQL, conn)
 
         for _, ev in manual_events.iterrows():
             try:
@@ -3932,11 +4163,11 @@ elif page == "Calendar":
 
             if overdue:
                 st.markdown(f"#### Overdue ({len(overdue)})")
-                for ev in overdue:
+                for i, ev in enumerate(overdue):
                     days_overdue = (date.today() - ev["date"]).days
                     label = f"🔴 **{ev['title']}** · {ev['type']} · {ev['date'].strftime('%d/%m/%Y')} ({days_overdue}d overdue)"
                     if ev.get("case_id"):
-                        if st.button(label, key=f"cal_o_{ev['title'][:20]}_{ev['date']}", use_container_width=True):
+                        if st.button(label, key=f"cal_o_{i}_{ev['date']}", use_container_width=True):
                             st.session_state.selected_case_id = int(ev["case_id"])
                             st.session_state.prev_page = "Calendar"
                             st.session_state.page = "Case Detail"
@@ -3946,12 +4177,12 @@ elif page == "Calendar":
 
             if upcoming:
                 st.markdown(f"#### Upcoming ({len(upcoming)})")
-                for ev in upcoming:
+                for i, ev in enumerate(upcoming):
                     days_until = (ev["date"] - date.today()).days
                     icon = "🟠" if days_until <= 7 else "🟢"
                     label = f"{icon} **{ev['title']}** · {ev['type']} · {ev['date'].strftime('%d/%m/%Y')} ({days_until}d)"
                     if ev.get("case_id"):
-                        if st.button(label, key=f"cal_u_{ev['title'][:20]}_{ev['date']}", use_container_width=True):
+                        if st.button(label, key=f"cal_u_{i}_{ev['date']}", use_container_width=True):
                             st.session_state.selected_case_id = int(ev["case_id"])
                             st.session_state.prev_page = "Calendar"
                             st.session_state.page = "Case Detail"
@@ -3977,25 +4208,18 @@ elif page == "Calendar":
             ev_desc = st.text_area("Description")
 
             if st.form_submit_button("Add Event", type="primary") and ev_title:
-                conn = db.get_connection()
-                conn.execute(
-                    "INSERT INTO calendar_events (case_id, title, event_date, event_type, description) VALUES (?, ?, ?, ?, ?)",
-                    (case_opts[ev_case], ev_title, ev_date.isoformat(), ev_type, ev_desc or None)
-                )
-                conn.commit()
-                conn.close()
+                with db.transaction() as conn:
+                    conn.execute(
+                        "INSERT INTO calendar_events (case_id, title, event_date, event_type, description) VALUES (?, ?, ?, ?, ?)",
+                        (case_opts[ev_case], ev_title, ev_date.isoformat(), ev_type, ev_desc or None)
+                    )
                 log_audit("Created", "calendar_events", case_id=case_opts[ev_case], details=f"Event: {ev_title} on {ev_date}")
                 st.success(f"Event added: {ev_title}")
                 st.rerun()
 
     with tab_all:
         conn = db.get_connection()
-        all_events = pd.read_sql_query("""
-            SELECT ce.*, c.worker_name FROM calendar_events ce
-            LEFT JOIN cases c ON ce.case_id = c.id
-            ORDER BY ce.event_date DESC
-        """, conn)
-        conn.close()
+        all_events = pd.read_sql_query(CALENDAR_EVENTS_SQL, conn)
         if len(all_events) > 0:
             st.dataframe(all_events[["event_date", "title", "event_type", "worker_name", "is_completed"]],
                          use_container_width=True, hide_index=True,
@@ -4030,17 +4254,9 @@ elif page == "Correspondence":
 
         conn = db.get_connection()
         if case_opts[sel_filter]:
-            corr = pd.read_sql_query("""
-                SELECT co.*, c.worker_name FROM correspondence co
-                JOIN cases c ON co.case_id = c.id
-                WHERE co.case_id = ? ORDER BY co.date DESC
-            """, conn, params=(case_opts[sel_filter],))
+            corr = pd.read_sql_query(CASE_CORRESPONDENCE_SQL, conn, params=(case_opts[sel_filter],))
         else:
-            corr = pd.read_sql_query("""
-                SELECT co.*, c.worker_name FROM correspondence co
-                JOIN cases c ON co.case_id = c.id ORDER BY co.date DESC
-            """, conn)
-        conn.close()
+            corr = pd.read_sql_query(CORRESPONDENCE_SQL, conn)
 
         if len(corr) == 0:
             st.info("No correspondence logged yet.")
@@ -4066,10 +4282,8 @@ elif page == "Correspondence":
                         if row["summary"]:
                             st.markdown(row["summary"])
                         if st.button("Mark Done", key=f"corr_done_{row['id']}"):
-                            conn2 = db.get_connection()
-                            conn2.execute("UPDATE correspondence SET follow_up_done = 1 WHERE id = ?", (row["id"],))
-                            conn2.commit()
-                            conn2.close()
+                            with db.transaction() as conn2:
+                                conn2.execute("UPDATE correspondence SET follow_up_done = 1 WHERE id = ?", (row["id"],))
                             log_audit("Updated", "correspondence", record_id=int(row["id"]),
                                       case_id=int(row["case_id"]), field_changed="follow_up_done",
                                       old_value="0", new_value="1")
@@ -4111,18 +4325,20 @@ elif page == "Correspondence":
 
             if st.form_submit_button("Log Correspondence", type="primary") and corr_case:
                 cid = case_opts_form[corr_case]
-                conn = db.get_connection()
-                conn.execute("""
-                    INSERT INTO correspondence (case_id, date, direction, contact_type, contact_name,
-                        subject, summary, follow_up_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (cid, corr_date.isoformat(), corr_dir, corr_type,
-                      corr_contact or None, corr_subject or None,
-                      corr_summary or None,
-                      corr_followup.isoformat() if corr_followup else None))
-                conn.commit()
-                conn.close()
+                with db.transaction() as conn:
+                    conn.execute("""
+                        INSERT INTO correspondence (case_id, date, direction, contact_type, contact_name,
+                            subject, summary, follow_up_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (cid, corr_date.isoformat(), corr_dir, corr_type,
+                          corr_contact or None, corr_subject or None,
+                          corr_summary or None,
+                          corr_followup.isoformat() if corr_followup else None))
                 log_activity(cid, "Correspondence Logged", f"{corr_dir} {corr_type}: {corr_subject}")
                 log_audit("Created", "correspondence", case_id=cid, details=f"{corr_dir} {corr_type}: {corr_subject}")
                 st.success("Correspondence logged!")
                 st.rerun()
+
+# Reruns cut short by st.rerun()/st.stop() never get here; their profiles end by themselves.
+if _rerun_profile is not None:
+    _rerun_profile.stop()
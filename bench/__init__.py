@@ -0,0 +1,15 @@
+"""
+Scale benchmarks for ClaimTrack Pro.
+
+    python -m bench                                  # 1k, 10k and 100k cases
+    python -m bench --scales 1000 --out run.json
+    python -m bench --compare bench/results/previous.json
+    python -m bench.pages                            # every page, rerun headless
+
+datagen builds a deterministic synthetic database per scale (kept under
+--db-dir and reused by later runs), suite times every data loader and page
+computation against it, and the run is written as a JSON report that
+--compare can diff against an earlier one. pages reruns each app.py page
+through Streamlit's AppTest as the signed-in admin and records wall time,
+SQL statements and element counts the same way.
+"""
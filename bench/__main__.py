@@ -0,0 +1,68 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import database as db
+from bench import datagen, harness, suite
+
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+RESULTS_DIR = os.path.join(harness.REPO_ROOT, "bench", "results")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Scale benchmarks.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated case counts (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-dir", default=os.path.join(tempfile.gettempdir(), "claimtrack-bench"),
+                        help="where generated databases are kept (default: %(default)s)")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the databases even if present")
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this text")
+    parser.add_argument("--out", help="report path (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio that fails --compare (default: %(default)s)")
+    args = parser.parse_args(argv)
+    # The cached loaders run outside a Streamlit session; don't warn about it on every call.
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    os.makedirs(args.db_dir, exist_ok=True)
+    report = {"meta": harness.report_meta(scales=scales, seed=args.seed), "results": {}}
+    for scale in scales:
+        path, built = datagen.use_database(scale, args.seed, args.db_dir, args.regenerate)
+        suite.reset_caches()
+        counts = {table: db.get_connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in datagen._INSERTS}
+        results = {"rows": counts, "generate_s": built["elapsed_s"] if built else None, "benchmarks": {}}
+        print(f"[bench] {scale:,} cases", flush=True)
+        for bench in suite.build_suite(seed=args.seed):
+            if args.filter not in bench.name:
+                continue
+            stats = harness.measure(bench)
+            results["benchmarks"][bench.name] = dict(stats, group=bench.group)
+            print(f"  {bench.group:12s} {bench.name:48s} median {stats['median_ms']:10.3f} ms  "
+                  f"min {stats['min_ms']:10.3f}  ({stats['rounds']} rounds)", flush=True)
+        report["results"][str(scale)] = results
+    db.close_all_connections()
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.write_report(report, out)
+    print(f"[bench] report -> {out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        lines, regressed = harness.compare(previous, report, args.threshold)
+        print("\n".join(lines))
+        if regressed:
+            print(f"[bench] {len(regressed)} regression(s) beyond x{args.threshold}", flush=True)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Accuracy and latency of COC field extraction on the labelled fixtures in
+tests/fixtures (coc_text/*.txt, labels in coc_templates.json).
+
+    python -m bench.coc_templates
+    python -m bench.coc_templates --rounds 2000 --pad 1
+
+Two paths take each text from template detection to the loose-date
+fallback (_finish_fields):
+
+- single pass: coc_parser._parse_text_fields, the scored classifier and
+  one ScanContext shared by whichever parsers run
+- four parsers: parse_coc_pdf before the classifier, rebuilt here:
+  substring template detection, then the state's parser, or for UNKNOWN
+  all three parsers merged. Each parser runs on its own context whose
+  patterns are plain re.search() calls over the whole text, as the
+  removed _find() helpers made them
+
+Accuracy is the share of labelled templates and fields each path gets
+right; fields a fixture doesn't label aren't scored. Latency is per
+document, best of --rounds, over all fixtures and over the UNKNOWN ones.
+The fixtures are short; --pad N appends N blocks of the clinical-notes
+filler bench.field_patterns uses, to time pages closer to OCR size.
+Exits 1 if the single-pass path gets fewer right than the old one.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+import coc_parser
+import patterns
+from bench import field_patterns, harness
+
+FIXTURES = os.path.join(harness.REPO_ROOT, "tests", "fixtures")
+DEFAULT_ROUNDS = 500
+
+
+def fixtures() -> list[tuple[str, dict, str]]:
+    """(file name, label, text) for every labelled fixture, by name."""
+    with open(os.path.join(FIXTURES, "coc_templates.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+    out = []
+    for name in sorted(labels):
+        with open(os.path.join(FIXTURES, "coc_text", name), encoding="utf-8") as f:
+            out.append((name, labels[name], f.read()))
+    return out
+
+
+def legacy_detect_template(text: str) -> str:
+    """coc_parser._detect_template before classify_template replaced it."""
+    text_lower = text.lower()
+    if "sira" in text_lower or "state insurance regulatory authority" in text_lower:
+        return "NSW_SIRA"
+    if "tac" in text_lower or "worksafe" in text_lower or "transport accident" in text_lower:
+        return "VIC_TAC"
+    if "queensland" in text_lower or "qcomp" in text_lower or "workcover queensland" in text_lower:
+        return "QLD"
+    if "certificate of capacity" in text_lower and "certificate of fitness" in text_lower:
+        return "NSW_SIRA"
+    if "certificate of capacity" in text_lower and ("worker first name" in text_lower
+                                                     or "worker last name" in text_lower):
+        return "VIC_TAC"
+    return "UNKNOWN"
+
+
+class _ReSearchScan(patterns.PatternScan):
+    def search(self, key: str):
+        regex = self.pattern_set.patterns[key][0]
+        return re.search(regex.pattern, self.context.text, regex.flags)
+
+
+class _ReSearchContext(patterns.ScanContext):
+    """A context whose scans skip the anchors: every search is a re.search() over the text."""
+
+    def scan(self, pattern_set: patterns.PatternSet) -> patterns.PatternScan:
+        return _ReSearchScan(pattern_set, self)
+
+
+def four_parser_fields(text: str) -> dict:
+    template = legacy_detect_template(text)
+    if template in coc_parser._TEMPLATE_PARSERS:
+        fields = coc_parser._TEMPLATE_PARSERS[template][0](_ReSearchContext(text))
+    else:
+        fields = {}
+        for parser, _ in coc_parser._TEMPLATE_PARSERS.values():
+            for k, v in parser(_ReSearchContext(text)).items():
+                if k not in fields and v:
+                    fields[k] = v
+    fields["template"] = template
+    return coc_parser._finish_fields(text, fields, "")
+
+
+def single_pass_fields(text: str) -> dict:
+    return coc_parser._finish_fields(text, coc_parser._parse_text_fields(text), "")
+
+
+PATHS = {"single pass": single_pass_fields, "four parsers": four_parser_fields}
+
+
+def score(label: dict, fields: dict) -> tuple[int, int]:
+    """(right, labelled): the template plus every labelled field."""
+    expected = dict(label["fields"], template=label["template"])
+    return sum(1 for k, v in expected.items() if fields.get(k) == v), len(expected)
+
+
+def _us_per_doc(func, texts: list[str], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - started)
+    return best / len(texts) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.coc_templates",
+                                     description="COC extraction accuracy and latency on the labelled fixtures.")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="timed rounds; the best is kept")
+    parser.add_argument("--pad", type=int, default=0, help="filler blocks appended to each text (default: 0)")
+    parser.add_argument("--out", help="report path (default: bench/results/coc-templates-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    padding = "".join("\n" + field_patterns._FILLER for _ in range(args.pad))
+    docs = [(name, label, text + padding) for name, label, text in fixtures()]
+    texts = [text for _, _, text in docs]
+    unknown = [text for _, label, text in docs if label["template"] == "UNKNOWN"]
+    size = sum(len(text) for text in texts) // len(texts)
+    print(f"[bench.coc_templates] {len(docs)} fixtures, {len(unknown)} UNKNOWN, {size:,} chars each on average",
+          flush=True)
+
+    results = {}
+    for path, func in PATHS.items():
+        right = labelled = 0
+        misses = []
+        for name, label, text in docs:
+            fields = func(text)
+            r, n = score(label, fields)
+            right += r
+            labelled += n
+            if r < n:
+                misses.append(name)
+        results[path] = {
+            "right": right, "labelled": labelled, "accuracy": round(right / labelled, 4), "misses": misses,
+            "us_per_doc": round(_us_per_doc(func, texts, args.rounds), 1),
+            "us_per_unknown_doc": round(_us_per_doc(func, unknown, args.rounds), 1),
+        }
+        stats = results[path]
+        print(f"  {path:14s} {right:3d}/{labelled} right ({stats['accuracy']:.1%})  "
+              f"{stats['us_per_doc']:8.1f} us/doc  {stats['us_per_unknown_doc']:8.1f} us/UNKNOWN doc"
+              + (f"  misses: {', '.join(misses)}" if misses else ""), flush=True)
+    single, four = results["single pass"], results["four parsers"]
+    print(f"  UNKNOWN: x{four['us_per_unknown_doc'] / single['us_per_unknown_doc']:.2f}", flush=True)
+
+    report = {"meta": harness.report_meta(fixtures=len(docs), rounds=args.rounds, pad=args.pad),
+              "results": {str(len(docs)): {"benchmarks": results}}}
+    out = args.out or os.path.join(harness.REPO_ROOT, "bench", "results",
+                                   "coc-templates-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.write_report(report, out)
+    print(f"[bench.coc_templates] report -> {out}")
+    if single["right"] < four["right"]:
+        print("[bench.coc_templates] the single pass gets fewer fields right", flush=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
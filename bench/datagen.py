@@ -0,0 +1,210 @@
+"""
+Deterministic synthetic workload for the benchmarks.
+
+generate() builds a database of N cases spread over VIC/NSW/QLD with
+certificate histories running up to the as-of date, weekly payroll,
+document checklists, correspondence, terminations, calendar events,
+incidents and activity/audit rows. The same (n_cases, seed, as_of) always
+produces the same rows. Everything goes through executemany inside one
+transaction, so the latest_certificates, case_filter_counts and
+search_index triggers fire exactly as they do for rows entered in the app.
+"""
+
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import database as db
+
+STATES = {"VIC": 0.45, "NSW": 0.35, "QLD": 0.20}
+SITES = {
+    "VIC": [("SGA", "Inghams"), ("SRS", "Alola"), ("Buna", "Tibaldi"), ("SGA", "Laverton"), ("SRS", "Dandenong")],
+    "NSW": [("Myola", "Casino"), ("Myola", "Tamworth"), ("SGA", "Wetherill Park"), ("SRS", "Smithfield")],
+    "QLD": [("SGA", "Murarrie"), ("Buna", "Toowoomba"), ("SRS", "Beenleigh")],
+}
+CAPACITIES = {"No Capacity": 0.25, "Modified Duties": 0.45, "Full Capacity": 0.15, "Uncertain": 0.08, "Unknown": 0.07}
+PRIORITIES = {"HIGH": 0.2, "MEDIUM": 0.5, "LOW": 0.3}
+STATUSES = {"Active": 0.7, "Closed": 0.25, "Pending Closure": 0.05}
+INJURY_TYPES = ["Manual Handling / Back", "Crush / Fracture", "Laceration / Cut", "Sprain / Strain", "Chemical",
+                "Disease / Illness", "Burns", "Slip / Trip / Fall", "Psychological", "Other", "Unknown"]
+INJURIES = ["Lower back pain - L4/L5 disc bulge", "Right wrist sprain", "Left hand laceration from knife",
+            "Shoulder strain lifting cartons", "Fractured metacarpal from conveyor", "Knee injury after slip on wet floor",
+            "Chemical burn to forearm", "Work-related stress claim", "Ankle sprain on loading dock", "Neck strain"]
+PHRASES = ["Awaiting updated COC from GP.", "Insurer has accepted liability.", "Worker attending physio twice weekly.",
+           "Suitable duties offered on day shift.", "Surgery scheduled, expect extended incapacity.",
+           "Case conference booked with treating doctor.", "Worker engaged lawyers.", "RTW plan signed off.",
+           "Premium impact being reviewed.", "Follow up with rehab provider."]
+FIRST_NAMES = ["Sayed", "Gzaw", "Ahmad", "Senait", "Tarnny", "Tofik", "Shane", "Shannon", "Mia", "Liam", "Olivia",
+               "Noah", "Ava", "Lucas", "Isla", "Jack", "Grace", "Leo", "Zoe", "Ethan", "Ruby", "Hamid", "Mariam",
+               "Tuan", "Linh", "Priya", "Arjun", "Fatima", "Omar", "Chloe"]
+LAST_NAMES = ["Hadi", "Shenkute", "Osmani", "Hailu", "Bloor", "Abdishekur", "Tapper", "Kelly", "Nguyen", "Smith",
+              "Brown", "Wilson", "Taylor", "Singh", "Tran", "Khan", "Martin", "Lee", "Walker", "Hall", "Ali", "Young",
+              "King", "Wright", "Scott", "Green", "Baker", "Adams", "Nelson", "Hill"]
+DOC_TYPES = ["Incident Report", "Claim Form", "Payslips (12 months)", "PIAWE Calculation",
+             "Certificate of Capacity (Current)", "RTW Plan (Current)", "Suitable Duties Plan",
+             "Medical Certificates", "Insurance Correspondence", "Wage Records"]
+CONTACT_TYPES = ["Email", "Phone", "Letter", "Portal", "Meeting", "Other"]
+EVENT_TYPES = ["COC Review", "Medical Appointment", "Insurer Meeting", "RTW Review", "Termination Deadline",
+               "Follow-up", "Other"]
+TERMINATION_TYPES = ["Inherent Requirements", "Show Cause", "Show Cause / Inherent Requirements",
+                     "Loss of Contract", "Other"]
+# Past the first few months, certificates usually run four weeks.
+COC_PERIOD_DAYS = 28
+MAX_CERTIFICATES = 12
+MAX_PAYROLL_WEEKS = 26
+
+
+def _pick(rnd: random.Random, weights: dict):
+    return rnd.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _text(rnd: random.Random, n: int) -> str:
+    return " ".join(rnd.choice(PHRASES) for _ in range(n))
+
+
+def _iso(d: date) -> str:
+    return d.isoformat()
+
+
+def _case_rows(rnd, case_id, as_of, rows):
+    state = _pick(rnd, STATES)
+    entity, site = rnd.choice(SITES[state])
+    doi = as_of - timedelta(days=rnd.randint(14, 3 * 365))
+    piawe = round(rnd.uniform(850, 2200), 2) if rnd.random() < 0.7 else None
+    status = _pick(rnd, STATUSES)
+    name = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {case_id}"
+    rows["cases"].append((
+        case_id, name, state, entity, site, _iso(doi), rnd.choice(INJURIES), _pick(rnd, CAPACITIES),
+        rnd.choice(["Pre-injury hours", "4 days x 8 hours", "Rotating roster", "N/A"]), piawe,
+        rnd.choice(["95%", "80%", "N/A"]) if piawe else "N/A", f"CLM{case_id:08d}", _iso(doi), status,
+        _text(rnd, 2), _text(rnd, 1), _pick(rnd, PRIORITIES), _text(rnd, 3), rnd.choice(INJURY_TYPES),
+    ))
+
+    # Certificates back-to-back from the date of injury; the last one may
+    # have lapsed, is current, or expires within the week.
+    n_certs = min(MAX_CERTIFICATES, max(1, (as_of - doi).days // COC_PERIOD_DAYS)) if rnd.random() < 0.9 else 0
+    end = as_of + timedelta(days=rnd.randint(-30, 25))
+    for k in range(n_certs, 0, -1):
+        cert_to = end - timedelta(days=(k - 1) * COC_PERIOD_DAYS)
+        rows["certificates"].append((case_id, _iso(cert_to - timedelta(days=COC_PERIOD_DAYS - 1)), _iso(cert_to),
+                                     _pick(rnd, CAPACITIES), rnd.choice([None, 3, 4, 5]),
+                                     rnd.choice([None, 4.0, 6.0, 7.6])))
+
+    if piawe and rnd.random() < 0.6:
+        rate = 0.95 if rnd.random() < 0.5 else 0.8
+        for week in range(rnd.randint(1, MAX_PAYROLL_WEEKS)):
+            period_to = as_of - timedelta(days=7 * week + as_of.weekday())
+            days_off = rnd.choice([0, 1, 2, 3, 5])
+            wages = round(piawe * (5 - days_off) / 5, 2)
+            comp = round(max(piawe * rate - wages, 0), 2)
+            rows["payroll_entries"].append((case_id, _iso(period_to - timedelta(days=6)), _iso(period_to), piawe,
+                                            rate, days_off, (5 - days_off) * 7.6, wages, comp, comp))
+
+    for doc_type in DOC_TYPES:
+        rows["documents"].append((case_id, doc_type, int(rnd.random() < 0.55)))
+
+    for _ in range(rnd.randint(0, 6)):
+        sent = as_of - timedelta(days=rnd.randint(0, 365))
+        follow_up = _iso(sent + timedelta(days=rnd.randint(3, 21))) if rnd.random() < 0.4 else None
+        rows["correspondence"].append((case_id, _iso(sent), rnd.choice(["Outbound", "Inbound"]),
+                                       rnd.choice(CONTACT_TYPES), rnd.choice(["Case manager", "Rehab provider", "GP"]),
+                                       rnd.choice(PHRASES)[:-1], _text(rnd, 2), follow_up,
+                                       int(follow_up is not None and rnd.random() < 0.5)))
+
+    if status == "Active" and rnd.random() < 0.08:
+        rows["terminations"].append((case_id, rnd.choice(TERMINATION_TYPES), "Henry", _iso(as_of - timedelta(days=30)),
+                                     "Mitch", rnd.choice(["Pending", "In Progress", "Completed"])))
+
+    if rnd.random() < 0.35:
+        event_day = as_of + timedelta(days=rnd.randint(-30, 60))
+        rows["calendar_events"].append((case_id, f"{rnd.choice(EVENT_TYPES)} - {name}", _iso(event_day),
+                                        rnd.choice(EVENT_TYPES), rnd.choice(PHRASES), int(event_day < as_of)))
+
+    if rnd.random() < 0.2:
+        rows["incidents"].append((name, _iso(doi), entity, site, state, rnd.choice(INJURIES),
+                                  rnd.choice(["Back", "Hand", "Shoulder", "Knee", "Wrist"]), rnd.choice(INJURY_TYPES),
+                                  "Converted", case_id))
+
+    stamp = f"{_iso(as_of - timedelta(days=rnd.randint(0, 365)))} {rnd.randint(7, 18):02d}:{rnd.randint(0, 59):02d}:00"
+    for k in range(rnd.randint(2, 8)):
+        rows["activity_log"].append((case_id, rnd.choice(["Case Updated", "COC Imported", "Note Added",
+                                                         "Documents Updated"]), rnd.choice(PHRASES), stamp))
+        rows["audit_log"].append(("admin", "UPDATE", "cases", case_id, case_id, "notes", None, rnd.choice(PHRASES),
+                                  None, stamp))
+
+
+_INSERTS = {
+    "cases": """INSERT INTO cases (id, worker_name, state, entity, site, date_of_injury, injury_description,
+                current_capacity, shift_structure, piawe, reduction_rate, claim_number, claim_start_date, status,
+                strategy, next_action, priority, notes, injury_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "certificates": """INSERT INTO certificates (case_id, cert_from, cert_to, capacity, days_per_week, hours_per_day)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+    "payroll_entries": """INSERT INTO payroll_entries (case_id, period_from, period_to, piawe, reduction_rate,
+                          days_off, hours_worked, estimated_wages, compensation_payable, total_payable)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "documents": "INSERT INTO documents (case_id, doc_type, is_present) VALUES (?, ?, ?)",
+    "correspondence": """INSERT INTO correspondence (case_id, date, direction, contact_type, contact_name, subject,
+                         summary, follow_up_date, follow_up_done) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "terminations": """INSERT INTO terminations (case_id, termination_type, approved_by, approved_date, assigned_to,
+                       status) VALUES (?, ?, ?, ?, ?, ?)""",
+    "calendar_events": """INSERT INTO calendar_events (case_id, title, event_date, event_type, description,
+                          is_completed) VALUES (?, ?, ?, ?, ?, ?)""",
+    "incidents": """INSERT INTO incidents (worker_name, date_of_incident, entity, site, state, injury_description,
+                    body_part, injury_type, status, converted_case_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "activity_log": "INSERT INTO activity_log (case_id, action, details, created_at) VALUES (?, ?, ?, ?)",
+    "audit_log": """INSERT INTO audit_log (user, action, table_name, record_id, case_id, field_changed, old_value,
+                    new_value, details, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+}
+BATCH_CASES = 5000
+
+
+def generate(n_cases: int, seed: int = 0, as_of: date | None = None) -> dict:
+    """
+    Fill the database at db.DB_PATH (which should be new) with ``n_cases``
+    cases and their history. Returns rows per table plus elapsed_s.
+    """
+    as_of = as_of or date.today()
+    rnd = random.Random(f"{seed}:{n_cases}:{as_of.isoformat()}")
+    started = time.perf_counter()
+    db.init_db()
+    db.seed_default_admin()
+    counts = dict.fromkeys(_INSERTS, 0)
+    conn = db.get_connection()
+    # A throwaway database: don't pay for fsyncs while loading it.
+    conn.execute("PRAGMA synchronous = OFF")
+    with db.transaction(immediate=True) as conn:
+        for first in range(1, n_cases + 1, BATCH_CASES):
+            rows = {table: [] for table in _INSERTS}
+            for case_id in range(first, min(first + BATCH_CASES, n_cases + 1)):
+                _case_rows(rnd, case_id, as_of, rows)
+            for table, sql in _INSERTS.items():
+                conn.executemany(sql, rows[table])
+                counts[table] += len(rows[table])
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("ANALYZE")
+    counts["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def use_database(scale: int, seed: int, db_dir: str, regenerate: bool = False) -> tuple[str, dict | None]:
+    """
+    Point db.DB_PATH at the generated database for a scale, building it first
+    if it is missing. Returns (path, generate() result or None if reused).
+    """
+    path = os.path.join(db_dir, f"bench_{scale}_seed{seed}.db")
+    db.close_all_connections()
+    if regenerate:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    built = None
+    db.DB_PATH = path
+    if not os.path.exists(path):
+        print(f"[bench] generating {scale:,} cases -> {path}", flush=True)
+        built = generate(scale, seed=seed)
+        print(f"[bench]   {built['elapsed_s']}s: " + ", ".join(
+            f"{table} {n:,}" for table, n in built.items() if table != "elapsed_s"), flush=True)
+    db.migrate()
+    return path, built
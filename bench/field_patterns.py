@@ -0,0 +1,213 @@
+"""
+Microbenchmark for the patterns registry: PatternSet/ScanContext against the
+per-pattern re.search() loop the parsers used before it.
+
+    python -m bench.field_patterns                     # 1000 documents
+    python -m bench.field_patterns --documents 4000 --rounds 10
+    python -m bench.field_patterns --dump bench/corpus  # write the corpus out
+
+The corpus is generated from CORPUS_TEMPLATES with a fixed seed, so every
+run (and every machine) sees the same documents: equal numbers of NSW SIRA,
+VIC TAC and QLD certificates and incident reports, each padded with
+clinical-notes filler as OCR text is.
+
+Three pairs are timed, best of --rounds:
+
+- own set: every pattern of the document's own PatternSet
+- all sets: every pattern of all four PatternSets, as classification and
+  the fall-back parsers do, sharing one ScanContext per document
+- parsers: coc_parser._parse_text_fields / report_parser._parse_fields_from_text
+  (current code only; their output is what the app stores)
+
+The loop side calls re.search(pattern, text, flags) with each registry
+pattern's source, which is what the removed _find() helpers did. Both sides
+must return the same match for every pattern, or the run exits 1.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import coc_parser
+import patterns
+import report_parser
+from bench import harness
+
+DEFAULT_DOCUMENTS = 1000
+DEFAULT_ROUNDS = 3
+SEED = 7
+
+PATTERN_SETS = {
+    "NSW_SIRA": patterns.COC_NSW_SIRA,
+    "VIC_TAC": patterns.COC_VIC_TAC,
+    "QLD": patterns.COC_QLD,
+    "INCIDENT_REPORT": patterns.INCIDENT_REPORT,
+}
+
+_FIRST = ["John", "Mary", "Peter", "Aisha", "Liam", "Chen", "Olivia", "Noah", "Sofia", "Jack"]
+_LAST = ["Smith", "Nguyen", "Brown", "Patel", "Wilson", "Taylor", "Kelly", "Martin", "Singh", "Jones"]
+_FILLER = "\n".join(f"Lorem ipsum clinical notes line {i} about the treating practitioner and the plan."
+                    for i in range(40))
+
+# Per template: the document, then the capacity paragraphs one is picked from.
+CORPUS_TEMPLATES = {
+    "NSW_SIRA": (
+        "SIRA certificate of capacity\nFirst name\n{first}\nLast name\n{last}\nClaim number\n{claim}\n"
+        "{filler}\n{capacity}\nNext review date {d3}\n"
+        "Diagnosis of work related injury/disease\nLumbar strain\n{filler}",
+        ("has capacity for some type of work from {d1} to {d2}\nfor 6 hours/day 3 days/week",
+         "has no current work capacity for any employment from {d1} until to {d2}",
+         "[x] is fit for pre-injury duties"),
+    ),
+    "VIC_TAC": (
+        "WorkSafe Victoria Certificate of Capacity\nWorker First Name\n{first}\nWorker Last Name\n{last}\n"
+        "Claim Number (if known)\n{claim}\n{filler}\nClinical Diagnosis ... is:\nShoulder sprain\n\n"
+        "{capacity}\n{filler}",
+        ("have no capacity for any employment from {d1} to {d2}",
+         "have a capacity for suitable employment from {d1} to {d2}",
+         "have a capacity for pre-injury employment from {d1}"),
+    ),
+    "QLD": (
+        "WorkCover Queensland Work Capacity Certificate\n(surname) {last}\n"
+        "I attended to (given names) {first}\n{filler}\n{capacity}\n{filler}",
+        ("No capacity for any type of work from {d1} to {d2}",
+         "suitable duties from {d1} to {d2}"),
+    ),
+    "INCIDENT_REPORT": (
+        "Incident Report\nEmployee Name: {first} {last}\nDate of Birth: {d1}\nPhone: 0412 345 678\n"
+        "Email: someone@example.com.au\nWorkplace: Dandenong depot\nDate of Injury: {d2}\n"
+        "Time of incident: 10:30 am\nWhat happened: lifted a box and felt pain\n\nWitnesses: Jane Doe\n"
+        "Employment type: Full time\nShift: 7am-3pm\nNature of injury: Strain\nBody part: Lower back\n"
+        "Treatment: First aid\nEmployer: Acme Pty Ltd\nClaim number: {claim}\nSupervisor: Bob\nState: VIC\n"
+        "{filler}",
+        ("",),
+    ),
+}
+
+
+def corpus(documents: int = DEFAULT_DOCUMENTS, seed: int = SEED) -> list[tuple[str, str]]:
+    """(template, text) pairs, cycling through the templates."""
+    rnd = random.Random(seed)
+
+    def day():
+        return f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/20{rnd.randint(23, 26)}"
+
+    docs = []
+    templates = list(CORPUS_TEMPLATES.items())
+    for i in range(documents):
+        name, (document, capacities) = templates[i % len(templates)]
+        values = {"first": rnd.choice(_FIRST), "last": rnd.choice(_LAST),
+                  "claim": rnd.randint(10 ** 6, 10 ** 9), "d1": day(), "d2": day(), "d3": day()}
+        capacity = rnd.choice(capacities).format(**values)
+        docs.append((name, document.format(capacity=capacity, filler=_FILLER, **values)))
+    return docs
+
+
+def _matches_loop(text: str, sets) -> list:
+    out = []
+    for pattern_set in sets:
+        for regex, _, _ in pattern_set.patterns.values():
+            m = re.search(regex.pattern, text, regex.flags)
+            out.append(m and (m.span(), m.groups()))
+    return out
+
+
+def _matches_registry(text: str, sets) -> list:
+    ctx = patterns.ScanContext(text)
+    out = []
+    for pattern_set in sets:
+        scan = ctx.scan(pattern_set)
+        for key in pattern_set.patterns:
+            m = scan.search(key)
+            out.append(m and (m.span(), m.groups()))
+    return out
+
+
+def _parse(docs) -> list[dict]:
+    return [report_parser._parse_fields_from_text(text) if name == "INCIDENT_REPORT"
+            else coc_parser._parse_text_fields(text) for name, text in docs]
+
+
+def _fields(results: list) -> int:
+    """Captured fields: pattern matches, or non-empty values of parsed dicts."""
+    return sum(sum(1 for m in r if m) if isinstance(r, list) else sum(1 for v in r.values() if v)
+               for r in results)
+
+
+def _best(func, rounds: int) -> tuple[float, list]:
+    result = func()  # warm-up: fills the re module's cache for the loop side
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def dump(docs, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    for i, (name, text) in enumerate(docs):
+        with open(os.path.join(directory, f"{i:05d}_{name.lower()}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.field_patterns",
+                                     description="Pattern registry against the per-pattern regex loop.")
+    parser.add_argument("--documents", type=int, default=DEFAULT_DOCUMENTS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="timed rounds; the best is kept")
+    parser.add_argument("--dump", metavar="DIR", help="write the corpus to DIR and exit")
+    parser.add_argument("--out", help="report path (default: bench/results/field-patterns-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    docs = corpus(args.documents, args.seed)
+    if args.dump:
+        dump(docs, args.dump)
+        print(f"[bench.field_patterns] {len(docs)} documents -> {args.dump}")
+        return 0
+    size = sum(len(text) for _, text in docs)
+    print(f"[bench.field_patterns] {len(docs)} documents, {size / 1024:.0f} KB", flush=True)
+
+    pairs = {
+        "own set": lambda match: [match(text, (PATTERN_SETS[name],)) for name, text in docs],
+        "all sets": lambda match: [match(text, PATTERN_SETS.values()) for _, text in docs],
+    }
+    results, mismatched = {}, []
+    for label, run in pairs.items():
+        loop_s, loop_out = _best(lambda: run(_matches_loop), args.rounds)
+        registry_s, registry_out = _best(lambda: run(_matches_registry), args.rounds)
+        if loop_out != registry_out:
+            mismatched.append(label)
+        fields = _fields(registry_out)
+        for side, seconds in (("re.search loop", loop_s), ("PatternSet", registry_s)):
+            name = f"{label} [{side}]"
+            results[name] = {"min_ms": round(seconds * 1000, 3), "fields": fields,
+                             "fields_per_s": round(fields / seconds)}
+            print(f"  {name:28s} {seconds * 1000:9.1f} ms  {fields / seconds:12,.0f} fields/s", flush=True)
+        print(f"  {label}: x{loop_s / registry_s:.2f}", flush=True)
+
+    parse_s, parsed = _best(lambda: _parse(docs), args.rounds)
+    fields = _fields(parsed)
+    results["parsers"] = {"min_ms": round(parse_s * 1000, 3), "fields": fields,
+                          "fields_per_s": round(fields / parse_s)}
+    print(f"  {'parsers':28s} {parse_s * 1000:9.1f} ms  {fields / parse_s:12,.0f} fields/s", flush=True)
+
+    report = {"meta": harness.report_meta(documents=len(docs), seed=args.seed, rounds=args.rounds,
+                                          corpus_bytes=size),
+              "results": {str(len(docs)): {"benchmarks": results}}}
+    out = args.out or os.path.join(harness.REPO_ROOT, "bench", "results",
+                                   "field-patterns-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.write_report(report, out)
+    print(f"[bench.field_patterns] report -> {out}")
+    if mismatched:
+        print(f"[bench.field_patterns] matches differ: {', '.join(mismatched)}", flush=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Timing harness and report helpers for the benchmark suite.
+
+Each benchmark is timed like pytest-benchmark does it: a warm-up call, then
+rounds until both a minimum round count and a minimum total time are reached
+(capped by a maximum time), reporting min/median/mean/stddev/max per call.
+"""
+
+import ast
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIN_ROUNDS = 5
+MIN_TIME_S = 0.2
+MAX_TIME_S = 3.0
+
+
+@dataclass
+class Benchmark:
+    group: str
+    name: str
+    func: Callable
+    setup: Callable | None = None  # run before every round, not timed
+
+
+def measure(bench: Benchmark, min_rounds: int = MIN_ROUNDS, min_time: float = MIN_TIME_S,
+            max_time: float = MAX_TIME_S) -> dict:
+    """Per-call timings of ``bench.func`` in milliseconds."""
+    if bench.setup:
+        bench.setup()
+    bench.func()  # warm-up: imports, statement cache, page cache
+    times = []
+    started = time.perf_counter()
+    while True:
+        if bench.setup:
+            bench.setup()
+        t = time.perf_counter()
+        bench.func()
+        times.append((time.perf_counter() - t) * 1000)
+        spent = time.perf_counter() - started
+        if (len(times) >= min_rounds and spent >= min_time) or spent >= max_time:
+            break
+    return {
+        "min_ms": round(min(times), 4),
+        "median_ms": round(statistics.median(times), 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+        "stddev_ms": round(statistics.stdev(times), 4) if len(times) > 1 else 0.0,
+        "max_ms": round(max(times), 4),
+        "rounds": len(times),
+    }
+
+
+def load_app_functions(*names: str, path: str = os.path.join(REPO_ROOT, "app.py")) -> dict:
+    """
+    Top-level functions from app.py, without running the page script.
+
+    app.py renders the whole UI at import time, so the named function
+    definitions (with their decorators) are lifted out of its source and
+    executed in a namespace that has app.py's imports.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    wanted = set(names)
+    body = [node for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))
+            or (isinstance(node, ast.FunctionDef) and node.name in wanted)]
+    missing = wanted - {node.name for node in body if isinstance(node, ast.FunctionDef)}
+    if missing:
+        raise LookupError(f"app.py has no top-level function(s): {', '.join(sorted(missing))}")
+    namespace = {"__name__": "app", "__file__": path}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), namespace)
+    return {name: namespace[name] for name in names}
+
+
+def app_constant(name: str, path: str = os.path.join(REPO_ROOT, "app.py")):
+    """The literal value of a top-level assignment in app.py, e.g. NAV_ITEMS."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError(f"app.py has no top-level assignment to {name}")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report_meta(**extra) -> dict:
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        **extra,
+    }
+
+
+def write_report(report: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def compare(old: dict, new: dict, threshold: float = 1.2) -> tuple[list[str], list[str]]:
+    """
+    Compare benchmarks present in both reports: (report lines, names of
+    regressed benchmarks). Uses the fastest round, which is far less noisy
+    than the median for sub-millisecond calls. Results that carry a
+    "queries" count also regress when it grows by more than ``threshold``.
+    """
+    lines, regressed = [], []
+    for scale, results in new["results"].items():
+        before = old.get("results", {}).get(scale)
+        if not before:
+            continue
+        lines.append(f"-- {scale} cases (min ms, old -> new)")
+        for name, stats in results["benchmarks"].items():
+            prev = before["benchmarks"].get(name)
+            if not prev:
+                continue
+            ratio = stats["min_ms"] / prev["min_ms"] if prev["min_ms"] else float("inf")
+            flag = "  SLOWER" if ratio >= threshold else ("  faster" if ratio <= 1 / threshold else "")
+            line = f"{name:48s} {prev['min_ms']:10.3f} -> {stats['min_ms']:10.3f}  x{ratio:5.2f}"
+            if "queries" in stats and "queries" in prev:
+                line += f"  queries {prev['queries']} -> {stats['queries']}"
+                if stats["queries"] > max(prev["queries"] * threshold, prev["queries"] + 1):
+                    flag += "  MORE QUERIES"
+            lines.append(line + flag)
+            if "SLOWER" in flag or "MORE QUERIES" in flag:
+                regressed.append(f"{scale}: {name}")
+    return lines, regressed
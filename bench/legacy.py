@@ -0,0 +1,219 @@
+"""
+Before/after benchmarks: the current implementations against the code they
+replaced.
+
+    python -m bench.legacy                          # 100k cases, 50k active
+    python -m bench.legacy --scale 10000 --active 5000 --rounds 5
+
+latest_cocs: app.get_latest_cocs, which reads the trigger-maintained
+latest_certificates table (migration 4), against the correlated subquery
+over certificates it replaced, across every certificate in the database
+(~900k at 100k cases).
+
+dashboard: dashboard_metrics.dashboard_metrics and dashboard_alerts against
+the Dashboard's former iterrows() loops over coc_status and
+calculate_days_lost, for the first --active active cases with their latest
+certificates and terminations.
+
+Each pair is checked to produce the same result before it is timed; a
+mismatch exits 1. The legacy versions are slow by design: at the defaults
+a run takes a few minutes.
+"""
+
+import argparse
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import dashboard_metrics
+import database as db
+from bench import datagen, harness
+
+DEFAULT_SCALE = 100_000
+DEFAULT_ACTIVE = 50_000
+DEFAULT_ROUNDS = 2
+
+# get_latest_cocs before migration 4.
+LEGACY_LATEST_COCS_SQL = """
+    SELECT c.case_id, c.cert_from, c.cert_to, c.capacity, c.days_per_week, c.hours_per_day,
+           cs.worker_name
+    FROM certificates c
+    JOIN cases cs ON c.case_id = cs.id
+    WHERE c.id IN (
+        SELECT id FROM certificates c2
+        WHERE c2.case_id = c.case_id
+        ORDER BY c2.cert_to DESC
+        LIMIT 1
+    )
+    ORDER BY c.cert_to ASC
+"""
+
+_SEVERITY_RANK = {"URGENT": 0, "WARNING": 1, "ACTION": 2, "INFO": 3}
+
+
+def legacy_latest_cocs() -> pd.DataFrame:
+    return pd.read_sql_query(LEGACY_LATEST_COCS_SQL, db.get_connection())
+
+
+def legacy_dashboard(active, cocs, terms, coc_status, calculate_days_lost) -> tuple[dict, list[dict]]:
+    """The Dashboard's metric counts and alert list as the page computed them before dashboard_metrics."""
+    pend_terms = terms[terms["status"] == "Pending"] if len(terms) > 0 else terms
+    expired_count = 0
+    for _, row in cocs.iterrows():
+        status_str, _ = coc_status(row["cert_to"])
+        if "EXPIRED" in status_str:
+            expired_count += 1
+    metrics = {
+        "active": len(active),
+        "no_capacity": len(active[active["current_capacity"] == "No Capacity"]),
+        "modified": len(active[active["current_capacity"] == "Modified Duties"]),
+        "pending_terminations": len(pend_terms),
+        "expired_cocs": expired_count,
+        "days_lost": sum(calculate_days_lost(row) for _, row in active.iterrows()),
+    }
+
+    alerts = []
+    for _, row in cocs.iterrows():
+        status, color = coc_status(row["cert_to"])
+        if color in ("red", "orange"):
+            alerts.append({
+                "type": "COC",
+                "severity": "URGENT" if color == "red" else "WARNING",
+                "worker": row["worker_name"],
+                "case_id": int(row["case_id"]),
+                "message": f"COC {status}",
+                "action": "Obtain new Certificate of Capacity"
+            })
+    cases_with_coc = set(cocs["case_id"].tolist()) if len(cocs) > 0 else set()
+    for _, case in active.iterrows():
+        if case["id"] not in cases_with_coc and case["current_capacity"] not in ("Full Capacity",):
+            alerts.append({
+                "type": "COC",
+                "severity": "WARNING",
+                "worker": case["worker_name"],
+                "case_id": int(case["id"]),
+                "message": "No COC on record",
+                "action": "Obtain Certificate of Capacity from insurer"
+            })
+    for _, t in terms.iterrows():
+        if t["status"] == "Pending":
+            alerts.append({
+                "type": "TERMINATION",
+                "severity": "ACTION",
+                "worker": t["worker_name"],
+                "case_id": int(t["case_id"]),
+                "message": f"Termination pending - {t['termination_type']}",
+                "action": f"Follow up with {t['assigned_to']}"
+            })
+    for _, case in active.iterrows():
+        if pd.isna(case["piawe"]) and case["current_capacity"] not in ("Full Capacity",) \
+                and case["reduction_rate"] != "N/A":
+            alerts.append({
+                "type": "PAYROLL",
+                "severity": "INFO",
+                "worker": case["worker_name"],
+                "case_id": int(case["id"]),
+                "message": "PIAWE data missing",
+                "action": "Obtain PIAWE from insurer for payroll calculation"
+            })
+    return metrics, sorted(alerts, key=lambda x: _SEVERITY_RANK[x["severity"]])
+
+
+def current_dashboard(active, cocs, terms) -> tuple[dict, list[dict]]:
+    return (dashboard_metrics.dashboard_metrics(active, cocs, terms),
+            dashboard_metrics.dashboard_alerts(active, cocs, terms).to_dict("records"))
+
+
+def _latest_by_case(df: pd.DataFrame) -> list[tuple]:
+    # Ties on cert_to may pick a different certificate; compare the dates only.
+    return sorted(zip(df["case_id"].tolist(), df["cert_to"].tolist()))
+
+
+def _timed(name: str, func, rounds: int) -> dict:
+    stats = harness.measure(harness.Benchmark("legacy", name, func), min_rounds=rounds, min_time=0,
+                            max_time=math.inf)
+    print(f"  {name:40s} median {stats['median_ms']:10.1f} ms  min {stats['min_ms']:10.1f}  "
+          f"({stats['rounds']} rounds)", flush=True)
+    return stats
+
+
+def _speedup(results: dict, before: str, after: str) -> str:
+    ratio = results[before]["min_ms"] / max(results[after]["min_ms"], 1e-9)
+    return f"  {after}: x{ratio:.1f} faster than {before}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.legacy",
+                                     description="Current implementations against the code they replaced.")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="case count (default: %(default)s)")
+    parser.add_argument("--active", type=int, default=DEFAULT_ACTIVE,
+                        help="active cases for the dashboard pair (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-dir", default=os.path.join(tempfile.gettempdir(), "claimtrack-bench"),
+                        help="where generated databases are kept (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="timed rounds after a warm-up")
+    parser.add_argument("--out", help="report path (default: bench/results/legacy-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    datagen.use_database(args.scale, args.seed, args.db_dir)
+    app = harness.load_app_functions("get_cases_df", "get_latest_cocs", "get_terminations",
+                                     "coc_status", "calculate_days_lost")
+    get_latest_cocs = app["get_latest_cocs"].uncached
+    conn = db.get_connection()
+    certificates = conn.execute("SELECT COUNT(*) FROM certificates").fetchone()[0]
+    print(f"[bench.legacy] {args.scale:,} cases, {certificates:,} certificates", flush=True)
+
+    failed = []
+    results = {}
+    if _latest_by_case(legacy_latest_cocs()) != _latest_by_case(get_latest_cocs()):
+        failed.append("latest_cocs")
+    results["latest_cocs [correlated subquery]"] = _timed("latest_cocs [correlated subquery]",
+                                                         legacy_latest_cocs, args.rounds)
+    results["latest_cocs [latest_certificates]"] = _timed("latest_cocs [latest_certificates]",
+                                                         get_latest_cocs, args.rounds)
+
+    cases = app["get_cases_df"].uncached()
+    active = cases[cases["status"] == "Active"].head(args.active)
+    cocs = get_latest_cocs()
+    cocs = cocs[cocs["case_id"].isin(active["id"])]
+    terms = app["get_terminations"].uncached()
+    terms = terms[terms["case_id"].isin(active["id"])]
+    print(f"[bench.legacy] dashboard: {len(active):,} active cases, {len(cocs):,} with a COC, "
+          f"{len(terms):,} terminations", flush=True)
+
+    def legacy():
+        return legacy_dashboard(active, cocs, terms, app["coc_status"], app["calculate_days_lost"])
+
+    def current():
+        return current_dashboard(active, cocs, terms)
+
+    if legacy() != current():
+        failed.append("dashboard")
+    results["dashboard [iterrows]"] = _timed("dashboard [iterrows]", legacy, args.rounds)
+    results["dashboard [vectorised]"] = _timed("dashboard [vectorised]", current, args.rounds)
+    db.close_all_connections()
+
+    print(_speedup(results, "latest_cocs [correlated subquery]", "latest_cocs [latest_certificates]"))
+    print(_speedup(results, "dashboard [iterrows]", "dashboard [vectorised]"))
+    report = {"meta": harness.report_meta(scale=args.scale, active=len(active), certificates=certificates,
+                                          seed=args.seed, rounds=args.rounds),
+              "results": {str(args.scale): {"benchmarks": results}}}
+    out = args.out or os.path.join(harness.REPO_ROOT, "bench", "results",
+                                   "legacy-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.write_report(report, out)
+    print(f"[bench.legacy] report -> {out}")
+    if failed:
+        print(f"[bench.legacy] results differ: {', '.join(failed)}", flush=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
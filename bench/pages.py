@@ -0,0 +1,187 @@
+"""
+Whole-page benchmarks: every app.py page rendered headless with AppTest.
+
+    python -m bench.pages                             # 10k cases
+    python -m bench.pages --scales 1000,100000 --pages Dashboard,"COC Tracker"
+    python -m bench.pages --compare bench/results/pages-previous.json
+
+Signs in through the Login form as the seeded admin, then opens every
+NAV_ITEMS page plus Case Detail and Search against the generated database
+for each scale. Each page gets one cold rerun (loader caches cleared) and
+--rounds warm reruns, recording wall time, SQL statements and the number
+of elements the page emitted. app.py is compiled once per process, as a
+running server does; AppTest on its own recompiles it on every run, which
+would add the same second or so to every page. Exits 1 if a page raises, or if --compare
+finds a page slower (or issuing more queries) than --threshold allows.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from streamlit import config as st_config
+from streamlit import logger as st_logger
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Block
+
+import database as db
+from bench import datagen, harness, suite
+
+APP_PATH = os.path.join(harness.REPO_ROOT, "app.py")
+DEFAULT_SCALES = (10_000,)
+EXTRA_PAGES = ("Case Detail", "Search")
+SEARCH_TEXT = "physio"
+ADMIN_USER, ADMIN_PASSWORD = "admin", "admin123"
+# Generous: a cold rerun at 100k cases loads every case into pandas.
+RUN_TIMEOUT_S = 600
+WARM_ROUNDS = 3
+
+
+def _share_bytecode() -> float:
+    """
+    Make every AppTest run reuse one compiled app.py. Returns the compile
+    time in milliseconds (paid once per process by a real server).
+    """
+    shared = ScriptCache()
+    started = time.perf_counter()
+    shared.get_bytecode(APP_PATH)
+    compile_ms = (time.perf_counter() - started) * 1000
+    get_bytecode = ScriptCache.get_bytecode
+    ScriptCache.get_bytecode = lambda self, script_path: get_bytecode(shared, script_path)
+    return compile_ms
+
+
+def _element_count(at: AppTest) -> int:
+    return sum(1 for root in (at.main, at.sidebar) for node in root if not isinstance(node, Block))
+
+
+def _errors(at: AppTest) -> list[str]:
+    return [e.value for e in at.exception]
+
+
+def _login() -> AppTest:
+    at = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT_S)
+    at.session_state["page"] = "Login"
+    at.run()
+    at.text_input[0].input(ADMIN_USER)
+    at.text_input[1].input(ADMIN_PASSWORD)
+    next(b for b in at.button if b.label == "Sign In").click()
+    at.run()
+    if _errors(at) or not at.session_state["authenticated"]:
+        raise RuntimeError(f"could not sign in as {ADMIN_USER}: {_errors(at) or 'rejected'}")
+    return at
+
+
+def _timed_run(at: AppTest, page: str, case_id: int) -> tuple[float, int]:
+    """Rerun ``page``: (milliseconds, SQL statements)."""
+    at.session_state["page"] = page
+    at.session_state["selected_case_id"] = case_id if page == "Case Detail" else None
+    if page == "Search":
+        at.session_state["global_search"] = SEARCH_TEXT
+    statements = db.pool_stats()["statements"]
+    started = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, db.pool_stats()["statements"] - statements
+
+
+def measure_page(at: AppTest, page: str, case_id: int, rounds: int = WARM_ROUNDS) -> dict:
+    suite.reset_caches()
+    cold_ms, cold_queries = _timed_run(at, page, case_id)
+    result = {"cold_ms": round(cold_ms, 1), "cold_queries": cold_queries}
+    errors = _errors(at)
+    times, queries = [], 0
+    for _ in range(rounds if not errors else 0):
+        elapsed, queries = _timed_run(at, page, case_id)
+        times.append(elapsed)
+        errors = _errors(at)
+        if errors:
+            break
+    if times:
+        times.sort()
+        result.update(min_ms=round(times[0], 1), median_ms=round(times[len(times) // 2], 1),
+                      max_ms=round(times[-1], 1), rounds=len(times), queries=queries)
+    result["elements"] = _element_count(at)
+    if errors:
+        result["error"] = str(errors[0])
+    return result
+
+
+def _csv(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def main(argv=None):
+    pages = harness.app_constant("NAV_ITEMS") + list(EXTRA_PAGES)
+    parser = argparse.ArgumentParser(prog="python -m bench.pages", description="Page rerun benchmarks.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated case counts (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-dir", default=os.path.join(tempfile.gettempdir(), "claimtrack-bench"),
+                        help="where generated databases are kept (default: %(default)s)")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the databases even if present")
+    parser.add_argument("--pages", type=_csv, default=pages, help="comma-separated pages (default: all)")
+    parser.add_argument("--rounds", type=int, default=WARM_ROUNDS, help="warm reruns per page")
+    parser.add_argument("--out", help="report path (default: bench/results/pages-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier pages report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio that fails --compare (default: %(default)s)")
+    args = parser.parse_args(argv)
+    unknown = set(args.pages) - set(pages)
+    if unknown:
+        parser.error(f"unknown page(s): {', '.join(sorted(unknown))}")
+    # Every rerun would otherwise log deprecation and "missing ScriptRunContext"
+    # warnings. Parse the config first, or the parse would reset the level.
+    st_config.get_config_options()
+    st_config.set_option("logger.level", "error")
+    st_logger.set_log_level("error")
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    os.makedirs(args.db_dir, exist_ok=True)
+    compile_ms = _share_bytecode()
+    print(f"[bench.pages] app.py compiled in {compile_ms:.0f} ms", flush=True)
+    report = {"meta": harness.report_meta(scales=scales, seed=args.seed, rounds=args.rounds,
+                                          compile_ms=round(compile_ms, 1)),
+              "results": {}}
+    failed = []
+    for scale in scales:
+        datagen.use_database(scale, args.seed, args.db_dir, args.regenerate)
+        case_id = random.Random(args.seed).randint(1, scale)
+        at = _login()
+        results = {"benchmarks": {}}
+        print(f"[bench.pages] {scale:,} cases", flush=True)
+        for page in args.pages:
+            stats = measure_page(at, page, case_id, args.rounds)
+            results["benchmarks"][f"page: {page}"] = stats
+            if "error" in stats:
+                failed.append(f"{scale}: {page}")
+                print(f"  {page:20s} ERROR {stats['error']}", flush=True)
+                continue
+            print(f"  {page:20s} cold {stats['cold_ms']:9.1f} ms  warm {stats['median_ms']:9.1f} ms  "
+                  f"{stats['queries']:5d} queries  {stats['elements']:5d} elements", flush=True)
+        report["results"][str(scale)] = results
+    db.close_all_connections()
+
+    out = args.out or os.path.join(harness.REPO_ROOT, "bench", "results",
+                                   "pages-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.write_report(report, out)
+    print(f"[bench.pages] report -> {out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        lines, regressed = harness.compare(previous, report, args.threshold)
+        print("\n".join(lines))
+        failed += regressed
+    if failed:
+        print(f"[bench.pages] {len(failed)} failure(s): {', '.join(failed)}", flush=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
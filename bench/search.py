@@ -0,0 +1,98 @@
+"""
+Global search latency on a generated database of about a million index rows.
+
+    python -m bench.search                   # 240k cases, ~1M search_index rows
+    python -m bench.search --scale 10000 --rounds 50
+
+Times search.search() as the Search page calls it, for common words (each
+in a third to a half of the index), names, the prefixes typed on the way to
+them and two-word queries. Each query gets a warm-up call, then --rounds
+timed calls; the report has each query's match count and p50/p95/max, and
+the p95 over every timed call. Exits 1 if that p95 reaches --budget.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import database as db
+import search
+from bench import datagen, harness
+
+DEFAULT_SCALE = 240_000
+DEFAULT_ROUNDS = 20
+BUDGET_MS = 50.0
+QUERIES = (
+    "physio", "insurer", "worker", "sprain", "nguyen", "smith",
+    "ph", "phys", "insur", "nguy",
+    "back pain", "wrist sprain", "smith physio", "insurer accepted",
+)
+
+
+def _p95(times: list[float]) -> float:
+    return statistics.quantiles(times, n=20, method="inclusive")[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.search",
+                                     description="search.search latency at about a million index rows.")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="cases in the generated database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-dir", default=os.path.join(tempfile.gettempdir(), "claimtrack-bench"),
+                        help="where generated databases are kept")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the database even if present")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="timed calls per query")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="p95 limit in ms (default: 50)")
+    parser.add_argument("--out", help="report path (default: bench/results/search-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    path, _ = datagen.use_database(args.scale, args.seed, args.db_dir, args.regenerate)
+    conn = db.get_connection()
+    # A claim number typed in full, the other common lookup.
+    claim = conn.execute("SELECT claim_number FROM cases ORDER BY id DESC LIMIT 1").fetchone()[0]
+    queries = QUERIES + (claim,)
+    rows = conn.execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
+    print(f"[bench.search] {path}: {rows:,} index rows, {args.rounds} rounds per query", flush=True)
+
+    results, every = {}, []
+    for text in queries:
+        matches = conn.execute("SELECT COUNT(*) FROM search_index WHERE search_index MATCH ?",
+                               (search.build_query(text, conn),)).fetchone()[0]
+        search.search(text)  # warm-up: page cache, statement cache
+        times = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            search.search(text)
+            times.append((time.perf_counter() - started) * 1000)
+        every += times
+        results[text] = {
+            "matches": matches,
+            "p50_ms": round(statistics.median(times), 2),
+            "p95_ms": round(_p95(times), 2),
+            "max_ms": round(max(times), 2),
+        }
+        stats = results[text]
+        print(f"  {text!r:20s} {matches:9,d} matches  p50 {stats['p50_ms']:7.2f}  p95 {stats['p95_ms']:7.2f}"
+              f"  max {stats['max_ms']:7.2f} ms", flush=True)
+    p95 = round(_p95(every), 2)
+    print(f"  all queries: p95 {p95:.2f} ms (budget {args.budget:g} ms)", flush=True)
+
+    report = {"meta": harness.report_meta(scale=args.scale, seed=args.seed, index_rows=rows, rounds=args.rounds,
+                                          candidates=search.SEARCH_CANDIDATES, budget_ms=args.budget),
+              "results": {str(args.scale): {"benchmarks": results, "p95_ms": p95}}}
+    out = args.out or os.path.join(harness.REPO_ROOT, "bench", "results",
+                                   "search-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    harness.write_report(report, out)
+    print(f"[bench.search] report -> {out}")
+    if p95 >= args.budget:
+        print(f"[bench.search] p95 {p95:.2f} ms is over the {args.budget:g} ms budget", flush=True)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Benchmarks for the app's data loaders and page computations.
+
+build_suite() returns the Benchmark list for the database at db.DB_PATH. The
+app.py loaders are timed cold (the query and DataFrame build) and warm (a
+data_cache hit, which is what most reruns pay).
+"""
+
+import itertools
+import random
+
+import case_bundle
+import case_listing
+import dashboard_metrics
+import data_cache
+import database as db
+import entitlements
+import search
+from bench.harness import Benchmark, load_app_functions
+
+APP_LOADERS = ("get_cases_df", "get_latest_cocs", "get_terminations", "get_worker_names_list")
+APP_FUNCTIONS = APP_LOADERS + ("get_documents", "get_activity_log")
+
+
+def _cycle(values):
+    """A zero-argument callable returning the next of ``values`` each call."""
+    it = itertools.cycle(values)
+    return lambda: next(it)
+
+
+def build_suite(seed: int = 0) -> list[Benchmark]:
+    app = load_app_functions(*APP_FUNCTIONS)
+    conn = db.get_connection()
+    n_cases = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+    rnd = random.Random(seed)
+    next_case = _cycle([rnd.randint(1, n_cases) for _ in range(256)])
+    suite = []
+
+    for name in APP_LOADERS:
+        loader = app[name]
+        suite.append(Benchmark("loaders", f"app.{name} [cold]", loader.uncached))
+        suite.append(Benchmark("loaders", f"app.{name} [warm]", loader))
+    suite += [
+        Benchmark("loaders", "app.get_documents", lambda: app["get_documents"](next_case())),
+        Benchmark("loaders", "app.get_activity_log", lambda: app["get_activity_log"](limit=100)),
+        Benchmark("loaders", "app.get_activity_log [case]", lambda: app["get_activity_log"](case_id=next_case())),
+    ]
+
+    cases = app["get_cases_df"].uncached()
+    active = cases[cases["status"] == "Active"]
+    cocs = app["get_latest_cocs"].uncached()
+    terms = app["get_terminations"].uncached()
+    suite += [
+        Benchmark("dashboard", "dashboard_metrics.dashboard_metrics",
+                  lambda: dashboard_metrics.dashboard_metrics(active, cocs, terms)),
+        Benchmark("dashboard", "dashboard_metrics.dashboard_alerts",
+                  lambda: dashboard_metrics.dashboard_alerts(active, cocs, terms)),
+        Benchmark("dashboard", "dashboard_metrics.days_lost", lambda: dashboard_metrics.days_lost(active)),
+        Benchmark("dashboard", "dashboard_metrics.coc_status_frame",
+                  lambda: dashboard_metrics.coc_status_frame(cocs["cert_to"])),
+        Benchmark("entitlements", "entitlements.calculate_entitlement [all active]",
+                  lambda: [entitlements.calculate_entitlement(row.state, row.piawe, row.date_of_injury)
+                           for row in active[["state", "piawe", "date_of_injury"]].itertuples()]),
+    ]
+
+    # A cursor half way through the active list, for a deep page.
+    row = conn.execute("""
+        SELECT state, worker_name, id FROM cases WHERE status = 'Active'
+        ORDER BY state, worker_name, id LIMIT 1 OFFSET ?
+    """, (case_listing.count_cases(True) // 2,)).fetchone()
+    deep = case_listing.page_key(row) if row else None
+    suite += [
+        Benchmark("listing", "case_listing.count_cases", lambda: case_listing.count_cases(True)),
+        Benchmark("listing", "case_listing.fetch_page [first]", lambda: case_listing.fetch_page(True)),
+        Benchmark("listing", "case_listing.fetch_page [middle]", lambda: case_listing.fetch_page(True, after=deep)),
+        Benchmark("listing", "case_listing.fetch_page [VIC, No Capacity]",
+                  lambda: case_listing.fetch_page(True, states=["VIC"], capacities=["No Capacity"])),
+        Benchmark("case_detail", "case_bundle.load_case_bundle", lambda: case_bundle.load_case_bundle(next_case())),
+    ]
+
+    claim = f"CLM{rnd.randint(1, n_cases):08d}"
+    suite += [
+        Benchmark("search", "search.search [claim number]", lambda: search.search(claim)),
+        Benchmark("search", "search.search [common word]", lambda: search.search("physio")),
+        Benchmark("search", "search.search [name prefix]", lambda: search.search("nguy")),
+    ]
+    return suite
+
+
+def reset_caches():
+    """Forget cached loader results, e.g. after switching databases."""
+    data_cache.clear_cache()
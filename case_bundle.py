@@ -0,0 +1,92 @@
+"""
+Everything the Case Detail page shows about one case, in one query.
+
+The case row, its latest certificate, termination, document checklist,
+recent activity and correspondence counts come back from a single SELECT:
+related rows are folded into JSON by correlated subqueries, so the page
+pays for one statement and sees one consistent snapshot of the database.
+"""
+
+import functools
+import json
+from dataclasses import dataclass, field
+
+import database as db
+import log_writer
+
+ACTIVITY_LIMIT = 50
+
+
+@dataclass
+class CaseBundle:
+    case: dict
+    latest_coc: dict | None = None
+    termination: dict | None = None
+    documents: list = field(default_factory=list)  # dicts, ordered by doc_type
+    activity: list = field(default_factory=list)  # dicts, newest first
+    correspondence_count: int = 0
+    open_follow_ups: int = 0
+
+    @property
+    def documents_present(self) -> int:
+        return sum(1 for doc in self.documents if doc["is_present"])
+
+
+def _json_object(table: str, alias: str) -> str:
+    """json_object(...) over every column of ``table``."""
+    columns = [row[1] for row in db.get_connection().execute(f"PRAGMA table_info({table})")]
+    return "json_object(" + ", ".join(f"'{col}', {alias}.{col}" for col in columns) + ")"
+
+
+@functools.lru_cache(maxsize=4)
+def _bundle_sql(schema_epoch: int) -> str:
+    """
+    The bundle query for one schema. Keyed on db.schema_epoch(), which
+    changes when this process migrates or reopens the database, so added
+    columns show up without a schema query on every load.
+    """
+    return f"""
+        SELECT c.*,
+            (SELECT {_json_object("certificates", "cert")}
+             FROM latest_certificates lc JOIN certificates cert ON cert.id = lc.certificate_id
+             WHERE lc.case_id = c.id) AS bundle_latest_coc,
+            (SELECT {_json_object("terminations", "t")}
+             FROM terminations t WHERE t.case_id = c.id) AS bundle_termination,
+            (SELECT json_group_array({_json_object("documents", "d")})
+             FROM documents d WHERE d.case_id = c.id) AS bundle_documents,
+            (SELECT json_group_array({_json_object("activity_log", "a")})
+             FROM (SELECT * FROM activity_log WHERE case_id = c.id
+                   ORDER BY created_at DESC LIMIT :activity_limit) a) AS bundle_activity,
+            (SELECT COUNT(*) FROM correspondence WHERE case_id = c.id) AS bundle_correspondence_count,
+            (SELECT COUNT(*) FROM correspondence
+             WHERE case_id = c.id AND follow_up_done = 0 AND follow_up_date IS NOT NULL) AS bundle_open_follow_ups
+        FROM cases c
+        WHERE c.id = :case_id
+    """
+
+
+def load_case_bundle(case_id: int, activity_limit: int = ACTIVITY_LIMIT) -> CaseBundle | None:
+    """The case and its related records, or None if there is no such case."""
+    # Only this case's queued activity rows matter; usually there are none.
+    log_writer.flush(table="activity_log", case_id=case_id)
+    row = db.get_connection().execute(
+        _bundle_sql(db.schema_epoch()), {"case_id": case_id, "activity_limit": activity_limit}
+    ).fetchone()
+    if row is None:
+        return None
+    data = dict(row)
+    latest_coc = data.pop("bundle_latest_coc")
+    termination = data.pop("bundle_termination")
+    # json_group_array() makes no ordering promise; restore the page's order here.
+    documents = sorted(json.loads(data.pop("bundle_documents")), key=lambda d: (d["doc_type"], d["id"]))
+    activity = sorted(json.loads(data.pop("bundle_activity")),
+                      key=lambda a: (a["created_at"] or "", a["id"]), reverse=True)
+    return CaseBundle(
+        latest_coc=json.loads(latest_coc) if latest_coc else None,
+        termination=json.loads(termination) if termination else None,
+        documents=documents,
+        activity=activity,
+        correspondence_count=data.pop("bundle_correspondence_count"),
+        open_follow_ups=data.pop("bundle_open_follow_ups"),
+        case=data,
+    )
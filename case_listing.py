@@ -0,0 +1,84 @@
+"""
+Server-side case listing for the All Cases page.
+
+The sidebar filters, the Active/Inactive split and the sort order are pushed
+into SQL, and pages are fetched by keyset: each page starts after the sort key
+(state, worker_name, id) of the previous page's last row, so page 1 and page
+10,000 cost the same index seek. Counts come from case_filter_counts, which
+triggers keep in step with the cases table.
+"""
+
+import database as db
+
+PAGE_SIZE = 50
+LIST_COLUMNS = ("id", "worker_name", "state", "site", "current_capacity", "priority", "status")
+
+
+def _where(active: bool, states, capacities, priorities) -> tuple[str, list]:
+    # Inactive means anything but 'Active', including a NULL status.
+    clauses = ["status = 'Active'" if active else "status IS NOT 'Active'"]
+    params: list = []
+    for column, values in (("state", states), ("current_capacity", capacities), ("priority", priorities)):
+        if values is not None:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return " AND ".join(clauses), params
+
+
+def count_cases(active: bool, states=None, capacities=None, priorities=None) -> int:
+    """Number of cases matching the filters. None means no filter on that column."""
+    clauses, params = ["is_active = ?"], [int(active)]
+    for column, values in (("state", states), ("current_capacity", capacities), ("priority", priorities)):
+        if values is not None:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return db.get_connection().execute(
+        f"SELECT COALESCE(SUM(n), 0) FROM case_filter_counts WHERE {' AND '.join(clauses)}", params
+    ).fetchone()[0]
+
+
+def _select(where: str, params: list, order: str, limit: int) -> list:
+    return db.get_connection().execute(f"""
+        SELECT {', '.join(LIST_COLUMNS)} FROM cases
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT ?
+    """, params + [limit]).fetchall()
+
+
+def fetch_page(active: bool, states=None, capacities=None, priorities=None,
+               after: tuple | None = None, limit: int = PAGE_SIZE) -> tuple[list, bool]:
+    """
+    One page of matching cases ordered by state, worker_name, id.
+
+    ``after`` is page_key() of the last row of the previous page (None for the
+    first page). Returns (rows, has_more).
+    """
+    if states is None:
+        where, params = _where(active, None, capacities, priorities)
+        if after is not None:
+            where += " AND (state, worker_name, id) > (?, ?, ?)"
+            params.extend(after)
+        rows = _select(where, params, "state, worker_name, id", limit + 1)
+        return rows[:limit], len(rows) > limit
+
+    # With a state list, SQLite seeks IN values but won't combine them with a
+    # row-value range, so deep pages would rescan each state from the top.
+    # Query one state at a time instead: every query is then an index seek.
+    rows: list = []
+    for state in sorted(set(states)):
+        if after is not None and state < after[0]:
+            continue
+        where, params = _where(active, [state], capacities, priorities)
+        if after is not None and state == after[0]:
+            where += " AND (worker_name, id) > (?, ?)"
+            params.extend(after[1:])
+        rows += _select(where, params, "worker_name, id", limit + 1 - len(rows))
+        if len(rows) > limit:
+            break
+    return rows[:limit], len(rows) > limit
+
+
+def page_key(row) -> tuple:
+    """Keyset cursor for the row: pass the last row's key as ``after``."""
+    return row["state"], row["worker_name"], row["id"]
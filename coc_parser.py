@@ -1,6 +1,7 @@
 """
 COC (Certificate of Capacity) parser — extracts fields from uploaded or
-scanned COC PDFs using OCR (tesseract) and regex matching.
+scanned COC PDFs using the embedded text layer (pdfplumber) where present,
+OCR (tesseract) otherwise, and regex matching.
 
 Supports:
   - NSW SIRA "Certificate of capacity / certificate of fitness"
@@ -11,35 +12,224 @@ Supports:
 
 from __future__ import annotations
 
+import functools
 import re
 import os
 import io
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, date
-from typing import Optional
+from typing import Iterator, Optional
+
+import ocr_cache
+import patterns
 
 
 # ---------------------------------------------------------------------------
 # OCR text extraction
 # ---------------------------------------------------------------------------
 
-def _extract_text_from_coc_pdf(file_bytes: bytes) -> str:
-    """Extract text from a scanned COC PDF using OCR."""
-    from pdf2image import convert_from_bytes
+OCR_DPI = 250
+# Worker processes for OCR; COC_OCR_WORKERS=1 forces serial, in-process OCR.
+OCR_WORKERS = int(os.environ.get("COC_OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _init_ocr_worker():
+    # tesseract's own OpenMP threads fight the pool for cores; one each is fastest.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def get_ocr_executor(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Shared OCR process pool, created on first use.
+
+    Uses the spawn start method so workers never inherit the Streamlit
+    server's threads or open SQLite connections.
+    """
+    global _executor, _executor_workers
+    workers = max_workers or OCR_WORKERS
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker,
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_ocr_executor():
+    """Stop the shared OCR pool (used by scripts and shutdown hooks)."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+        _executor, _executor_workers = None, 0
+
+
+def _pdf_page_count(source: bytes | str) -> int:
+    """Number of pages in a PDF given as bytes or a file path."""
+    from pdf2image import pdfinfo_from_bytes, pdfinfo_from_path
+
+    if isinstance(source, (bytes, bytearray)):
+        info = pdfinfo_from_bytes(bytes(source))
+    else:
+        info = pdfinfo_from_path(source)
+    return int(info.get("Pages", 0))
+
+
+def _ocr_page(source: bytes | str, page_no: int, dpi: int = OCR_DPI) -> dict:
+    """Render and OCR a single page (1-based); only this page is held in memory."""
+    from pdf2image import convert_from_bytes, convert_from_path
     import pytesseract
 
-    images = convert_from_bytes(file_bytes, dpi=250)
-    text_parts = []
-    for img in images:
-        text = pytesseract.image_to_string(img)
-        if text.strip():
-            text_parts.append(text.strip())
-    return "\n\n".join(text_parts)
+    started = time.perf_counter()
+    if isinstance(source, (bytes, bytearray)):
+        images = convert_from_bytes(bytes(source), dpi=dpi, first_page=page_no, last_page=page_no)
+    else:
+        images = convert_from_path(source, dpi=dpi, first_page=page_no, last_page=page_no)
+    rendered = time.perf_counter()
+    text = pytesseract.image_to_string(images[0]).strip() if images else ""
+    finished = time.perf_counter()
+    return {
+        "page": page_no,
+        "text": text,
+        "render_s": round(rendered - started, 3),
+        "ocr_s": round(finished - rendered, 3),
+    }
+
+
+# A text layer needs this much real text before OCR is skipped for a page.
+TEXT_LAYER_MIN_CHARS = 80
+TEXT_LAYER_MIN_WORDS = 8
+
+
+def _text_layer_ok(text: str) -> bool:
+    """Quality check for an embedded text layer.
+
+    Rejects near-empty pages (scans with a stray header), and the garbage
+    produced by PDFs whose fonts lack a Unicode map ("(cid:12)" runs or
+    mostly non-letters).
+    """
+    stripped = text.strip()
+    if len(stripped) < TEXT_LAYER_MIN_CHARS or "(cid:" in stripped:
+        return False
+    if len(re.findall(r"[A-Za-z]{3,}", stripped)) < TEXT_LAYER_MIN_WORDS:
+        return False
+    visible = [ch for ch in stripped if not ch.isspace()]
+    return sum(ch.isalnum() for ch in visible) / len(visible) >= 0.6
+
+
+def _extract_text_layer(source: bytes | str) -> list[dict] | None:
+    """Embedded text per page via pdfplumber, or None if the PDF can't be opened."""
+    import pdfplumber
+
+    pages = []
+    try:
+        pdf = pdfplumber.open(io.BytesIO(bytes(source)) if isinstance(source, (bytes, bytearray)) else source)
+    except Exception:
+        return None
+    with pdf:
+        for n, page in enumerate(pdf.pages, start=1):
+            started = time.perf_counter()
+            try:
+                text = (page.extract_text() or "").strip()
+            except Exception:
+                text = ""
+            pages.append({"page": n, "text": text, "extract_s": round(time.perf_counter() - started, 3)})
+    return pages
+
+
+_method_counts_lock = threading.Lock()
+_method_counts = {"text_layer": 0, "ocr": 0, "mixed": 0, "none": 0, "cached": 0}
+
+
+def _count_method(method: str):
+    with _method_counts_lock:
+        _method_counts[method] = _method_counts.get(method, 0) + 1
+
+
+def extraction_stats() -> dict:
+    """How many parses this process answered from each extraction path."""
+    with _method_counts_lock:
+        return dict(_method_counts)
+
+
+def extraction_method(timings: list[dict]) -> str:
+    """Summarise per-page methods as "text_layer", "ocr", "mixed" or "none"."""
+    methods = {t.get("method") for t in timings}
+    if not methods:
+        return "none"
+    if methods == {"text_layer"}:
+        return "text_layer"
+    if methods == {"ocr"}:
+        return "ocr"
+    return "mixed"
+
+
+def extract_coc_text(source: bytes | str, max_workers: int | None = None,
+                     dpi: int = OCR_DPI) -> tuple[str, list[dict]]:
+    """
+    Extract a COC PDF's text, using the embedded text layer where it is usable.
+
+    Pages whose text layer is empty or fails _text_layer_ok are OCR'd,
+    fanned out to the shared process pool. Returns (text, timings) where
+    timings has one dict per page with page, method ("text_layer" or
+    "ocr"), extract_s, render_s, ocr_s and chars. Single pages, or max_workers=1, are
+    OCR'd in-process to skip pickling overhead.
+    """
+    layer = _extract_text_layer(source)
+    if layer is None:
+        layer = [{"page": n, "text": "", "extract_s": 0.0} for n in range(1, _pdf_page_count(source) + 1)]
+
+    results = {}
+    for page in layer:
+        if _text_layer_ok(page["text"]):
+            results[page["page"]] = {
+                "page": page["page"], "text": page["text"], "method": "text_layer",
+                "extract_s": page["extract_s"], "render_s": 0.0, "ocr_s": 0.0,
+            }
+    to_ocr = [page["page"] for page in layer if page["page"] not in results]
+
+    workers = max_workers or OCR_WORKERS
+    if len(to_ocr) <= 1 or workers <= 1:
+        ocr_results = [_ocr_page(source, n, dpi) for n in to_ocr]
+    else:
+        executor = get_ocr_executor(workers)
+        futures = [executor.submit(_ocr_page, source, n, dpi) for n in to_ocr]
+        ocr_results = [f.result() for f in futures]
+    for r in ocr_results:
+        results[r["page"]] = dict(r, method="ocr", extract_s=0.0)
+
+    ordered = [results[n] for n in sorted(results)]
+    text_parts = [r["text"] for r in ordered if r["text"]]
+    timings = [
+        {"page": r["page"], "method": r["method"], "extract_s": r["extract_s"],
+         "render_s": r["render_s"], "ocr_s": r["ocr_s"], "chars": len(r["text"])}
+        for r in ordered
+    ]
+    return "\n\n".join(text_parts), timings
+
+
+def _extract_text_from_coc_pdf(file_bytes: bytes) -> str:
+    """Extract text from a scanned COC PDF using OCR."""
+    text, _ = extract_coc_text(file_bytes)
+    return text
 
 
 # ---------------------------------------------------------------------------
 # Date helpers
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=1024)
 def _parse_au_date(raw: str | None) -> str | None:
     """Parse an Australian-format date string to YYYY-MM-DD."""
     if not raw:
@@ -54,49 +244,50 @@ def _parse_au_date(raw: str | None) -> str | None:
     return None
 
 
-def _find(pattern: str, text: str, flags=re.IGNORECASE) -> str | None:
-    """Return the first captured group, or None."""
-    m = re.search(pattern, text, flags)
-    return m.group(1).strip() if m else None
-
-
 def _find_all_dates(text: str) -> list[str]:
     """Find all DD/MM/YYYY dates in text."""
-    return re.findall(r'\d{1,2}/\d{1,2}/\d{4}', text)
+    return patterns.DATE_DMY.findall(text)
 
 
 # ---------------------------------------------------------------------------
 # Template detection
 # ---------------------------------------------------------------------------
 
-def _detect_template(text: str) -> str:
-    """Detect which state COC template the text matches."""
-    text_lower = text.lower()
-    if "sira" in text_lower or "state insurance regulatory authority" in text_lower:
-        return "NSW_SIRA"
-    if "tac" in text_lower or "worksafe" in text_lower or "transport accident" in text_lower:
-        return "VIC_TAC"
-    if "queensland" in text_lower or "qcomp" in text_lower or "workcover queensland" in text_lower:
-        return "QLD"
-    # Try secondary signals
-    if "certificate of capacity" in text_lower and "certificate of fitness" in text_lower:
-        return "NSW_SIRA"
-    if "certificate of capacity" in text_lower and ("worker first name" in text_lower or "worker last name" in text_lower):
-        return "VIC_TAC"
-    return "UNKNOWN"
+def classify_template(text: str | patterns.ScanContext) -> tuple[str, float]:
+    """
+    Score the text against each state template's keywords.
+
+    Returns (template, confidence): confidence is the winning template's share
+    of all keyword weight found, 0.0 when nothing matched. Below
+    patterns.COC_TEMPLATE_MIN_SCORE the template is "UNKNOWN".
+    """
+    ctx = text if isinstance(text, patterns.ScanContext) else patterns.ScanContext(text)
+    folded = ctx.folded
+    # Most keywords are absent; a plain "in" rules those out for less than has_word() costs.
+    scores = {
+        template: sum(weight for phrase, weight in keywords if phrase in folded and ctx.has_word(phrase))
+        for template, keywords in patterns.COC_TEMPLATE_KEYWORDS.items()
+    }
+    best = max(scores, key=scores.get)  # first template wins a tie
+    total = sum(scores.values())
+    confidence = round(scores[best] / total, 2) if total else 0.0
+    if scores[best] < patterns.COC_TEMPLATE_MIN_SCORE:
+        return "UNKNOWN", confidence
+    return best, confidence
 
 
 # ---------------------------------------------------------------------------
 # NSW SIRA parser
 # ---------------------------------------------------------------------------
 
-def _parse_nsw_sira(text: str) -> dict:
+def _parse_nsw_sira(ctx: patterns.ScanContext) -> dict:
     """Parse NSW SIRA Certificate of Capacity / Certificate of Fitness."""
     fields: dict = {}
+    scan = ctx.scan(patterns.COC_NSW_SIRA)
 
     # Worker name
-    first = _find(r'First name\s*\n\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', text)
-    last = _find(r'Last name\s*\n\s*([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)', text)
+    first = scan.find("first_name")
+    last = scan.find("last_name")
     if first and last:
         fields["worker_name"] = f"{first} {last}"
     elif first:
@@ -104,32 +295,29 @@ def _parse_nsw_sira(text: str) -> dict:
 
     # Claim number — appears before Medicare number on the same line or nearby
     # Try specific "Claim number\nVALUE" pattern first
-    claim = _find(r'Claim number\s*\n\s*(\d{5,})', text)
+    claim = scan.find("claim_next_line")
     if not claim:
         # Try on same line after "Claim number"
-        claim = _find(r'Claim number\s*[:\s]+(\d{5,})', text)
+        claim = scan.find("claim_same_line")
     if claim:
         fields["claim_number"] = claim.strip()
 
     # Capacity for work section
-    if re.search(r'is fit for pre[- ]?injury (?:duties|work)', text, re.IGNORECASE):
+    if scan.search("fit_pre_injury"):
         # Check if this option is actually ticked (near checkbox marker)
-        if re.search(r'(?:\[?[xX✓]\]?|☑)\s*is fit for pre', text, re.IGNORECASE):
+        if scan.search("fit_pre_injury_ticked"):
             fields["capacity"] = "Full Capacity"
 
     # "has capacity for some type of work from DATE to DATE"
-    m = re.search(
-        r'has capacity for some type of work from\s+(\d{1,2}/\d{1,2}/\d{4})\s+to\s+[\[|\s]*(\d{1,2}/\d{1,2}/\d{4})',
-        text, re.IGNORECASE
-    )
+    m = scan.search("some_capacity")
     if m:
         fields["capacity"] = "Modified Duties"
         fields["cert_from"] = _parse_au_date(m.group(1))
         fields["cert_to"] = _parse_au_date(m.group(2))
 
     # hours/day and days/week
-    hrs = _find(r'for\s+(\d{1,2}(?:\s*-\s*\d{1,2})?)\s+hours?/day', text)
-    days = _find(r'(\d{1,2})\s+days?/week', text)
+    hrs = scan.find("hours_per_day")
+    days = scan.find("days_per_week")
     if hrs:
         # Take the first number if it's a range like "8-10"
         fields["hours_per_day"] = float(hrs.split("-")[0].strip())
@@ -137,22 +325,19 @@ def _parse_nsw_sira(text: str) -> dict:
         fields["days_per_week"] = int(days)
 
     # "has no current work capacity" / "has no current capacity"
-    m2 = re.search(
-        r'has no (?:current )?(?:work )?capaci\w*\s+(?:for any (?:employment|work)\s+)?from\s+[\[|\s]*(\d{1,2}/\d{1,2}/\d{4})\s+.*?to\s+[\[|\s]*(\d{1,2}/\d{1,2}/\d{4})',
-        text, re.IGNORECASE
-    )
+    m2 = scan.search("no_capacity")
     if m2 and "capacity" not in fields:
         fields["capacity"] = "No Capacity"
         fields["cert_from"] = _parse_au_date(m2.group(1))
         fields["cert_to"] = _parse_au_date(m2.group(2))
 
     # Next review date
-    review = _find(r'Next review date\s*[\(\[]?(?:DD/MM/YYYY)?[\)\]]?\s*[\n|:]*\s*(\d{1,2}/\d{1,2}/\d{4})', text)
+    review = scan.find("next_review")
     if review:
         fields["next_review"] = _parse_au_date(review)
 
     # Diagnosis
-    diag = _find(r'Diagnosis of work related.*?\n\s*(.+?)(?:\n|$)', text)
+    diag = scan.find("diagnosis")
     if diag:
         fields["diagnosis"] = diag.strip()
 
@@ -163,69 +348,52 @@ def _parse_nsw_sira(text: str) -> dict:
 # VIC TAC/WorkSafe parser
 # ---------------------------------------------------------------------------
 
-def _parse_vic_tac(text: str) -> dict:
+def _parse_vic_tac(ctx: patterns.ScanContext) -> dict:
     """Parse VIC TAC/WorkSafe Certificate of Capacity."""
     fields: dict = {}
+    scan = ctx.scan(patterns.COC_VIC_TAC)
 
     # Worker name — VIC form uses "Worker First Name" / "Worker Last Name"
-    first = _find(r'Worker First Name\s*\n\s*([A-Z][A-Za-z\s]+?)(?:\n|Claim|Date|$)', text)
-    if not first:
-        first = _find(r'Worker First Name\s*\n\s*(.+?)(?:\n)', text)
-    last = _find(r'Worker Last Name\s*\n?\s*(?:not known\)?)?\s*\n?\s*(?:Date of (?:Birth|Injury))?\s*\n?\s*([A-Z][A-Za-z]+)', text)
-    if not last:
-        last = _find(r'Worker Last Name\s*\n\s*(.+?)(?:\n)', text)
+    first = scan.find("first_name", "first_name_line")
+    last = scan.find("last_name", "last_name_line")
     # Clean up — remove anything that looks like a label
     if first:
-        first = re.sub(r'(?:Claim|Date|Worker).*', '', first, flags=re.IGNORECASE).strip()
+        first = patterns.VIC_FIRST_NAME_NOISE.sub('', first).strip()
     if last:
-        last = re.sub(r'(?:Date|Worker|not known).*', '', last, flags=re.IGNORECASE).strip()
+        last = patterns.VIC_LAST_NAME_NOISE.sub('', last).strip()
     if first and last and len(first) > 1 and len(last) > 1:
         fields["worker_name"] = f"{first} {last}"
 
     # Claim number
-    claim = _find(r'Claim Number\s*(?:\(if known\))?\s*\n?\s*([A-Z0-9\s\+]{5,}?)(?:\n|$)', text)
+    claim = scan.find("claim")
     if claim:
-        cleaned = re.sub(r'[^A-Z0-9]', '', claim.upper()).strip()
+        cleaned = patterns.NON_ALNUM_UPPER.sub('', claim.upper()).strip()
         if len(cleaned) >= 5:
             fields["claim_number"] = cleaned
 
     # Capacity - multiple patterns (OCR can be inconsistent)
     # "Have No capacity" - with checkbox marker or just text
-    m = re.search(
-        r'[Hh]ave [Nn]o capacity for (?:any )?employment from\s+(\d{1,2}/\d{1,2}/\d{4})\s+to\s+(\d{1,2}/\d{1,2}/\d{4})',
-        text
-    )
-    if not m:
-        m = re.search(
-            r'No capacity for employment from\s+(\d{1,2}/\d{1,2}/\d{4})\s+to\s+(\d{1,2}/\d{1,2}/\d{4})',
-            text
-        )
+    m = scan.search("no_capacity") or scan.search("no_capacity_bare")
     if m:
         fields["capacity"] = "No Capacity"
         fields["cert_from"] = _parse_au_date(m.group(1))
         fields["cert_to"] = _parse_au_date(m.group(2))
 
     # "Have a capacity for suitable employment from DATE to DATE"
-    m2 = re.search(
-        r'[Hh]ave a capacity for suitable employment from\s+(\d{1,2}/\d{1,2}/\d{4})\s+to\s+(\d{1,2}/\d{1,2}/\d{4})',
-        text
-    )
+    m2 = scan.search("suitable_capacity")
     if m2:
         fields["capacity"] = "Modified Duties"
         fields["cert_from"] = _parse_au_date(m2.group(1))
         fields["cert_to"] = _parse_au_date(m2.group(2))
 
     # "Have a capacity for pre-injury employment from DATE"
-    m3 = re.search(
-        r'[Hh]ave a capacity for pre[- ]?injury employment from\s+(\d{1,2}/\d{1,2}/\d{4})',
-        text
-    )
+    m3 = scan.search("pre_injury_capacity")
     if m3:
         fields["capacity"] = "Full Capacity"
         fields["cert_from"] = _parse_au_date(m3.group(1))
 
     # Diagnosis
-    diag = _find(r'Clinical Diagnosis.*?is:\s*\n?\s*(.+?)(?:\n\n|\n[0-9])', text, re.IGNORECASE | re.DOTALL)
+    diag = scan.find("diagnosis")
     if diag:
         fields["diagnosis"] = diag.strip().split("\n")[0].strip()
 
@@ -236,37 +404,30 @@ def _parse_vic_tac(text: str) -> dict:
 # QLD WorkCover parser
 # ---------------------------------------------------------------------------
 
-def _parse_qld(text: str) -> dict:
+def _parse_qld(ctx: patterns.ScanContext) -> dict:
     """Parse QLD WorkCover Workers' compensation medical certificate."""
     fields: dict = {}
+    scan = ctx.scan(patterns.COC_QLD)
 
     # QLD forms are often rotated/sideways so OCR is less reliable
     # Try to extract key fields
 
     # Worker name - look for surname/given names pattern
-    surname = _find(r'\(surname\)\s*(.+?)(?:\n|I attended)', text)
-    given = _find(r'I attended to \(given names\)\s*(.+?)(?:\n|$)', text)
-    if not given:
-        given = _find(r'given names?\)?\s*(.+?)(?:\n|$)', text)
+    surname = scan.find("surname")
+    given = scan.find("given_names", "given_names_loose")
     if surname and given:
         fields["worker_name"] = f"{given.strip()} {surname.strip()}"
     elif surname:
         fields["worker_name"] = surname.strip()
 
     # No capacity / suitable duties / normal duties
-    m = re.search(
-        r'No capacity for any type.*?from\s+(\d{1,2}/\d{1,2}/\d{4})\s+to\s+(\d{1,2}/\d{1,2}/\d{4})',
-        text, re.IGNORECASE
-    )
+    m = scan.search("no_capacity")
     if m:
         fields["capacity"] = "No Capacity"
         fields["cert_from"] = _parse_au_date(m.group(1))
         fields["cert_to"] = _parse_au_date(m.group(2))
 
-    m2 = re.search(
-        r'(?:suitable|some form of work) duties?\s+from\s+(\d{1,2}/\d{1,2}/\d{4})\s+to\s+(\d{1,2}/\d{1,2}/\d{4})',
-        text, re.IGNORECASE
-    )
+    m2 = scan.search("suitable_duties")
     if m2 and "capacity" not in fields:
         fields["capacity"] = "Modified Duties"
         fields["cert_from"] = _parse_au_date(m2.group(1))
@@ -288,7 +449,7 @@ def _extract_dates_from_filename(filename: str) -> dict:
     """
     fields: dict = {}
     # Pattern: DD.MM - DD.MM or DD.MM-DD.MM (2-digit day.month)
-    m = re.search(r'(\d{1,2})\.(\d{1,2})\s*-\s*(\d{1,2})\.(\d{1,2})', filename)
+    m = patterns.FILENAME_DATE_RANGE.search(filename)
     if m:
         d1, m1, d2, m2 = m.groups()
         # Guess the year — use current year, unless from month > to month (spans year boundary)
@@ -310,58 +471,172 @@ def _extract_dates_from_filename(filename: str) -> dict:
 # Worker matching
 # ---------------------------------------------------------------------------
 
-def match_worker_from_text(text: str, worker_names: list[str]) -> str | None:
+_NAME_TOKEN_RE = re.compile(r"[A-Z0-9]+(?:['\-][A-Z0-9]+)*")
+
+
+def _name_tokens(text: str) -> list[str]:
+    return _NAME_TOKEN_RE.findall(text.upper())
+
+
+def _within_edits(a: str, b: str, max_edits: int) -> bool:
+    """Levenshtein distance between a and b is at most max_edits (banded DP)."""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > max_edits:
+            return False
+        prev = cur
+    return prev[-1] <= max_edits
+
+
+def _deletes(token: str, max_edits: int) -> set[str]:
+    """Every string reachable from token by removing up to max_edits characters."""
+    variants = {token}
+    frontier = {token}
+    for _ in range(max_edits):
+        frontier = {t[:i] + t[i + 1:] for t in frontier for i in range(len(t))}
+        variants |= frontier
+    return variants
+
+
+class WorkerNameIndex:
+    """
+    Token index over worker names for matching COC text and folder paths.
+
+    Names are split into word tokens and indexed token -> (worker, position),
+    so a document is scored against every worker in one pass over its words
+    instead of one substring scan per worker. Matching is on whole words.
+    Tokens of at least ``min_fuzzy_len`` characters also match OCR-garbled
+    words within ``max_edits`` edits, via a deletion-neighbourhood index;
+    fuzzy hits score lower than exact ones.
+
+    Scores follow match_worker_from_text's original rules: full name 4,
+    first + last name 3, last name alone 2 (minimum to match). Ties go to the
+    worker listed first.
+    """
+
+    FUZZY_PENALTY = 0.5
+
+    def __init__(self, worker_names, max_edits: int = 1, min_fuzzy_len: int = 5):
+        self.names = list(worker_names)
+        self.max_edits = max_edits
+        self.min_fuzzy_len = min_fuzzy_len
+        self._parts = [_name_tokens(name) for name in self.names]
+        self._postings: dict = {}
+        self._fuzzy: dict = {}
+        for idx, parts in enumerate(self._parts):
+            for pos, token in enumerate(parts):
+                self._postings.setdefault(token, []).append((idx, pos))
+                if max_edits and len(token) >= min_fuzzy_len:
+                    for variant in _deletes(token, max_edits):
+                        self._fuzzy.setdefault(variant, set()).add(token)
+
+    def _lookup(self, token: str, memo: dict) -> list[tuple[str, bool]]:
+        """Indexed name tokens matching a text token, as (name_token, exact)."""
+        if token in memo:
+            return memo[token]
+        if token in self._postings:
+            found = [(token, True)]
+        elif self.max_edits and len(token) >= self.min_fuzzy_len - self.max_edits:
+            candidates = set()
+            for variant in _deletes(token, self.max_edits):
+                candidates |= self._fuzzy.get(variant, set())
+            found = [(c, False) for c in sorted(candidates) if _within_edits(token, c, self.max_edits)]
+        else:
+            found = []
+        memo[token] = found
+        return found
+
+    def scores(self, text: str) -> dict[int, float]:
+        """Score every worker mentioned in text; returns {worker index: score}."""
+        matched: dict = {}   # worker -> {position: exact}
+        phrase: dict = {}    # worker -> (text index, name position, all exact) of the current run
+        full: dict = {}      # worker -> all exact
+        memo: dict = {}
+        for i, token in enumerate(_name_tokens(text)):
+            for name_token, exact in self._lookup(token, memo):
+                for idx, pos in self._postings[name_token]:
+                    seen = matched.setdefault(idx, {})
+                    seen[pos] = seen.get(pos, False) or exact
+                    run = phrase.get(idx)
+                    if pos == 0:
+                        phrase[idx] = (i, 0, exact)
+                    elif run and run[0] == i - 1 and run[1] == pos - 1:
+                        phrase[idx] = (i, pos, run[2] and exact)
+                    else:
+                        continue
+                    if phrase[idx][1] == len(self._parts[idx]) - 1:
+                        full[idx] = full.get(idx, False) or phrase[idx][2]
+
+        result = {}
+        for idx, seen in matched.items():
+            parts = self._parts[idx]
+            if idx in full:
+                score = 4 - (0 if full[idx] else self.FUZZY_PENALTY)
+            elif len(parts) >= 2 and len(parts) - 1 in seen and len(parts[-1]) > 2:
+                score = 3 if 0 in seen else 2
+                score -= sum(self.FUZZY_PENALTY for p in (0, len(parts) - 1) if p in seen and not seen[p])
+            else:
+                continue
+            result[idx] = score
+        return result
+
+    def match_text(self, text: str) -> str | None:
+        """Best-scoring worker named in text, or None below a last-name match."""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        idx = min(scores, key=lambda k: (-scores[k], k))
+        return self.names[idx] if scores[idx] >= 2 else None
+
+    def match_folder(self, folder_name: str) -> str | None:
+        """First worker whose last name, or whose whole name covers the folder, is in folder_name."""
+        folder = set(_name_tokens(folder_name))
+        candidates = sorted({idx for token in folder for idx, _ in self._postings.get(token, [])})
+        for idx in candidates:
+            parts = self._parts[idx]
+            if parts[-1] in folder or folder <= set(parts):
+                return self.names[idx]
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def get_name_index(worker_names: tuple) -> WorkerNameIndex:
+    """
+    Shared index per distinct worker list; a changed cases table gives a new
+    tuple. Looking it up hashes the whole tuple, so a scan should get the
+    index once and pass it to match_worker_from_text/_path for every file.
+    """
+    return WorkerNameIndex(worker_names)
+
+
+def _name_index(workers) -> WorkerNameIndex:
+    return workers if isinstance(workers, WorkerNameIndex) else get_name_index(tuple(workers))
+
+
+def match_worker_from_text(text: str, workers: list[str] | WorkerNameIndex) -> str | None:
     """
     Try to match a worker name from the OCR text against the list of known
-    workers in the database. Uses fuzzy substring matching.
+    workers in the database (or their WorkerNameIndex). Whole-word matching,
+    tolerant of one OCR error in longer names.
     """
-    text_upper = text.upper()
-    best_match = None
-    best_score = 0
-
-    for name in worker_names:
-        parts = name.upper().split()
-        # Check if last name appears in text
-        if len(parts) >= 2:
-            last = parts[-1]
-            first = parts[0]
-            # Full name match (best)
-            if name.upper() in text_upper:
-                return name
-            # Last name match
-            if last in text_upper and len(last) > 2:
-                score = 2
-                # First name also matches
-                if first in text_upper:
-                    score = 3
-                if score > best_score:
-                    best_score = score
-                    best_match = name
-        elif name.upper() in text_upper:
-            return name
-
-    return best_match if best_score >= 2 else None
-
-
-def match_worker_from_path(file_path: str, worker_names: list[str]) -> str | None:
+    return _name_index(workers).match_text(text)
+
+
+def match_worker_from_path(file_path: str, workers: list[str] | WorkerNameIndex) -> str | None:
     """Try to match worker from the folder path."""
     # Active Cases/[Worker Name]/Medical/COC/...
     parts = file_path.replace("\\", "/").split("/")
     for i, part in enumerate(parts):
         if part.lower() in ("active cases",):
             if i + 1 < len(parts):
-                folder_name = parts[i + 1]
-                # Try to match folder name against worker names
-                folder_upper = folder_name.upper()
-                for name in worker_names:
-                    name_upper = name.upper()
-                    # Direct match or folder contains the name
-                    if name_upper in folder_upper or folder_upper in name_upper:
-                        return name
-                    # Match on last name
-                    last = name_upper.split()[-1] if name_upper.split() else ""
-                    if last and last in folder_upper:
-                        return name
+                name = _name_index(workers).match_folder(parts[i + 1])
+                if name:
+                    return name
     return None
 
 
@@ -369,51 +644,73 @@ def match_worker_from_path(file_path: str, worker_names: list[str]) -> str | Non
 # Public API
 # ---------------------------------------------------------------------------
 
-def parse_coc_pdf(file_bytes: bytes, filename: str = "") -> dict:
-    """
-    Parse a COC PDF and extract certificate fields.
+# Template parsers in fallback order, with every field each one can produce.
+_TEMPLATE_PARSERS = {
+    "NSW_SIRA": (_parse_nsw_sira, {"worker_name", "claim_number", "capacity", "cert_from", "cert_to",
+                                   "hours_per_day", "days_per_week", "next_review", "diagnosis"}),
+    "VIC_TAC": (_parse_vic_tac, {"worker_name", "claim_number", "capacity", "cert_from", "cert_to",
+                                 "diagnosis"}),
+    "QLD": (_parse_qld, {"worker_name", "capacity", "cert_from", "cert_to"}),
+}
 
-    Returns dict with keys:
-        worker_name, claim_number, capacity, cert_from, cert_to,
-        hours_per_day, days_per_week, next_review, diagnosis, template
+
+def _parse_any_template(ctx: patterns.ScanContext) -> dict:
+    """Generic fallback: merge every template parser's fields, earliest parser first.
+
+    All parsers share one ScanContext, and a parser is skipped once every
+    field it could add is already filled.
     """
-    # Step 1: OCR extraction
+    fields: dict = {}
+    for parser, produces in _TEMPLATE_PARSERS.values():
+        if produces <= fields.keys():
+            continue
+        for k, v in parser(ctx).items():
+            if k not in fields and v:
+                fields[k] = v
+    return fields
+
+
+def _parse_text_fields(text: str) -> dict:
+    """Classify the template and parse its fields from OCR text (cacheable: no filename input)."""
+    ctx = patterns.ScanContext(text)
+    template, confidence = classify_template(ctx)
+    if template in _TEMPLATE_PARSERS:
+        fields = _TEMPLATE_PARSERS[template][0](ctx)
+    else:
+        fields = _parse_any_template(ctx)
+    fields["template"] = template
+    fields["_template_confidence"] = confidence
+    return fields
+
+
+def _ocr_coc(source: bytes | str, max_workers: int | None = None) -> tuple[str, dict, list[dict]]:
+    """OCR plus template parsing: returns (text, fields, timings); text is "" on failure."""
     try:
-        text = _extract_text_from_coc_pdf(file_bytes)
+        text, timings = extract_coc_text(source, max_workers=max_workers)
     except Exception:
-        text = ""
+        return "", {}, []
+    if not text.strip():
+        return "", {}, timings
+    fields = _parse_text_fields(text)
+    fields["_extraction_method"] = extraction_method(timings)
+    return text, fields, timings
+
 
+def _finish_fields(text: str, parsed: dict, filename: str) -> dict:
+    """Apply the filename and loose-date fallbacks to template-parsed fields."""
     if not text.strip():
         # Fallback: try filename dates only
         fields = _extract_dates_from_filename(filename)
         fields["_raw_text"] = ""
         fields["template"] = "UNKNOWN"
         fields["_ocr_failed"] = True
+        fields["_extraction_method"] = "none"
         return fields
 
-    # Step 2: Detect template
-    template = _detect_template(text)
-
-    # Step 3: Parse based on template
-    if template == "NSW_SIRA":
-        fields = _parse_nsw_sira(text)
-    elif template == "VIC_TAC":
-        fields = _parse_vic_tac(text)
-    elif template == "QLD":
-        fields = _parse_qld(text)
-    else:
-        # Generic fallback — try all parsers and merge
-        fields = {}
-        for parser in (_parse_nsw_sira, _parse_vic_tac, _parse_qld):
-            result = parser(text)
-            for k, v in result.items():
-                if k not in fields and v:
-                    fields[k] = v
-
-    fields["template"] = template
+    fields = dict(parsed)
     fields["_raw_text"] = text
 
-    # Step 4: If dates not found from OCR, try filename
+    # If dates not found from OCR, try filename
     if "cert_from" not in fields or "cert_to" not in fields:
         fn_dates = _extract_dates_from_filename(filename)
         if "cert_from" not in fields and "cert_from" in fn_dates:
@@ -421,9 +718,9 @@ def parse_coc_pdf(file_bytes: bytes, filename: str = "") -> dict:
         if "cert_to" not in fields and "cert_to" in fn_dates:
             fields["cert_to"] = fn_dates["cert_to"]
 
-    # Step 5: Last resort date extraction — find any date pairs in text
+    # Last resort date extraction — find any date pairs in text
     if "cert_from" not in fields or "cert_to" not in fields:
-        all_dates = _find_all_dates(text)
+        all_dates = set(_find_all_dates(text))
         parsed_dates = []
         for d in all_dates:
             pd = _parse_au_date(d)
@@ -439,10 +736,109 @@ def parse_coc_pdf(file_bytes: bytes, filename: str = "") -> dict:
     return fields
 
 
+def parse_coc_pdf(file_bytes: bytes, filename: str = "", max_workers: int | None = None,
+                  use_cache: bool = True) -> dict:
+    """
+    Parse a COC PDF and extract certificate fields.
+
+    Returns dict with keys:
+        worker_name, claim_number, capacity, cert_from, cert_to,
+        hours_per_day, days_per_week, next_review, diagnosis, template
+    plus _raw_text, _ocr_timings (per-page method and seconds),
+    _extraction_method ("text_layer", "ocr", "mixed" or "none") and
+    _ocr_cached (True when the result came from ocr_cache).
+    """
+    key = ocr_cache.cache_key(file_bytes, OCR_DPI) if use_cache else None
+    cached = ocr_cache.get(key) if key else None
+    if cached:
+        text, parsed = cached
+        timings = []
+    else:
+        text, parsed, timings = _ocr_coc(file_bytes, max_workers)
+        if key and text.strip():
+            ocr_cache.put(key, text, parsed)
+
+    fields = _finish_fields(text, parsed, filename)
+    fields["_ocr_timings"] = timings
+    fields["_ocr_cached"] = cached is not None
+    _count_method("cached" if cached else fields["_extraction_method"])
+    return fields
+
+
+def _ocr_coc_file(file_path: str) -> tuple[str, dict, list[dict], float]:
+    """Pool task: OCR one COC file, its pages serially in this worker."""
+    started = time.perf_counter()
+    text, parsed, timings = _ocr_coc(file_path, max_workers=1)
+    return text, parsed, timings, round(time.perf_counter() - started, 3)
+
+
+def parse_coc_files(file_paths: list[str], max_workers: int | None = None,
+                    use_cache: bool = True) -> Iterator[tuple[str, dict]]:
+    """
+    Parse many COC files in parallel, one file per pool task.
+
+    Cached files are answered first without touching the pool. Yields
+    (file_path, fields) as each file finishes, so callers can show
+    progress. A file that cannot be read yields fields with _error set.
+    """
+    def finish(path, key, text, parsed, timings, elapsed, cached=False):
+        if key and not cached and text.strip():
+            ocr_cache.put(key, text, parsed)
+        fields = _finish_fields(text, parsed, os.path.basename(path))
+        fields["_ocr_timings"] = timings
+        fields["_ocr_cached"] = cached
+        fields["_elapsed_s"] = elapsed
+        _count_method("cached" if cached else fields["_extraction_method"])
+        return fields
+
+    misses = []
+    for path in file_paths:
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                key = ocr_cache.cache_key(f.read(), OCR_DPI) if use_cache else None
+        except OSError as e:
+            yield path, {"_error": str(e), "_ocr_failed": True}
+            continue
+        cached = ocr_cache.get(key) if key else None
+        if cached:
+            text, parsed = cached
+            yield path, finish(path, key, text, parsed, [], round(time.perf_counter() - started, 3), cached=True)
+        else:
+            misses.append((path, key))
+
+    workers = max_workers or OCR_WORKERS
+    if workers <= 1 or len(misses) <= 1:
+        for path, key in misses:
+            try:
+                yield path, finish(path, key, *_ocr_coc_file(path))
+            except Exception as e:
+                yield path, {"_error": str(e), "_ocr_failed": True}
+        return
+
+    executor = get_ocr_executor(workers)
+    futures = {executor.submit(_ocr_coc_file, path): (path, key) for path, key in misses}
+    for future in as_completed(futures):
+        path, key = futures[future]
+        try:
+            yield path, finish(path, key, *future.result())
+        except Exception as e:
+            yield path, {"_error": str(e), "_ocr_failed": True}
+
+
 # ---------------------------------------------------------------------------
 # Folder scanner — detect new COC files in Active Cases
 # ---------------------------------------------------------------------------
 
+def is_coc_filename(filename: str) -> bool:
+    """True for PDF names that look like a certificate of capacity."""
+    f_lower = filename.lower()
+    if not f_lower.endswith(".pdf"):
+        return False
+    return ("coc" in f_lower or "certificate" in f_lower
+            or "capacity" in f_lower or "fitness" in f_lower)
+
+
 def scan_active_cases_for_cocs(active_cases_dir: str) -> list[dict]:
     """
     Scan the Active Cases folder tree for COC PDF files.
@@ -462,12 +858,8 @@ def scan_active_cases_for_cocs(active_cases_dir: str) -> list[dict]:
         # Walk through Medical/ and Medical/COC/ subfolders
         for root, dirs, files in os.walk(worker_path):
             for f in files:
-                if not f.lower().endswith(".pdf"):
-                    continue
                 # Match COC-related filenames
-                f_lower = f.lower()
-                if ("coc" in f_lower or "certificate" in f_lower
-                        or "capacity" in f_lower or "fitness" in f_lower):
+                if is_coc_filename(f):
                     full_path = os.path.join(root, f)
                     results.append({
                         "file_path": full_path,
@@ -0,0 +1,182 @@
+"""
+Incremental COC folder scanner.
+
+Keeps a manifest of the Active Cases tree in the scan_manifest table: every
+directory's mtime and every COC file's size/mtime/inode. A directory whose
+mtime is unchanged has had nothing added, removed or renamed in it, so its
+listing is skipped and its known subdirectories are visited straight from the
+manifest. Only new or changed COC files are yielded.
+
+Editing a file in place does not touch its directory's mtime, so such edits
+are only picked up when the directory is listed anyway or on a full scan.
+"""
+
+import os
+import time
+from typing import Iterator
+
+import coc_parser
+import database as db
+
+
+def _below(path: str) -> tuple[str, str]:
+    """
+    Bounds (low, high) with low <= p < high for exactly the paths p below
+    ``path``, so "path >= ? AND path < ?" is a range on the primary key.
+    """
+    low = os.path.join(path, "")
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+
+def _manifest(root: str) -> dict:
+    """Manifest rows for root and everything below it, keyed by path."""
+    conn = db.get_connection()
+    rows = conn.execute(
+        "SELECT path, parent, is_dir, size, mtime_ns, inode FROM scan_manifest "
+        "WHERE path = ? OR (path >= ? AND path < ?)",
+        (root, *_below(root)),
+    ).fetchall()
+    return {row["path"]: row for row in rows}
+
+
+def _folder_name(root: str, path: str) -> str:
+    return os.path.relpath(path, root).split(os.sep)[0]
+
+
+def scan_changes(root: str, full: bool = False, stats: dict | None = None) -> Iterator[dict]:
+    """
+    Walk the Active Cases tree and yield COC files that are new or changed
+    since the previous scan.
+
+    Each item has file_path, filename, folder_name (worker folder),
+    modified_time, size and change ("new" or "modified"). The manifest is
+    saved once the generator is exhausted; abandoning it part-way leaves the
+    previous manifest in place. full=True lists every directory regardless of
+    mtime. If ``stats`` is given it is filled with dirs_listed, dirs_skipped,
+    files_checked, changed, removed and elapsed_s.
+    """
+    started = time.perf_counter()
+    counts = {"dirs_listed": 0, "dirs_skipped": 0, "files_checked": 0, "changed": 0, "removed": 0}
+    if not os.path.isdir(root):
+        if stats is not None:
+            stats.update(counts, elapsed_s=0.0)
+        return
+
+    manifest = _manifest(root)
+    children: dict = {}
+    for row in manifest.values():
+        if row["parent"] is not None:
+            children.setdefault(row["parent"], []).append(row["path"])
+
+    upserts = []
+    removed_paths = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            dir_stat = os.stat(directory)
+        except OSError:
+            continue
+        prev = manifest.get(directory)
+        if (not full and prev is not None and prev["mtime_ns"] == dir_stat.st_mtime_ns
+                and prev["inode"] == dir_stat.st_ino):
+            counts["dirs_skipped"] += 1
+            stack.extend(p for p in children.get(directory, []) if manifest[p]["is_dir"])
+            continue
+
+        counts["dirs_listed"] += 1
+        at_root = directory == root
+        seen = set()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                # Worker folders may be links into OneDrive; below them, don't follow.
+                if entry.is_dir(follow_symlinks=at_root):
+                    seen.add(entry.path)
+                    stack.append(entry.path)
+                    continue
+                if at_root or not coc_parser.is_coc_filename(entry.name) or not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            seen.add(entry.path)
+            counts["files_checked"] += 1
+            known = manifest.get(entry.path)
+            if known is not None and (known["size"], known["mtime_ns"], known["inode"]) == (
+                    st.st_size, st.st_mtime_ns, st.st_ino):
+                continue
+            folder = _folder_name(root, entry.path)
+            upserts.append((entry.path, directory, 0, folder, st.st_size, st.st_mtime_ns, st.st_ino))
+            counts["changed"] += 1
+            yield {
+                "file_path": entry.path,
+                "filename": entry.name,
+                "folder_name": folder,
+                "modified_time": st.st_mtime,
+                "size": st.st_size,
+                "change": "new" if known is None else "modified",
+            }
+
+        removed_paths.extend(p for p in children.get(directory, []) if p not in seen)
+        folder = None if at_root else _folder_name(root, directory)
+        parent = None if at_root else os.path.dirname(directory)
+        upserts.append((directory, parent, 1, folder, None, dir_stat.st_mtime_ns, dir_stat.st_ino))
+
+    with db.transaction() as conn:
+        for path in removed_paths:
+            cur = conn.execute(
+                "DELETE FROM scan_manifest WHERE path = ? OR (path >= ? AND path < ?)",
+                (path, *_below(path)),
+            )
+            counts["removed"] += cur.rowcount
+        conn.executemany("""
+            INSERT OR REPLACE INTO scan_manifest (path, parent, is_dir, folder_name, size, mtime_ns, inode)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, upserts)
+    if stats is not None:
+        stats.update(counts, elapsed_s=round(time.perf_counter() - started, 4))
+
+
+def pending_cocs(root: str) -> list[dict]:
+    """COC files in the manifest that are not in processed_coc_files, newest first."""
+    conn = db.get_connection()
+    rows = conn.execute("""
+        SELECT m.path, m.folder_name, m.mtime_ns, m.size
+        FROM scan_manifest m
+        LEFT JOIN processed_coc_files p ON p.file_path = m.path
+        WHERE m.is_dir = 0 AND m.path >= ? AND m.path < ? AND p.id IS NULL
+        ORDER BY m.mtime_ns DESC
+    """, _below(root)).fetchall()
+    return [
+        {
+            "file_path": row["path"],
+            "filename": os.path.basename(row["path"]),
+            "folder_name": row["folder_name"],
+            "modified_time": row["mtime_ns"] / 1e9,
+            "size": row["size"],
+        }
+        for row in rows
+    ]
+
+
+def count_cocs(root: str) -> int:
+    """Number of COC files currently recorded under root."""
+    conn = db.get_connection()
+    return conn.execute(
+        "SELECT COUNT(*) FROM scan_manifest WHERE is_dir = 0 AND path >= ? AND path < ?",
+        _below(root),
+    ).fetchone()[0]
+
+
+def clear_manifest(root: str):
+    """Forget everything recorded under root, forcing the next scan to list it all."""
+    with db.transaction() as conn:
+        conn.execute(
+            "DELETE FROM scan_manifest WHERE path = ? OR (path >= ? AND path < ?)",
+            (root, *_below(root)),
+        )
@@ -0,0 +1,212 @@
+"""
+Background COC ingestion worker.
+
+Watches the Active Cases tree, queues new certificate PDFs in the coc_jobs
+table, reads them with coc_parser (text layer / OCR, cached), matches each to
+a case and records a pending row in coc_suggestions. The COC Tracker shows
+those suggestions for one-click approval, so no OCR runs inside a Streamlit
+request.
+
+Usage:
+    python -m coc_worker                 # poll forever
+    python -m coc_worker --once          # one scan + drain the queue, then exit
+    python -m coc_worker --dir "/path/to/Active Cases" --interval 30
+"""
+
+import argparse
+import os
+import time
+
+import coc_parser
+import coc_scanner
+import database as db
+
+# Same location app.py uses.
+ACTIVE_CASES_DIR = os.path.join(os.path.dirname(__file__), "..", "Active Cases")
+POLL_INTERVAL = 60
+BATCH_SIZE = 16
+MAX_ATTEMPTS = 3
+# A job left 'running' this long belonged to a worker that died.
+STALE_AFTER_MINUTES = 30
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+def enqueue_new_files(root: str = ACTIVE_CASES_DIR) -> int:
+    """Scan for new/changed COC files and queue any that aren't processed yet.
+
+    Returns the number of jobs queued. Files already suggested or imported
+    are left alone unless their contents changed on disk.
+    """
+    changed = {item["file_path"] for item in coc_scanner.scan_changes(root)}
+    pending = [f["file_path"] for f in coc_scanner.pending_cocs(root)]
+    queued = 0
+    with db.transaction() as conn:
+        for path in pending:
+            if path in changed:
+                # New or rewritten file: (re)queue, replacing any earlier result.
+                cur = conn.execute("""
+                    INSERT INTO coc_jobs (file_path) VALUES (?)
+                    ON CONFLICT(file_path) DO UPDATE SET
+                        status = 'queued', attempts = 0, error = NULL,
+                        queued_at = CURRENT_TIMESTAMP, started_at = NULL, finished_at = NULL
+                    WHERE coc_jobs.status != 'running'
+                """, (path,))
+                conn.execute(
+                    "DELETE FROM coc_suggestions WHERE file_path = ? AND status = 'pending'", (path,))
+            else:
+                cur = conn.execute("INSERT OR IGNORE INTO coc_jobs (file_path) VALUES (?)", (path,))
+            queued += cur.rowcount
+    return queued
+
+
+def requeue_stale_jobs() -> int:
+    """Put jobs abandoned by a crashed worker back on the queue."""
+    with db.transaction() as conn:
+        cur = conn.execute("""
+            UPDATE coc_jobs SET status = 'queued', worker_pid = NULL, started_at = NULL
+            WHERE status = 'running' AND started_at < datetime('now', ?)
+        """, (f"-{STALE_AFTER_MINUTES} minutes",))
+    return cur.rowcount
+
+
+def claim_jobs(limit: int = BATCH_SIZE) -> list[tuple[int, str]]:
+    """Atomically mark up to ``limit`` queued jobs as running; returns (id, file_path)."""
+    with db.transaction(immediate=True) as conn:
+        rows = conn.execute("""
+            UPDATE coc_jobs
+            SET status = 'running', attempts = attempts + 1,
+                worker_pid = ?, started_at = CURRENT_TIMESTAMP
+            WHERE id IN (SELECT id FROM coc_jobs WHERE status = 'queued' ORDER BY id LIMIT ?)
+            RETURNING id, file_path
+        """, (os.getpid(), limit)).fetchall()
+    return [(row["id"], row["file_path"]) for row in rows]
+
+
+def _finish_job(job_id: int, error: str | None = None):
+    with db.transaction() as conn:
+        if error is None:
+            conn.execute("""
+                UPDATE coc_jobs SET status = 'done', error = NULL, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (job_id,))
+        else:
+            conn.execute("""
+                UPDATE coc_jobs
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                    error = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (MAX_ATTEMPTS, error, job_id))
+
+
+def queue_counts() -> dict:
+    """Jobs per status, plus pending suggestions."""
+    conn = db.get_connection()
+    counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+    for row in conn.execute("SELECT status, COUNT(*) FROM coc_jobs GROUP BY status"):
+        counts[row[0]] = row[1]
+    counts["suggestions"] = conn.execute(
+        "SELECT COUNT(*) FROM coc_suggestions WHERE status = 'pending'").fetchone()[0]
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Processing
+# ---------------------------------------------------------------------------
+
+def _match_case(file_path: str, fields: dict, cases: dict,
+                names: coc_parser.WorkerNameIndex) -> tuple[int | None, str | None]:
+    """Case id and worker name for a parsed COC, by folder first, then OCR text."""
+    worker = coc_parser.match_worker_from_path(file_path, names)
+    if not worker and fields.get("worker_name"):
+        worker = coc_parser.match_worker_from_text(fields["worker_name"], names)
+    if not worker and fields.get("_raw_text"):
+        worker = coc_parser.match_worker_from_text(fields["_raw_text"], names)
+    return (cases[worker], worker) if worker else (None, fields.get("worker_name"))
+
+
+def _save_suggestion(job_id: int, file_path: str, fields: dict, cases: dict, names: coc_parser.WorkerNameIndex):
+    case_id, worker = _match_case(file_path, fields, cases, names)
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO coc_suggestions
+                (job_id, file_path, case_id, worker_name, cert_from, cert_to, capacity,
+                 days_per_week, hours_per_day, diagnosis, template, extraction_method, raw_text)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (job_id, file_path, case_id, worker,
+              fields.get("cert_from"), fields.get("cert_to"), fields.get("capacity"),
+              fields.get("days_per_week"), fields.get("hours_per_day"), fields.get("diagnosis"),
+              fields.get("template"), fields.get("_extraction_method"), fields.get("_raw_text")))
+
+
+def process_jobs(jobs: list[tuple[int, str]], max_workers: int | None = None) -> tuple[int, int]:
+    """Parse claimed jobs in parallel and record suggestions; returns (done, failed)."""
+    if not jobs:
+        return 0, 0
+    conn = db.get_connection()
+    cases = {row["worker_name"]: row["id"] for row in conn.execute(
+        "SELECT id, worker_name FROM cases WHERE status = 'Active' ORDER BY worker_name")}
+    names = coc_parser.get_name_index(tuple(cases))
+    job_ids = {path: job_id for job_id, path in jobs}
+    done = failed = 0
+    for path, fields in coc_parser.parse_coc_files(list(job_ids), max_workers=max_workers):
+        job_id = job_ids[path]
+        if fields.get("_error"):
+            _finish_job(job_id, fields["_error"])
+            failed += 1
+            continue
+        try:
+            _save_suggestion(job_id, path, fields, cases, names)
+        except Exception as e:
+            _finish_job(job_id, str(e))
+            failed += 1
+            continue
+        _finish_job(job_id)
+        done += 1
+    return done, failed
+
+
+def run_once(root: str = ACTIVE_CASES_DIR, max_workers: int | None = None) -> dict:
+    """One scan, then drain the queue. Returns counts for logging."""
+    requeued = requeue_stale_jobs()
+    queued = enqueue_new_files(root)
+    done = failed = 0
+    while True:
+        jobs = claim_jobs()
+        if not jobs:
+            break
+        d, f = process_jobs(jobs, max_workers=max_workers)
+        done, failed = done + d, failed + f
+    return {"requeued": requeued, "queued": queued, "done": done, "failed": failed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Background COC ingestion worker.")
+    parser.add_argument("--dir", default=ACTIVE_CASES_DIR, help="Active Cases folder to watch")
+    parser.add_argument("--interval", type=int, default=POLL_INTERVAL, help="seconds between scans")
+    parser.add_argument("--workers", type=int, default=None, help="OCR worker processes")
+    parser.add_argument("--once", action="store_true", help="scan and drain the queue once, then exit")
+    args = parser.parse_args(argv)
+
+    db.ensure_schema()
+    try:
+        while True:
+            started = time.perf_counter()
+            result = run_once(args.dir, max_workers=args.workers)
+            print(f"[coc_worker] queued {result['queued']}, done {result['done']}, "
+                  f"failed {result['failed']}, requeued {result['requeued']} "
+                  f"in {time.perf_counter() - started:.1f}s", flush=True)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        coc_parser.shutdown_ocr_executor()
+        db.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
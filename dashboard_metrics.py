@@ -0,0 +1,160 @@
+"""
+Vectorised dashboard metrics.
+
+Whole-column equivalents of app.coc_status and app.calculate_days_lost, plus
+the Dashboard's headline counts and alert list, computed with pandas/NumPy
+column operations instead of per-row iterrows() loops.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+SEVERITY_ORDER = ["URGENT", "WARNING", "ACTION", "INFO"]
+ALERT_COLUMNS = ["type", "severity", "worker", "case_id", "message", "action"]
+
+
+def _today(today=None) -> pd.Timestamp:
+    return pd.Timestamp(today or date.today())
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    return pd.to_datetime(values, format="%Y-%m-%d", errors="coerce")
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    """True where a text column is NULL or an empty string."""
+    return values.isna() | (values == "")
+
+
+# ---------------------------------------------------------------------------
+# Column-level calculations
+# ---------------------------------------------------------------------------
+
+def coc_status_frame(cert_to: pd.Series, today=None) -> pd.DataFrame:
+    """COC status text, colour and days remaining for a column of cert_to dates.
+
+    Matches coc_status(): blank -> "No COC"/red, unparseable -> "Invalid Date"/gray,
+    past -> EXPIRED/red, within 7 days -> EXPIRING/orange, otherwise Current/green.
+    """
+    cert_to = cert_to.reset_index(drop=True)
+    parsed = _parse_dates(cert_to)
+    delta = (parsed - _today(today)).dt.days
+    blank = _blank(cert_to)
+    invalid = parsed.isna() & ~blank
+    expired = ~blank & ~invalid & (delta < 0)
+    expiring = ~blank & ~invalid & (delta >= 0) & (delta <= 7)
+
+    days = delta.fillna(0).astype(int).astype(str)
+    ago = delta.abs().fillna(0).astype(int).astype(str)
+    conditions = [blank, invalid, expired, expiring]
+    status = np.select(
+        conditions,
+        ["No COC", "Invalid Date", "EXPIRED (" + ago + "d ago)", "EXPIRING (" + days + "d)"],
+        default="Current (" + days + "d left)",
+    )
+    color = np.select(conditions, ["red", "gray", "red", "orange"], default="green")
+    return pd.DataFrame({"status": status, "color": color, "days_left": delta})
+
+
+def days_lost(cases: pd.DataFrame, today=None) -> pd.Series:
+    """Days lost per case, matching calculate_days_lost().
+
+    No capacity counts every day since DOI, full capacity/cleared counts none,
+    modified duties and anything else count half (rounded down).
+    """
+    if len(cases) == 0:
+        return pd.Series(dtype="int64", index=cases.index)
+    doi = _parse_dates(cases["date_of_injury"])
+    days_since = (_today(today) - doi).dt.days
+    cap = cases["current_capacity"]
+    cap_lower = cap.fillna("").astype(str).str.lower()
+
+    weight = np.select(
+        [
+            cap_lower.str.contains("no capacity", regex=False),
+            cap_lower.str.contains("modified", regex=False),
+            cap_lower.str.contains("full|cleared|clearance"),
+        ],
+        [1.0, 0.5, 0.0],
+        default=0.5,
+    )
+    lost = np.floor(days_since.to_numpy(dtype=float) * weight)
+    valid = doi.notna().to_numpy() & ~_blank(cap).to_numpy() & (days_since.to_numpy(dtype=float) >= 0)
+    return pd.Series(np.where(valid, lost, 0).astype("int64"), index=cases.index)
+
+
+# ---------------------------------------------------------------------------
+# Dashboard outputs
+# ---------------------------------------------------------------------------
+
+def dashboard_metrics(active: pd.DataFrame, cocs: pd.DataFrame, terms: pd.DataFrame, today=None) -> dict:
+    """Headline counts for the Dashboard metric buttons."""
+    expired = (_parse_dates(cocs["cert_to"]) < _today(today)).sum() if len(cocs) > 0 else 0
+    return {
+        "active": len(active),
+        "no_capacity": int((active["current_capacity"] == "No Capacity").sum()),
+        "modified": int((active["current_capacity"] == "Modified Duties").sum()),
+        "pending_terminations": int((terms["status"] == "Pending").sum()) if len(terms) > 0 else 0,
+        "expired_cocs": int(expired),
+        "days_lost": int(days_lost(active, today).sum()),
+    }
+
+
+def _alert_frame(type_, severity, worker, case_id, message, action) -> pd.DataFrame:
+    # Scalars broadcast; Series/arrays are taken positionally.
+    frame = pd.DataFrame({"worker": worker.to_numpy(), "case_id": case_id.astype("int64").to_numpy()})
+    for column, value in (("type", type_), ("severity", severity), ("message", message), ("action", action)):
+        frame[column] = value.to_numpy() if isinstance(value, pd.Series) else value
+    return frame[ALERT_COLUMNS]
+
+
+def dashboard_alerts(active: pd.DataFrame, cocs: pd.DataFrame, terms: pd.DataFrame, today=None) -> pd.DataFrame:
+    """All Dashboard alerts as one DataFrame, ordered by severity.
+
+    Within a severity, alerts keep the order the page has always shown:
+    COC status, missing COC, pending terminations, then missing PIAWE.
+    """
+    frames = []
+
+    if len(cocs) > 0:
+        statuses = coc_status_frame(cocs["cert_to"], today)
+        flagged = statuses["color"].isin(["red", "orange"]).to_numpy()
+        hits, st_hits = cocs[flagged], statuses[flagged]
+        frames.append(_alert_frame(
+            "COC",
+            np.where(st_hits["color"] == "red", "URGENT", "WARNING"),
+            hits["worker_name"], hits["case_id"],
+            "COC " + st_hits["status"],
+            "Obtain new Certificate of Capacity",
+        ))
+
+    not_full = active["current_capacity"] != "Full Capacity"
+
+    no_coc = active[~active["id"].isin(cocs["case_id"]) & not_full] if len(cocs) > 0 else active[not_full]
+    frames.append(_alert_frame(
+        "COC", "WARNING", no_coc["worker_name"], no_coc["id"],
+        "No COC on record", "Obtain Certificate of Capacity from insurer",
+    ))
+
+    if len(terms) > 0:
+        pending = terms[terms["status"] == "Pending"]
+        frames.append(_alert_frame(
+            "TERMINATION", "ACTION", pending["worker_name"], pending["case_id"],
+            "Termination pending - " + pending["termination_type"].astype(object).map(str),
+            "Follow up with " + pending["assigned_to"].astype(object).map(str),
+        ))
+
+    no_piawe = active[active["piawe"].isna() & not_full & (active["reduction_rate"] != "N/A")]
+    frames.append(_alert_frame(
+        "PAYROLL", "INFO", no_piawe["worker_name"], no_piawe["id"],
+        "PIAWE data missing", "Obtain PIAWE from insurer for payroll calculation",
+    ))
+
+    frames = [f for f in frames if len(f) > 0]
+    if not frames:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+    alerts = pd.concat(frames, ignore_index=True)
+    rank = alerts["severity"].map({s: i for i, s in enumerate(SEVERITY_ORDER)})
+    return alerts.iloc[rank.argsort(kind="stable")].reset_index(drop=True)
@@ -0,0 +1,82 @@
+"""
+Streamlit-aware caching for the dashboard's read-only loaders.
+
+Loaders are memoized with st.cache_data, keyed on the generation counters of
+the tables they read (see database.table_generations). Every committed write
+through database.transaction() bumps the generations of the tables it touched,
+in this process and, through the table_generations table, in every other
+process using the database (the COC worker, the CLIs), so a rerun that changed
+nothing is served from memory and a write invalidates only the loaders that
+depend on the affected tables.
+"""
+
+import functools
+import threading
+
+import streamlit as st
+
+import database as db
+
+_loaders: dict = {}
+_stats_lock = threading.Lock()
+_stats: dict = {}
+
+
+def _record(name: str, key: str):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"calls": 0, "misses": 0})
+        entry[key] += 1
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _cached_call(name: str, generations: tuple, args: tuple, kwargs: tuple):
+    # Only runs on a cache miss; the generations tuple is part of the key.
+    _record(name, "misses")
+    return _loaders[name](*args, **dict(kwargs))
+
+
+def cached_loader(*tables):
+    """
+    Decorator: memoize a loader until one of ``tables`` is written.
+
+    Only tables named in INSERT/UPDATE/DELETE statements count as written;
+    rows written by triggers do not. A loader reading a trigger-maintained
+    table (latest_certificates, case_filter_counts, search_index) must also
+    list the tables whose triggers write it, e.g. "latest_certificates",
+    "certificates".
+    """
+    def decorate(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        _loaders[name] = func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _record(name, "calls")
+            return _cached_call(name, db.table_generations(tables), args, tuple(sorted(kwargs.items())))
+
+        wrapper.tables = tables
+        wrapper.uncached = func
+        return wrapper
+    return decorate
+
+
+def cache_stats() -> list[dict]:
+    """Per-loader call/hit/miss counts since the process started."""
+    with _stats_lock:
+        rows = []
+        for name, entry in sorted(_stats.items()):
+            calls, misses = entry["calls"], entry["misses"]
+            hits = max(calls - misses, 0)
+            rows.append({
+                "loader": name.rsplit(".", 1)[-1],
+                "calls": calls,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / calls, 3) if calls else 0.0,
+            })
+        return rows
+
+
+def clear_cache():
+    """Drop every cached result (e.g. after an out-of-band DB change)."""
+    _cached_call.clear()
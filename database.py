@@ -1,22 +1,547 @@
 import sqlite3
 import os
+import functools
 import hashlib
+import json
+import re
 import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "workcover.db")
 
+# Pragmas applied once when a pooled connection is opened. WAL lets the
+# Streamlit session threads read while another session writes; NORMAL sync
+# is durable under WAL except for the last transaction on power loss.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 30000",
+)
+
+# Idle connections kept for reuse by new script threads; extras are closed.
+POOL_MAX_IDLE = 32
+
+# Statements slower than this (execute plus fetches, in ms) go to slow_query_log.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "250"))
+# Recent statement timings kept in memory for query_stats().
+QUERY_SAMPLES = int(os.environ.get("QUERY_SAMPLES", "5000"))
+
+
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_idle_connections: list = []
+_owned_connections: dict = {}
+_pool_stats = {"opened": 0, "reused": 0, "checkouts": 0}
+# Bumped by close_all_connections(); a thread still holding a connection
+# from an earlier epoch drops it (it has been closed) and checks out another.
+_pool_epoch = 0
+# Bumped when this process migrates the schema or closes its connections
+# (DB_PATH may then point at another file); see schema_epoch().
+_schema_epoch = 0
+
+
+def _open_connection():
+    conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False, factory=_TimedConnection)
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    conn.set_trace_callback(_track_writes)
+    return conn
+
+
+def _reclaim_dead_threads():
+    """Return connections held by finished threads to the idle pool.
+
+    Streamlit runs each rerun on a fresh script thread, so connections are
+    handed back here rather than closed. Caller must hold _pool_lock.
+    """
+    for thread in [t for t in _owned_connections if not t.is_alive()]:
+        conn = _owned_connections.pop(thread)
+        if conn.in_transaction:
+            conn.rollback()
+        if len(_idle_connections) < POOL_MAX_IDLE:
+            _idle_connections.append(conn)
+        else:
+            conn.close()
+
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    """Return the calling thread's pooled connection.
+
+    The connection is shared by every helper on the thread and must not be
+    closed by callers. Use transaction() for writes.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.epoch != _pool_epoch:
+        conn = _local.conn = None
+    if conn is None:
+        with _pool_lock:
+            _reclaim_dead_threads()
+            if _idle_connections:
+                conn = _idle_connections.pop()
+                _pool_stats["reused"] += 1
+            else:
+                conn = _open_connection()
+                _pool_stats["opened"] += 1
+                _local.opened_this_run = getattr(_local, "opened_this_run", 0) + 1
+            _owned_connections[threading.current_thread()] = conn
+        _local.conn = conn
+        _local.epoch = _pool_epoch
+        _local.depth = 0
+    _local.checkouts_this_run = getattr(_local, "checkouts_this_run", 0) + 1
+    with _pool_lock:
+        _pool_stats["checkouts"] += 1
     return conn
 
 
-def init_db():
+@contextmanager
+def transaction(immediate: bool = False):
+    """Run a block of writes on the pooled connection as one transaction.
+
+    Commits on success and rolls back on any exception (including Streamlit's
+    rerun/stop control-flow exceptions). Nested blocks join the outer one.
+    immediate=True takes the write lock up front (BEGIN IMMEDIATE) so DDL
+    and read-then-write sequences are atomic across processes.
+    """
     conn = get_connection()
-    c = conn.cursor()
+    if immediate and _local.depth == 0 and not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    _local.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.rollback()
+            _dirty_tables().clear()
+        raise
+    _local.depth -= 1
+    if _local.depth == 0:
+        try:
+            shared = _persist_writes(conn)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            _dirty_tables().clear()
+            raise
+        _publish_writes(shared)
+
+
+def in_transaction() -> bool:
+    """True inside a transaction() block on the calling thread."""
+    return getattr(_local, "depth", 0) > 0
+
+
+def release_connection():
+    """Return the calling thread's connection to the idle pool."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    if _local.epoch != _pool_epoch:
+        _local.conn = None
+        return
+    if conn.in_transaction:
+        conn.rollback()
+    with _pool_lock:
+        _owned_connections.pop(threading.current_thread(), None)
+        if len(_idle_connections) < POOL_MAX_IDLE:
+            _idle_connections.append(conn)
+        else:
+            conn.close()
+    _local.conn = None
+
+
+def close_all_connections():
+    """
+    Close every pooled connection (used by scripts and shutdown hooks).
+    DB_PATH may change before the next connection, so cached reads are
+    invalidated too.
+    """
+    global _generation_epoch, _pool_epoch, _schema_epoch
+    release_connection()
+    with _pool_lock:
+        for conn in _idle_connections + list(_owned_connections.values()):
+            conn.close()
+        _idle_connections.clear()
+        _owned_connections.clear()
+        _pool_epoch += 1
+        _schema_epoch += 1
+    with _generation_lock:
+        _shared_generations.clear()
+        _generation_epoch += 1
+
+
+def start_rerun():
+    """Reset the per-rerun connection counters and query label for the calling thread."""
+    _local.opened_this_run = 0
+    _local.checkouts_this_run = 0
+    _local.statements_this_run = 0
+    _local.query_label = None
+
+
+def pool_stats() -> dict:
+    """
+    Connection pool counters, process-wide and for the current rerun.
+
+    "statements" counts the statements run on pooled connections; SQLite
+    traces each trigger firing as another run of the triggering statement.
+    Nested statements issued by virtual tables (FTS5) are not counted.
+    """
+    with _pool_lock:
+        stats = dict(_pool_stats)
+        stats["idle"] = len(_idle_connections)
+        stats["in_use"] = len(_owned_connections)
+    with _statement_lock:
+        stats["statements"] = _statements_traced
+    stats["opened_this_run"] = getattr(_local, "opened_this_run", 0)
+    stats["checkouts_this_run"] = getattr(_local, "checkouts_this_run", 0)
+    stats["statements_this_run"] = getattr(_local, "statements_this_run", 0)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Table generations (write tracking for caches)
+# ---------------------------------------------------------------------------
+#
+# Each process keeps its own counters, bumped when transaction() commits. The
+# same commit also bumps the table's row in table_generations, so a process
+# that sees PRAGMA data_version move (another connection committed, e.g. the
+# COC worker or a CLI) picks up the tables it wrote. A commit that moved no
+# row there came from a writer outside transaction(); it bumps an epoch that
+# is part of every generations tuple, invalidating everything.
+#
+# Only statements run directly are traced: rows a trigger writes (e.g. into
+# latest_certificates or search_index) do not mark its target table.
+
+_WRITE_RE = re.compile(
+    r"^\s*(?:INSERT|REPLACE|UPDATE|DELETE)(?:\s+OR\s+\w+)?\s+(?:INTO\s+|FROM\s+)?[\"\[`]?(\w+)",
+    re.IGNORECASE,
+)
+_GENERATIONS_TABLE = "table_generations"
+_generation_lock = threading.Lock()
+_table_generations: dict = {}
+_generation_epoch = 0
+# Highest table_generations value seen for each table by this process.
+_shared_generations: dict = {}
+_statement_lock = threading.Lock()
+_statements_traced = 0
+
+
+def _dirty_tables() -> set:
+    dirty = getattr(_local, "dirty_tables", None)
+    if dirty is None:
+        dirty = _local.dirty_tables = set()
+    return dirty
+
+
+def _track_writes(statement: str):
+    """sqlite3 trace callback: count the statement and note which tables this thread has written."""
+    global _statements_traced
+    if statement.startswith("--"):
+        return  # a nested statement, e.g. an FTS5 shadow-table read
+    with _statement_lock:
+        _statements_traced += 1
+    _local.statements_this_run = getattr(_local, "statements_this_run", 0) + 1
+    m = _WRITE_RE.match(statement)
+    if m and m.group(1).lower() != _GENERATIONS_TABLE:
+        _dirty_tables().add(m.group(1).lower())
+
+
+def _persist_writes(conn) -> dict:
+    """
+    Bump the shared counters of the tables the open transaction wrote, just
+    before it commits. Returns the new values; {} before migration 11.
+    """
+    shared = {}
+    try:
+        for table in sorted(_dirty_tables()):
+            shared[table] = conn.execute(
+                f"INSERT INTO {_GENERATIONS_TABLE} (table_name, generation) VALUES (?, 1) "
+                "ON CONFLICT(table_name) DO UPDATE SET generation = generation + 1 RETURNING generation",
+                (table,),
+            ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return {}
+    return shared
+
+
+def _publish_writes(shared: dict):
+    """Bump the generation of every table written by the committed transaction."""
+    dirty = _dirty_tables()
+    if dirty:
+        bump_tables(*dirty)
+        dirty.clear()
+    with _generation_lock:
+        for table, generation in shared.items():
+            _shared_generations[table] = max(_shared_generations.get(table, 0), generation)
+
+
+def _sync_shared_generations():
+    """Pick up commits made by other connections since this one last looked."""
+    global _generation_epoch
+    conn = get_connection()
+    if conn.in_transaction:
+        return
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if version == conn.data_version:
+        return
+    try:
+        rows = conn.execute(f"SELECT table_name, generation FROM {_GENERATIONS_TABLE}").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    total = sum(generation for _, generation in rows)
+    with _generation_lock:
+        for table, generation in rows:
+            if generation > _shared_generations.get(table, 0):
+                _shared_generations[table] = generation
+                _table_generations[table] = _table_generations.get(table, 0) + 1
+        if conn.data_version is not None and total == conn.generations_total:
+            _generation_epoch += 1
+    conn.data_version = version
+    conn.generations_total = total
+
+
+def bump_tables(*tables):
+    """Mark tables as changed so cached reads of them are invalidated."""
+    with _generation_lock:
+        for table in tables:
+            _table_generations[table] = _table_generations.get(table, 0) + 1
+
+
+def table_generations(tables) -> tuple:
+    """
+    Current generation counter of each table, in the order given, after the
+    epoch. Commits by other processes are picked up first (see above).
+    """
+    _sync_shared_generations()
+    with _generation_lock:
+        return (_generation_epoch,) + tuple(_table_generations.get(t, 0) for t in tables)
+
+
+# ---------------------------------------------------------------------------
+# Query instrumentation
+# ---------------------------------------------------------------------------
+
+_query_samples: deque = deque(maxlen=QUERY_SAMPLES)
+
+
+class _QuerySample:
+    __slots__ = ("sql", "params", "label", "ms", "logged")
+
+    def __init__(self, sql, params, label, ms):
+        self.sql = sql
+        self.params = params
+        self.label = label
+        self.ms = ms
+        self.logged = False
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """
+    Cursor that times its statements. Time spent in fetchone/fetchmany/
+    fetchall is added to the statement that produced the rows, since SQLite
+    does most of a query's work while stepping through them; rows read by
+    iterating the cursor directly are not timed.
+    """
+    _sample = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._sample = _record_query(sql, parameters, (time.perf_counter() - started) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._sample = _record_query(sql, None, (time.perf_counter() - started) * 1000)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _add_fetch_time(self._sample, (time.perf_counter() - started) * 1000)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            _add_fetch_time(self._sample, (time.perf_counter() - started) * 1000)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _add_fetch_time(self._sample, (time.perf_counter() - started) * 1000)
+
+
+class _TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including pd.read_sql_query's, are _TimedCursor."""
+
+    # PRAGMA data_version and the table_generations total when this connection
+    # last synced (see _sync_shared_generations).
+    data_version = None
+    generations_total = None
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    # The C implementations would bypass _TimedCursor.execute.
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def set_query_label(label: str | None):
+    """Attribute the calling thread's statements to ``label`` (e.g. the page) until the next rerun."""
+    _local.query_label = label
+
+
+def _record_query(sql, params, ms) -> _QuerySample:
+    label = getattr(_local, "query_label", None) or threading.current_thread().name
+    sample = _QuerySample(sql, params, label, ms)
+    _query_samples.append(sample)
+    if ms >= SLOW_QUERY_MS:
+        _log_slow_query(sample)
+    return sample
+
+
+def _add_fetch_time(sample, ms):
+    if sample is None:
+        return
+    sample.ms += ms
+    if sample.ms >= SLOW_QUERY_MS and not sample.logged:
+        _log_slow_query(sample)
+
+
+def _param_types(params) -> str | None:
+    """
+    Parameter count and types, e.g. "3: int, str, NoneType". Values are
+    never persisted: they include password hashes, salts and worker details.
+    """
+    if not params:
+        return None
+    if isinstance(params, dict):
+        return f"{len(params)}: " + ", ".join(f"{name}={type(value).__name__}" for name, value in params.items())
+    return f"{len(params)}: " + ", ".join(type(value).__name__ for value in params)
+
+
+def _log_slow_query(sample: _QuerySample):
+    """
+    Queue a slow statement for slow_query_log: its normalized SQL (literals
+    replaced by ?) and parameter types only. Time waiting on busy_timeout
+    counts, so any statement can land here, including credential writes.
+    """
+    sample.logged = True
+    if "slow_query_log" in sample.sql:
+        return  # don't log the log's own writes
+    import log_writer  # log_writer imports this module
+    try:
+        log_writer.log_slow_query(normalize_sql(sample.sql), _param_types(sample.params),
+                                  round(sample.ms, 2), sample.label)
+    except sqlite3.Error:
+        pass  # written inline before migration 10 created the table
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """``sql`` with literals replaced by ? and whitespace collapsed, for grouping statements."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"(?<![\w.])-?\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+    return " ".join(sql.split())
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def query_stats() -> list[dict]:
+    """
+    Per-statement timings over the last QUERY_SAMPLES statements, slowest
+    total first: sql (normalized), count, total_ms, p50_ms, p95_ms, max_ms
+    and labels (where the statement ran, most frequent first).
+    """
+    groups: dict = {}
+    for sample in list(_query_samples):
+        group = groups.setdefault(normalize_sql(sample.sql), ([], {}))
+        group[0].append(sample.ms)
+        group[1][sample.label] = group[1].get(sample.label, 0) + 1
+    stats = []
+    for sql, (times, labels) in groups.items():
+        times.sort()
+        stats.append({
+            "sql": sql,
+            "count": len(times),
+            "total_ms": round(sum(times), 2),
+            "p50_ms": round(_percentile(times, 0.50), 2),
+            "p95_ms": round(_percentile(times, 0.95), 2),
+            "max_ms": round(times[-1], 2),
+            "labels": sorted(labels, key=labels.get, reverse=True),
+        })
+    stats.sort(key=lambda row: row["total_ms"], reverse=True)
+    return stats
+
+
+def reset_query_stats():
+    """Forget the in-memory statement timings."""
+    _query_samples.clear()
+
+
+def init_db():
+    with transaction(immediate=True) as conn:
+        _create_tables(conn.cursor())
+        migrate()
+    _bump_schema_epoch()
+
+
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
+
+
+def ensure_schema() -> bool:
+    """
+    Create, migrate and seed the database once per process.
+
+    Later calls only check that the schema is still current, a read that
+    never waits for the write lock, so app.py can call this on every rerun.
+    Setup runs again if the check fails (e.g. the database file was
+    replaced). Returns True when setup ran.
+    """
+    global _bootstrapped
+    if _bootstrapped and schema_is_current():
+        return False
+    with _bootstrap_lock:
+        if _bootstrapped and schema_is_current():
+            return False
+        init_db()
+        seed_data()
+        seed_default_admin()
+        _bootstrapped = True
+    return True
+
+
+def _create_tables(c):
 
     c.execute("""
         CREATE TABLE IF NOT EXISTS cases (
@@ -45,13 +570,6 @@ def init_db():
         )
     """)
 
-    # Add columns if they don't exist (for existing databases)
-    for col in ("email", "phone", "injury_type"):
-        try:
-            c.execute(f"ALTER TABLE cases ADD COLUMN {col} TEXT")
-        except Exception:
-            pass
-
     c.execute("""
         CREATE TABLE IF NOT EXISTS certificates (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -157,13 +675,6 @@ def init_db():
         )
     """)
 
-    # Add salt column if missing (for existing databases)
-    for col in ("salt", "entity", "site"):
-        try:
-            c.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT")
-        except Exception:
-            pass
-
     # Incident reports — submitted by site managers
     c.execute("""
         CREATE TABLE IF NOT EXISTS incidents (
@@ -248,8 +759,503 @@ def init_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
+
+# ---------------------------------------------------------------------------
+# Schema migrations
+# ---------------------------------------------------------------------------
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = _table_columns(conn, table)
+    for col, decl in columns:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+
+
+def _migrate_case_columns(conn):
+    _add_missing_columns(conn, "cases", (("email", "TEXT"), ("phone", "TEXT"), ("injury_type", "TEXT")))
+
+
+def _migrate_user_columns(conn):
+    _add_missing_columns(conn, "users", (("salt", "TEXT"), ("entity", "TEXT"), ("site", "TEXT")))
+
+
+def _migrate_hot_path_indexes(conn):
+    # One index per filter/sort used by the app.py pages.
+    for stmt in (
+        "CREATE INDEX IF NOT EXISTS idx_cases_state_worker ON cases(state, worker_name)",
+        "CREATE INDEX IF NOT EXISTS idx_cases_worker_name ON cases(worker_name)",
+        "CREATE INDEX IF NOT EXISTS idx_certificates_case_cert_to ON certificates(case_id, cert_to DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_payroll_case_period ON payroll_entries(case_id, period_to DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_payroll_period_to ON payroll_entries(period_to DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_case_type ON documents(case_id, doc_type)",
+        "CREATE INDEX IF NOT EXISTS idx_activity_case_created ON activity_log(case_id, created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_activity_created ON activity_log(created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_created ON audit_log(created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_correspondence_follow_up ON correspondence(follow_up_done, follow_up_date)",
+        "CREATE INDEX IF NOT EXISTS idx_correspondence_case_date ON correspondence(case_id, date DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_correspondence_date ON correspondence(date DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_calendar_open_date ON calendar_events(is_completed, event_date)",
+        "CREATE INDEX IF NOT EXISTS idx_calendar_event_date ON calendar_events(event_date DESC)",
+    ):
+        conn.execute(stmt)
+
+
+def _refresh_latest_certificate_sql(case_ref):
+    return f"""
+            DELETE FROM latest_certificates WHERE case_id = {case_ref};
+            INSERT INTO latest_certificates (case_id, certificate_id, cert_from, cert_to,
+                                             capacity, days_per_week, hours_per_day)
+            SELECT case_id, id, cert_from, cert_to, capacity, days_per_week, hours_per_day
+            FROM certificates WHERE case_id = {case_ref}
+            ORDER BY cert_to DESC, id DESC LIMIT 1;"""
+
+
+def _migrate_latest_certificates(conn):
+    # Materialised "latest certificate per case", kept current by triggers so
+    # readers never run a per-row correlated subquery over certificate history.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS latest_certificates (
+            case_id INTEGER PRIMARY KEY,
+            certificate_id INTEGER NOT NULL,
+            cert_from TEXT,
+            cert_to TEXT,
+            capacity TEXT,
+            days_per_week INTEGER,
+            hours_per_day REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_latest_certificates_cert_to ON latest_certificates(cert_to)")
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_certificates_latest_insert
+        AFTER INSERT ON certificates
+        BEGIN{_refresh_latest_certificate_sql("NEW.case_id")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_certificates_latest_update
+        AFTER UPDATE ON certificates
+        BEGIN{_refresh_latest_certificate_sql("NEW.case_id")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_certificates_latest_move
+        AFTER UPDATE OF case_id ON certificates
+        WHEN OLD.case_id <> NEW.case_id
+        BEGIN{_refresh_latest_certificate_sql("OLD.case_id")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_certificates_latest_delete
+        AFTER DELETE ON certificates
+        BEGIN{_refresh_latest_certificate_sql("OLD.case_id")}
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_cases_latest_delete
+        AFTER DELETE ON cases
+        BEGIN
+            DELETE FROM latest_certificates WHERE case_id = OLD.id;
+        END
+    """)
+
+    conn.execute("DELETE FROM latest_certificates")
+    conn.execute("""
+        INSERT INTO latest_certificates (case_id, certificate_id, cert_from, cert_to,
+                                         capacity, days_per_week, hours_per_day)
+        SELECT case_id, id, cert_from, cert_to, capacity, days_per_week, hours_per_day
+        FROM (
+            SELECT c.*, ROW_NUMBER() OVER (
+                PARTITION BY case_id ORDER BY cert_to DESC, id DESC
+            ) AS rn
+            FROM certificates c
+        )
+        WHERE rn = 1
+    """)
+
+
+def _migrate_ocr_cache(conn):
+    # Content-addressed OCR results; see ocr_cache.py for the key and LRU policy.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            cache_key TEXT PRIMARY KEY,
+            raw_text TEXT NOT NULL,
+            fields_json TEXT NOT NULL,
+            template TEXT,
+            size_bytes INTEGER NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache(last_used_at)")
+
+
+def _migrate_scan_manifest(conn):
+    # Last-seen state of the Active Cases tree, used by coc_scanner to skip
+    # directories whose mtime hasn't changed. Only directories and COC files
+    # are recorded.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scan_manifest (
+            path TEXT PRIMARY KEY,
+            parent TEXT,
+            is_dir INTEGER NOT NULL,
+            folder_name TEXT,
+            size INTEGER,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER,
+            scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_manifest_files ON scan_manifest(is_dir, mtime_ns DESC)")
+
+
+def _migrate_coc_jobs(conn):
+    # Queue for the background COC worker (coc_worker.py) and the certificate
+    # suggestions it produces for approval in the COC Tracker.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS coc_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            worker_pid INTEGER,
+            queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_coc_jobs_status ON coc_jobs(status, id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS coc_suggestions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER,
+            file_path TEXT NOT NULL UNIQUE,
+            case_id INTEGER,
+            worker_name TEXT,
+            cert_from TEXT,
+            cert_to TEXT,
+            capacity TEXT,
+            days_per_week INTEGER,
+            hours_per_day REAL,
+            diagnosis TEXT,
+            template TEXT,
+            extraction_method TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            decided_at TIMESTAMP,
+            decided_by TEXT,
+            FOREIGN KEY (job_id) REFERENCES coc_jobs(id) ON DELETE SET NULL,
+            FOREIGN KEY (case_id) REFERENCES cases(id) ON DELETE CASCADE
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_coc_suggestions_status ON coc_suggestions(status, created_at)")
+
+
+def _case_filter_count_sql(row, delta):
+    return f"""
+            INSERT INTO case_filter_counts (is_active, state, current_capacity, priority, n)
+            VALUES ({row}.status IS 'Active', IFNULL({row}.state, ''), IFNULL({row}.current_capacity, ''),
+                    IFNULL({row}.priority, ''), {delta})
+            ON CONFLICT (is_active, state, current_capacity, priority) DO UPDATE SET n = n + {delta};"""
+
+
+def _migrate_case_listing(conn):
+    # case_listing: keyset-paged scans per status and state in worker order.
+    # Capacity and priority are included so filtering never touches the table rows.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cases_status_state_worker
+        ON cases(status, state, worker_name, current_capacity, priority)
+    """)
+
+    # Case counts per sidebar-filter combination, kept current by triggers so
+    # the listing's "N matching cases" is a sum over a few dozen rows instead
+    # of a scan of every case. NULLs are stored as '' to keep the key unique.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS case_filter_counts (
+            is_active INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            current_capacity TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (is_active, state, current_capacity, priority)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cases_filter_counts_insert
+        AFTER INSERT ON cases
+        BEGIN{_case_filter_count_sql("NEW", 1)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cases_filter_counts_update
+        AFTER UPDATE OF status, state, current_capacity, priority ON cases
+        BEGIN{_case_filter_count_sql("OLD", -1)}{_case_filter_count_sql("NEW", 1)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cases_filter_counts_delete
+        AFTER DELETE ON cases
+        BEGIN{_case_filter_count_sql("OLD", -1)}
+        END
+    """)
+
+    conn.execute("DELETE FROM case_filter_counts")
+    conn.execute("""
+        INSERT INTO case_filter_counts (is_active, state, current_capacity, priority, n)
+        SELECT status IS 'Active', IFNULL(state, ''), IFNULL(current_capacity, ''), IFNULL(priority, ''), COUNT(*)
+        FROM cases
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+# Sources of the search_index FTS5 table: kind code -> (table, case id, title,
+# text columns). Index rowids are source id * 8 + kind code, so a row maps back
+# to its source without a lookup table.
+SEARCH_KINDS = {
+    1: ("cases", "id", "worker_name", ("claim_number", "injury_description", "notes", "strategy")),
+    2: ("correspondence", "case_id", "subject", ("contact_name", "summary")),
+    3: ("incidents", "converted_case_id", "worker_name",
+        ("site", "location_detail", "injury_description", "body_part", "injury_type", "notes")),
+    4: ("coc_suggestions", "case_id", "worker_name", ("diagnosis", "raw_text")),
+}
+
+
+def _search_index_values(kind, row):
+    table, case_col, title_col, body_cols = SEARCH_KINDS[kind]
+    body = " || ' ' || ".join(f"IFNULL({row}.{col}, '')" for col in body_cols)
+    return f"{row}.id * 8 + {kind}, {kind}, {row}.{case_col}, IFNULL({row}.{title_col}, ''), {body}"
+
+
+def _migrate_search_index(conn):
+    # Global search (search.py). A plain FTS5 table rather than external
+    # content: it draws on four tables, and search snippets need the text.
+    _add_missing_columns(conn, "coc_suggestions", (("raw_text", "TEXT"),))
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            kind UNINDEXED, case_id UNINDEXED, title, body,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'
+        )
+    """)
+    # Matches in the title (worker name / subject) outrank matches in the text.
+    conn.execute("INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(0, 0, 10.0, 1.0)')")
+    conn.execute("DELETE FROM search_index")
+    for kind, (table, case_col, title_col, body_cols) in SEARCH_KINDS.items():
+        watched = ", ".join(dict.fromkeys(("id", case_col, title_col) + body_cols))
+        insert = f"INSERT INTO search_index (rowid, kind, case_id, title, body) VALUES ({_search_index_values(kind, 'NEW')});"
+        delete = f"DELETE FROM search_index WHERE rowid = OLD.id * 8 + {kind};"
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert
+            AFTER INSERT ON {table}
+            BEGIN {insert} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update
+            AFTER UPDATE OF {watched} ON {table}
+            BEGIN {delete} {insert} END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete
+            AFTER DELETE ON {table}
+            BEGIN {delete} END
+        """)
+        conn.execute(f"""
+            INSERT INTO search_index (rowid, kind, case_id, title, body)
+            SELECT {_search_index_values(kind, table)} FROM {table}
+        """)
+    # coc_worker replaces suggestions with INSERT OR REPLACE, which doesn't
+    # fire delete triggers; drop the replaced row's entry before the insert.
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_coc_suggestions_search_replace
+        BEFORE INSERT ON coc_suggestions
+        BEGIN
+            DELETE FROM search_index WHERE rowid IN (
+                SELECT id * 8 + 4 FROM coc_suggestions WHERE file_path = NEW.file_path);
+        END
+    """)
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def _migrate_slow_query_log(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS slow_query_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sql TEXT NOT NULL,
+            params TEXT,
+            duration_ms REAL NOT NULL,
+            label TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_slow_query_log_created ON slow_query_log(created_at)")
+
+
+def _migrate_table_generations(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_generations (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+def _migrate_search_terms(conn):
+    # One row per indexed token occurrence, read only to list the terms that
+    # start with a prefix (search.build_query); unlike the "row" type it
+    # doesn't count each term's documents to step to the next term.
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_terms USING fts5vocab(search_index, instance)")
+
+
+# Ordered (version, description, function). Append new migrations to the
+# end; never renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, "cases: email, phone, injury_type columns", _migrate_case_columns),
+    (2, "users: salt, entity, site columns", _migrate_user_columns),
+    (3, "indexes for hot query paths", _migrate_hot_path_indexes),
+    (4, "latest_certificates table maintained by triggers", _migrate_latest_certificates),
+    (5, "ocr_cache table for content-hashed COC OCR results", _migrate_ocr_cache),
+    (6, "scan_manifest table for incremental COC folder scans", _migrate_scan_manifest),
+    (7, "coc_jobs queue and coc_suggestions for the background COC worker", _migrate_coc_jobs),
+    (8, "All Cases listing index and case_filter_counts table", _migrate_case_listing),
+    (9, "search_index FTS5 table over cases, correspondence, incidents and COC text", _migrate_search_index),
+    (10, "slow_query_log table", _migrate_slow_query_log),
+    (11, "table_generations write counters shared between processes", _migrate_table_generations),
+    (12, "search_terms fts5vocab table over search_index", _migrate_search_terms),
+]
+
+
+def get_schema_version(conn=None) -> int:
+    """Return the highest applied migration version (0 for a fresh schema)."""
+    conn = conn or get_connection()
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def schema_is_current(conn=None) -> bool:
+    """True if every migration in MIGRATIONS has been applied."""
+    return get_schema_version(conn) >= MIGRATIONS[-1][0]
+
+
+def schema_epoch() -> int:
+    """
+    A number that changes whenever this process may see a different schema:
+    after init_db(), after migrate() applies anything, and after
+    close_all_connections(). SQL built from PRAGMA table_info can be cached
+    on it without asking SQLite on every call.
+    """
+    return _schema_epoch
+
+
+def _bump_schema_epoch():
+    global _schema_epoch
+    with _pool_lock:
+        _schema_epoch += 1
+
+
+def migrate() -> list[int]:
+    """Apply any pending migrations in order. Returns the versions applied."""
+    applied = []
+    with transaction(immediate=True) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        current = get_schema_version(conn)
+        for version, description, func in MIGRATIONS:
+            if version <= current:
+                continue
+            func(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            applied.append(version)
+    if applied:
+        _bump_schema_epoch()
+    return applied
+
+
+def explain_query_plan(sql: str, params=()) -> list[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    rows = get_connection().execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row["detail"] for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# COC import
+# ---------------------------------------------------------------------------
+
+def bulk_import_cocs(records, action: str = "COC Auto-Imported") -> dict:
+    """
+    Import scanned COC files in a single transaction.
+
+    Each record is a dict with case_id, file_path, cert_from and cert_to, and
+    optionally capacity (default "Unknown"), days_per_week, hours_per_day,
+    notes and activity (details for an activity_log row logged as ``action``).
+    For every new file this adds the certificate, marks the file processed and
+    ticks the case's certificate checklist item; a capacity other than
+    "Unknown" becomes the case's current capacity, the last record per case
+    winning. Files already in processed_coc_files (or repeated in records) are
+    skipped.
+
+    Returns imported, skipped, rows (total rows written), elapsed_s and
+    rows_per_s.
+    """
+    started = time.perf_counter()
+    records = list(records)
+    with transaction(immediate=True) as conn:
+        done = {row[0] for row in conn.execute(
+            "SELECT file_path FROM processed_coc_files WHERE file_path IN (SELECT value FROM json_each(?))",
+            (json.dumps([r["file_path"] for r in records]),))}
+        fresh = []
+        for r in records:
+            if r["file_path"] not in done:
+                done.add(r["file_path"])
+                fresh.append(r)
+
+        rows = conn.executemany("""
+            INSERT INTO certificates (case_id, cert_from, cert_to, capacity, days_per_week, hours_per_day, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(r["case_id"], r["cert_from"], r["cert_to"], r.get("capacity") or "Unknown",
+               r.get("days_per_week"), r.get("hours_per_day"),
+               r.get("notes") or f"Auto-imported from: {os.path.basename(r['file_path'])}")
+              for r in fresh]).rowcount
+        rows += conn.executemany(
+            "INSERT OR IGNORE INTO processed_coc_files (file_path, case_id) VALUES (?, ?)",
+            [(r["file_path"], r["case_id"]) for r in fresh]).rowcount
+
+        case_ids = list(dict.fromkeys(r["case_id"] for r in fresh))
+        rows += conn.executemany(
+            "UPDATE documents SET is_present=1 WHERE case_id=? AND doc_type LIKE '%Certificate%'",
+            [(case_id,) for case_id in case_ids]).rowcount
+        capacities = {r["case_id"]: r["capacity"] for r in fresh
+                      if r.get("capacity") and r["capacity"] != "Unknown"}
+        rows += conn.executemany(
+            "UPDATE cases SET current_capacity=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+            [(capacity, case_id) for case_id, capacity in capacities.items()]).rowcount
+        rows += conn.executemany(
+            "INSERT INTO activity_log (case_id, action, details) VALUES (?, ?, ?)",
+            [(r["case_id"], action, r["activity"]) for r in fresh if r.get("activity")]).rowcount
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": len(fresh),
+        "skipped": len(records) - len(fresh),
+        "rows": rows,
+        "elapsed_s": round(elapsed, 4),
+        "rows_per_s": round(rows / elapsed) if elapsed > 0 else 0,
+    }
 
 
 def hash_password(password: str, salt: str = None) -> tuple:
@@ -268,20 +1274,16 @@ def verify_password(password: str, stored_hash: str, salt: str) -> bool:
 
 def create_user(username, password, display_name, role="viewer", email=None, entity=None, site=None):
     """Create a new user. Returns user id or None if username exists."""
-    conn = get_connection()
     pw_hash, salt = hash_password(password)
     try:
-        conn.execute(
-            """INSERT INTO users (username, password_hash, salt, display_name, role, email, entity, site)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (username, pw_hash, salt, display_name, role, email, entity, site)
-        )
-        conn.commit()
-        user_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-        conn.close()
-        return user_id
+        with transaction() as conn:
+            cur = conn.execute(
+                """INSERT INTO users (username, password_hash, salt, display_name, role, email, entity, site)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (username, pw_hash, salt, display_name, role, email, entity, site)
+            )
+        return cur.lastrowid
     except sqlite3.IntegrityError:
-        conn.close()
         return None
 
 
@@ -289,7 +1291,6 @@ def authenticate_user(username, password):
     """Authenticate a user. Returns user dict or None."""
     conn = get_connection()
     row = conn.execute("SELECT * FROM users WHERE username = ? AND is_active = 1", (username,)).fetchone()
-    conn.close()
     if not row:
         return None
     salt = row["salt"] if row["salt"] else ""
@@ -302,7 +1303,6 @@ def get_all_users():
     """Get all users."""
     conn = get_connection()
     rows = conn.execute("SELECT id, username, display_name, role, email, entity, site, is_active, created_at FROM users ORDER BY role, display_name").fetchall()
-    conn.close()
     return [dict(r) for r in rows]
 
 
@@ -310,20 +1310,19 @@ def seed_default_admin():
     """Create default admin user if no users exist."""
     conn = get_connection()
     count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-    conn.close()
     if count == 0:
         create_user("admin", "admin123", "Administrator", role="admin", email="admin@claimtrackpro.com.au")
 
 
 def seed_data():
     conn = get_connection()
-    c = conn.cursor()
-
-    c.execute("SELECT COUNT(*) FROM cases")
-    if c.fetchone()[0] > 0:
-        conn.close()
+    if conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0] > 0:
         return
+    with transaction() as conn:
+        _insert_seed_rows(conn.cursor())
+
 
+def _insert_seed_rows(c):
     cases = [
         ("Sayed Hadi", "VIC", "SGA", "Inghams", "2024-10-22",
          "Lower back pain - L4/L5 Disc Bulge", "No Capacity", "N/A",
@@ -455,7 +1454,6 @@ def seed_data():
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, case)
 
-    conn.commit()
 
     # Seed COC data
     coc_data = [
@@ -479,7 +1477,6 @@ def seed_data():
             VALUES (?, ?, ?, ?, ?, ?)
         """, (case_id, cfrom, cto, cap, dpw, hpd))
 
-    conn.commit()
 
     # Seed termination data for the 4 pending cases
     termination_data = [
@@ -495,7 +1492,6 @@ def seed_data():
             VALUES (?, ?, ?, ?, ?, ?)
         """, (case_id, ttype, approved, adate, assigned, status))
 
-    conn.commit()
 
     # Seed document checklists
     doc_types = [
@@ -534,8 +1530,6 @@ def seed_data():
                 VALUES (?, ?, ?)
             """, (case_id, doc_type, presence[i] if i < len(presence) else 0))
 
-    conn.commit()
-    conn.close()
 
 
 if __name__ == "__main__":
@@ -4,8 +4,13 @@ Document generator — produces Register of Injury, Toolbox Talks, and other for
 
 from __future__ import annotations
 
+import hashlib
 import io
+import json
+import threading
+from collections import OrderedDict
 from datetime import date
+from typing import Callable
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.table import WD_TABLE_ALIGNMENT
@@ -535,3 +540,55 @@ def generate_rtw_plan(case_data: dict, coc_data: dict | None = None) -> bytes:
     doc.save(buf)
     buf.seek(0)
     return buf.getvalue()
+
+
+# --- Rendered document cache ---
+# Documents are rebuilt only when their inputs (or the date printed on them)
+# change; the page hands st.download_button a deferred() callable, so nothing
+# is built until someone actually clicks download.
+
+CACHE_MAX_ENTRIES = 64
+
+_cache: OrderedDict[str, bytes] = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _cache_key(generator: Callable, args: tuple) -> str:
+    payload = json.dumps([generator.__name__, date.today().isoformat(), args], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_cached(generator: Callable, *args) -> bytes:
+    """``generator(*args)``, memoised on a hash of the inputs in a small LRU."""
+    key = _cache_key(generator, args)
+    with _cache_lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return data
+        _stats["misses"] += 1
+    data = generator(*args)
+    with _cache_lock:
+        _cache[key] = data
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+    return data
+
+
+def deferred(generator: Callable, *args) -> Callable[[], bytes]:
+    """
+    A no-argument callable rendering ``generator(*args)`` through the cache,
+    for st.download_button(data=...). The dict arguments are copied now, as
+    Streamlit calls it later on another thread.
+    """
+    args = tuple(dict(arg) if isinstance(arg, dict) else arg for arg in args)
+    return lambda: render_cached(generator, *args)
+
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return dict(_stats, entries=len(_cache), max_entries=CACHE_MAX_ENTRIES)
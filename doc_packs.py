@@ -0,0 +1,188 @@
+"""
+Bulk document packs.
+
+Renders Toolbox Talks, RTW Plans and Registers of Injury for a filtered set
+of cases in a process pool and writes them into a ZIP archive as they finish.
+Only a bounded window of rendered documents is held in memory at a time, so
+pack size is limited by disk, not RAM.
+
+Usage:
+    python -m doc_packs --out packs/2026-10.zip                 # every active case
+    python -m doc_packs --out vic.zip --state VIC --site Laverton
+    python -m doc_packs --out back.zip --injury-type "Manual Handling / Back" --types toolbox,rtw
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import database as db
+import doc_generator
+
+# Type code -> (generator, file name prefix). The RTW Plan also takes the
+# case's latest certificate.
+DOC_TYPES = {
+    "toolbox": (doc_generator.generate_toolbox_talk, "Toolbox_Talk"),
+    "rtw": (doc_generator.generate_rtw_plan, "RTW_Plan"),
+    "roi": (doc_generator.generate_register_of_injury, "Register_of_Injury"),
+}
+PACK_WORKERS = int(os.environ.get("DOC_PACK_WORKERS", "0")) or (os.cpu_count() or 1)
+# Rendered documents waiting to be written, per worker.
+IN_FLIGHT_PER_WORKER = 4
+
+
+# ---------------------------------------------------------------------------
+# Case selection
+# ---------------------------------------------------------------------------
+
+def select_cases(states=None, sites=None, injury_types=None, active_only: bool = True) -> list[tuple[dict, dict | None]]:
+    """(case, latest certificate or None) for every matching case, by state and worker name."""
+    clauses, params = [], []
+    if active_only:
+        clauses.append("c.status = 'Active'")
+    for column, values in (("state", states), ("site", sites), ("injury_type", injury_types)):
+        if values:
+            clauses.append(f"c.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = db.get_connection()
+    cases = [dict(row) for row in conn.execute(
+        f"SELECT c.* FROM cases c {where} ORDER BY c.state, c.worker_name, c.id", params)]
+    cocs = {row["case_id"]: dict(row) for row in conn.execute(f"""
+        SELECT cert.* FROM latest_certificates lc
+        JOIN certificates cert ON cert.id = lc.certificate_id
+        JOIN cases c ON c.id = lc.case_id
+        {where}
+    """, params)}
+    return [(case, cocs.get(case["id"])) for case in cases]
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def _archive_name(doc_type: str, case: dict) -> str:
+    slug = (case.get("worker_name") or "Unknown").replace(" ", "_").replace("/", "_")
+    return f"{case.get('state') or 'Unknown'}/{slug}_{case['id']}/{DOC_TYPES[doc_type][1]}_{slug}.docx"
+
+
+def _render(doc_type: str, case: dict, coc: dict | None) -> tuple[str, str, bytes, float]:
+    """Pool task: (doc_type, archive name, DOCX bytes, render seconds)."""
+    started = time.perf_counter()
+    generator = DOC_TYPES[doc_type][0]
+    data = generator(case, coc) if doc_type == "rtw" else generator(case)
+    return doc_type, _archive_name(doc_type, case), data, time.perf_counter() - started
+
+
+def _tasks(cases, doc_types):
+    for case, coc in cases:
+        for doc_type in doc_types:
+            yield doc_type, case, coc
+
+
+def _rendered(cases, doc_types, workers: int):
+    """Yield _render() results as they finish, keeping at most a window of them pending."""
+    tasks = _tasks(cases, doc_types)
+    if workers <= 1:
+        for task in tasks:
+            yield _render(*task)
+        return
+    window = workers * IN_FLIGHT_PER_WORKER
+    # spawn, as for the OCR pool: workers must not inherit threads or SQLite handles.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(_render, *task))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def build_pack(out, states=None, sites=None, injury_types=None, doc_types=tuple(DOC_TYPES),
+               active_only: bool = True, max_workers: int | None = None) -> dict:
+    """
+    Write a ZIP of documents for the matching cases to ``out`` (a path or a
+    writable binary file), one folder per case under its state.
+
+    Returns cases, documents, bytes, elapsed_s, docs_per_s and per_type:
+    {doc_type: {"count", "render_s", "avg_ms", "bytes"}}, where render_s is
+    time spent inside the generator summed over workers.
+    """
+    unknown = set(doc_types) - set(DOC_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown document type(s): {', '.join(sorted(unknown))}")
+    started = time.perf_counter()
+    cases = select_cases(states, sites, injury_types, active_only)
+    per_type = {doc_type: {"count": 0, "render_s": 0.0, "avg_ms": 0.0, "bytes": 0} for doc_type in doc_types}
+    # DOCX files are already deflated; storing them as-is saves the main process a recompress.
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as archive:
+        for doc_type, name, data, seconds in _rendered(cases, doc_types, max_workers or PACK_WORKERS):
+            archive.writestr(name, data)
+            stats = per_type[doc_type]
+            stats["count"] += 1
+            stats["render_s"] += seconds
+            stats["bytes"] += len(data)
+    for stats in per_type.values():
+        stats["avg_ms"] = round(stats["render_s"] / stats["count"] * 1000, 1) if stats["count"] else 0.0
+        stats["render_s"] = round(stats["render_s"], 3)
+    elapsed = time.perf_counter() - started
+    documents = sum(stats["count"] for stats in per_type.values())
+    return {
+        "cases": len(cases),
+        "documents": documents,
+        "bytes": sum(stats["bytes"] for stats in per_type.values()),
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(documents / elapsed, 1) if elapsed else 0.0,
+        "per_type": per_type,
+    }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _csv(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a ZIP pack of case documents.")
+    parser.add_argument("--out", required=True, help="ZIP file to write")
+    parser.add_argument("--state", action="append", help="only cases in this state (repeatable)")
+    parser.add_argument("--site", action="append", help="only cases at this site (repeatable)")
+    parser.add_argument("--injury-type", action="append", help="only cases with this injury type (repeatable)")
+    parser.add_argument("--types", type=_csv, default=list(DOC_TYPES),
+                        help=f"comma-separated document types (default: {','.join(DOC_TYPES)})")
+    parser.add_argument("--all-statuses", action="store_true", help="include cases that are not Active")
+    parser.add_argument("--workers", type=int, default=None, help="render processes")
+    args = parser.parse_args(argv)
+
+    db.ensure_schema()
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        result = build_pack(args.out, states=args.state, sites=args.site, injury_types=args.injury_type,
+                            doc_types=args.types, active_only=not args.all_statuses, max_workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        db.close_all_connections()
+
+    print(f"[doc_packs] {result['documents']} documents for {result['cases']} cases -> {args.out} "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB) in {result['elapsed_s']:.1f}s, "
+          f"{result['docs_per_s']} docs/s", flush=True)
+    for doc_type, stats in result["per_type"].items():
+        print(f"[doc_packs]   {doc_type:8s} {stats['count']:6d} docs  avg {stats['avg_ms']:7.1f} ms  "
+              f"total {stats['render_s']:8.2f}s  {stats['bytes'] / 1024 / 1024:7.1f} MB", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Deferred activity/audit log writer.
+
+log_activity(), log_audit() and log_slow_query() put rows on a bounded in-process queue and
+return straight away; a background thread writes whatever has queued up in
+one transaction per batch, so a page that logs many changes pays for no
+commits of its own. Rows keep the time they were logged, not the time they
+were written.
+
+A row logged inside an open db.transaction() is written inline instead: it
+then commits or rolls back with the change it describes, at no extra cost.
+When the queue is full, callers wait for the writer to catch up. flush()
+waits (up to FLUSH_TIMEOUT_S) for the rows queued before the call to be
+written; pages that read the logs call it first. Rows from other sessions
+queued afterwards don't hold it up, and a page that shows one case's rows
+can wait for just that case's. Pending rows are also flushed at
+interpreter exit.
+
+Each table's rows in a batch are written in their own transaction, and a
+failing set of rows is split in half until the bad row is isolated, so one
+bad row only drops itself.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+import database as db
+
+MAX_QUEUE = int(os.environ.get("LOG_WRITER_MAX_QUEUE", "10000"))
+FLUSH_TIMEOUT_S = float(os.environ.get("LOG_WRITER_FLUSH_TIMEOUT", "5"))
+BATCH_SIZE = 500
+WRITE_ATTEMPTS = 3
+
+_SQL = {
+    "activity_log": "INSERT INTO activity_log (case_id, action, details, created_at) VALUES (?, ?, ?, ?)",
+    "audit_log": """INSERT INTO audit_log (user, action, table_name, record_id, case_id,
+                    field_changed, old_value, new_value, details, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "slow_query_log": "INSERT INTO slow_query_log (sql, params, duration_ms, label, created_at) VALUES (?, ?, ?, ?, ?)",
+}
+
+_STOP = object()
+_queue: queue.Queue = queue.Queue(maxsize=MAX_QUEUE)
+_thread: threading.Thread | None = None
+_thread_lock = threading.Lock()
+_stats_lock = threading.Lock()
+# Rows are numbered as they are queued; flush() waits for its number to be
+# reached by _resolved (written or dropped), which the writer advances in
+# queue order.
+_submit_lock = threading.Lock()
+_submitted = 0
+_resolved = 0
+_resolved_cond = threading.Condition()
+# (table, case_id) -> number of the last row queued for it, until written.
+_pending_cases: dict = {}
+_stats = {"queued": 0, "inline": 0, "waited": 0, "written": 0, "batches": 0, "errors": 0, "dropped": 0,
+          "flush_ms_last": 0.0, "flush_ms_max": 0.0, "flush_ms_total": 0.0}
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, n in deltas.items():
+            _stats[key] += n
+
+
+def _now() -> str:
+    # Same format and zone (UTC) as the tables' CURRENT_TIMESTAMP default.
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def log_activity(case_id, action, details=""):
+    _submit("activity_log", (case_id, action, details, _now()), case_id)
+
+
+def log_audit(user, action, table_name=None, record_id=None, case_id=None,
+              field_changed=None, old_value=None, new_value=None, details=None):
+    _submit("audit_log", (user, action, table_name, record_id, case_id, field_changed,
+                          str(old_value) if old_value is not None else None,
+                          str(new_value) if new_value is not None else None, details, _now()), case_id)
+
+
+def log_slow_query(sql, params, duration_ms, label):
+    _submit("slow_query_log", (sql, params, duration_ms, label, _now()))
+
+
+def flush(timeout: float | None = FLUSH_TIMEOUT_S, table: str | None = None, case_id=None) -> bool:
+    """
+    Wait until every row queued before this call has been written (or
+    dropped). Returns False if ``timeout`` seconds pass first.
+
+    With ``table`` and ``case_id``, wait only for that case's rows in that
+    table; when none are pending this returns at once.
+    """
+    with _submit_lock:
+        target = _submitted if table is None else _pending_cases.get((table, case_id), 0)
+    if target <= _resolved:
+        return True
+    if _thread is None or not _thread.is_alive():
+        _drain_inline()
+        return True
+    with _resolved_cond:
+        return _resolved_cond.wait_for(lambda: _resolved >= target, timeout)
+
+
+def shutdown(timeout: float = 10.0):
+    """Write everything still queued and stop the writer thread."""
+    global _thread
+    with _thread_lock:
+        thread, _thread = _thread, None
+    if thread is not None and thread.is_alive():
+        _queue.put(_STOP)
+        thread.join(timeout)
+    _drain_inline()
+
+
+def writer_stats() -> dict:
+    """Queue depth, row/batch counts and flush latency for this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total_ms = stats.pop("flush_ms_total")
+    stats["flush_ms_avg"] = round(total_ms / stats["batches"], 2) if stats["batches"] else 0.0
+    stats["queue_depth"] = _queue.qsize()
+    stats["max_queue"] = MAX_QUEUE
+    stats["running"] = _thread is not None and _thread.is_alive()
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+def _submit(table: str, row: tuple, case_id=None):
+    global _submitted
+    if db.in_transaction():
+        db.get_connection().execute(_SQL[table], row)
+        _count(inline=1)
+        return
+    _ensure_started()
+    # Queue and number the row together, so numbers follow queue order.
+    with _submit_lock:
+        try:
+            _queue.put_nowait((table, row))
+        except queue.Full:
+            _count(waited=1)
+            _queue.put((table, row))
+        _submitted += 1
+        if case_id is not None:
+            _pending_cases[(table, case_id)] = _submitted
+    _count(queued=1)
+
+
+def _mark_resolved(n: int):
+    global _resolved
+    with _resolved_cond:
+        _resolved += n
+        resolved = _resolved
+        _resolved_cond.notify_all()
+    with _submit_lock:
+        for key in [key for key, number in _pending_cases.items() if number <= resolved]:
+            del _pending_cases[key]
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="log-writer", daemon=True)
+            _thread.start()
+
+
+def _write_rows(table: str, rows: list) -> int:
+    """
+    Write rows to one table in one transaction, retrying lock errors. If the
+    rows still fail, split them in half and write each half, down to single
+    rows, which are dropped. Returns the number of rows written.
+    """
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        try:
+            with db.transaction() as conn:
+                conn.executemany(_SQL[table], rows)
+            return len(rows)
+        except Exception as e:
+            _count(errors=1)
+            error = e
+            # Only a busy/locked database is worth retrying as-is.
+            if not isinstance(e, sqlite3.OperationalError) or attempt == WRITE_ATTEMPTS:
+                break
+            time.sleep(0.1 * attempt)
+    if len(rows) > 1:
+        middle = len(rows) // 2
+        return _write_rows(table, rows[:middle]) + _write_rows(table, rows[middle:])
+    _count(dropped=1)
+    print(f"[log_writer] dropped a {table} row: {error}", file=sys.stderr)
+    return 0
+
+
+def _write_batch(batch: list):
+    rows: dict = {}
+    for table, row in batch:
+        rows.setdefault(table, []).append(row)
+    started = time.perf_counter()
+    written = sum(_write_rows(table, table_rows) for table, table_rows in rows.items())
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        _stats["written"] += written
+        _stats["batches"] += 1
+        _stats["flush_ms_last"] = round(elapsed_ms, 2)
+        _stats["flush_ms_max"] = round(max(_stats["flush_ms_max"], elapsed_ms), 2)
+        _stats["flush_ms_total"] += elapsed_ms
+
+
+def _take_batch(first) -> list:
+    """first plus whatever else is already queued, up to BATCH_SIZE (a _STOP ends the batch)."""
+    batch = [first]
+    while len(batch) < BATCH_SIZE and batch[-1] is not _STOP:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    try:
+        while True:
+            batch = _take_batch(_queue.get())
+            stop = batch[-1] is _STOP
+            rows = batch[:-1] if stop else batch
+            if rows:
+                _write_batch(rows)
+                _mark_resolved(len(rows))
+            for _ in batch:
+                _queue.task_done()
+            if stop:
+                break
+    finally:
+        db.release_connection()
+
+
+def _drain_inline():
+    """Write queued rows on the calling thread (no writer thread running)."""
+    while True:
+        try:
+            batch = _take_batch(_queue.get_nowait())
+        except queue.Empty:
+            return
+        rows = [item for item in batch if item is not _STOP]
+        if rows:
+            _write_batch(rows)
+            _mark_resolved(len(rows))
+        for _ in batch:
+            _queue.task_done()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,124 @@
+"""
+Persistent OCR result cache for COC PDFs.
+
+Entries are keyed by SHA-256 of the PDF bytes plus the OCR settings, and hold
+the extracted text and the template-parsed fields, so re-uploading or
+re-scanning an unchanged certificate skips OCR entirely. The table is bounded
+by total stored size and evicts least-recently-used entries first.
+
+A hit is a plain read. The entry's LRU stamp (and its lifetime hit count) is
+only written back once the stamp is TOUCH_INTERVAL_S old, so repeated hits
+don't take the SQLite write lock away from the OCR pool and the log writer;
+eviction order is accurate to that interval.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import database as db
+
+# Bump when OCR or template parsing changes in a way that invalidates old results.
+CACHE_VERSION = 3
+MAX_CACHE_BYTES = int(float(os.environ.get("COC_OCR_CACHE_MB", "64")) * 1024 * 1024)
+# Minimum age of an entry's LRU stamp before a hit refreshes it.
+TOUCH_INTERVAL_S = float(os.environ.get("COC_OCR_CACHE_TOUCH_S", "3600"))
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+# Hits per key not yet added to the table's hits column.
+_pending_hits: dict = {}
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def cache_key(file_bytes: bytes, dpi: int) -> str:
+    """SHA-256 over the PDF bytes and every setting that affects the result."""
+    h = hashlib.sha256(file_bytes)
+    h.update(f"|dpi={dpi}|v={CACHE_VERSION}".encode())
+    return h.hexdigest()
+
+
+def get(key: str) -> tuple[str, dict] | None:
+    """Cached (raw_text, fields) for a key, or None. Refreshes a stale LRU stamp."""
+    row = db.get_connection().execute(
+        "SELECT raw_text, fields_json, last_used_at FROM ocr_cache WHERE cache_key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        _count("misses")
+        return None
+    _count("hits")
+    with _stats_lock:
+        hits = _pending_hits[key] = _pending_hits.get(key, 0) + 1
+    now = time.time()
+    if now - (row["last_used_at"] or 0) >= TOUCH_INTERVAL_S:
+        with db.transaction() as conn:
+            conn.execute(
+                "UPDATE ocr_cache SET hits = hits + ?, last_used_at = ? WHERE cache_key = ?",
+                (hits, now, key),
+            )
+        with _stats_lock:
+            if _pending_hits.get(key, 0) <= hits:
+                _pending_hits.pop(key, None)
+            else:
+                _pending_hits[key] -= hits
+    return row["raw_text"], json.loads(row["fields_json"])
+
+
+def put(key: str, raw_text: str, fields: dict, max_bytes: int | None = None):
+    """Store an OCR result, then evict least-recently-used entries over the size limit."""
+    fields_json = json.dumps(fields)
+    size = len(raw_text.encode()) + len(fields_json.encode())
+    limit = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    with db.transaction() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO ocr_cache
+                (cache_key, raw_text, fields_json, template, size_bytes, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, raw_text, fields_json, fields.get("template"), size, time.time()))
+        evicted = conn.execute("""
+            DELETE FROM ocr_cache WHERE cache_key IN (
+                SELECT cache_key FROM (
+                    SELECT cache_key,
+                           SUM(size_bytes) OVER (ORDER BY last_used_at DESC, cache_key
+                                                 ROWS UNBOUNDED PRECEDING) AS running
+                    FROM ocr_cache
+                ) WHERE running > ?
+            )
+        """, (limit,)).rowcount
+    _count("stores")
+    if evicted:
+        _count("evictions", evicted)
+
+
+def clear():
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM ocr_cache")
+    with _stats_lock:
+        _pending_hits.clear()
+
+
+def cache_stats() -> dict:
+    """
+    Hit/miss counts for this process plus the table's current size.
+    lifetime_hits includes hits whose stamp refresh is still pending here.
+    """
+    conn = db.get_connection()
+    row = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(hits), 0) FROM ocr_cache"
+    ).fetchone()
+    with _stats_lock:
+        stats = dict(_stats)
+        pending = sum(_pending_hits.values())
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["entries"] = row[0]
+    stats["size_bytes"] = row[1]
+    stats["max_bytes"] = MAX_CACHE_BYTES
+    stats["lifetime_hits"] = row[2] + pending
+    return stats
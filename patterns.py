@@ -0,0 +1,289 @@
+"""
+Precompiled regex registry for coc_parser and report_parser.
+
+Every field pattern is compiled once at import and grouped into a PatternSet
+per template. Each pattern also lists anchor literals, at least one of which
+must appear (case-insensitively) in any text the pattern can match. A
+ScanContext case-folds a document once and remembers where each literal first
+occurs, so a pattern whose anchors are all absent is a known miss without
+touching the regex engine, and literals shared between templates or keyword
+lists are only searched for once per document.
+
+When a pattern's single anchor is also its literal prefix, the search starts
+at the anchor's first occurrence. This matters because IGNORECASE patterns
+get no literal-prefix skip from the re module: without a start offset they
+attempt a match at every position of the document.
+"""
+
+import re
+
+I = re.IGNORECASE
+S = re.DOTALL
+
+
+class PatternSet:
+    """Named, precompiled patterns for one template, with anchor literals."""
+
+    def __init__(self, name: str, patterns: dict):
+        self.name = name
+        self.patterns = {}
+        for key, (pattern, flags, anchors) in patterns.items():
+            anchors = tuple(a.casefold() for a in anchors)
+            # Only plain-literal prefixes: an escaped or alternated start can't be checked this way.
+            prefixed = len(anchors) == 1 and pattern.casefold().startswith(anchors[0])
+            self.patterns[key] = (re.compile(pattern, flags), anchors, prefixed)
+
+    def scan(self, text: str) -> "PatternScan":
+        return ScanContext(text).scan(self)
+
+
+class ScanContext:
+    """One document shared by several PatternSets and keyword checks."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.folded = text.casefold()
+        # casefold() can expand characters ("ß" -> "ss"); offsets in the folded
+        # text only line up with the original when the lengths are equal.
+        self.aligned = len(self.folded) == len(text)
+        self._positions: dict = {}
+        self._scans: dict = {}
+
+    def first(self, literal: str) -> int:
+        """Offset of the first occurrence of a casefolded literal, or -1."""
+        pos = self._positions.get(literal)
+        if pos is None:
+            pos = self._positions[literal] = self.folded.find(literal)
+        return pos
+
+    def scan(self, pattern_set: PatternSet) -> "PatternScan":
+        scan = self._scans.get(pattern_set.name)
+        if scan is None:
+            scan = self._scans[pattern_set.name] = PatternScan(pattern_set, self)
+        return scan
+
+    def has_word(self, phrase: str) -> bool:
+        """True if phrase occurs (ignoring case) and is not part of a longer word."""
+        folded, n = self.folded, len(phrase)
+        start = self.first(phrase)
+        while start != -1:
+            end = start + n
+            if ((start == 0 or not (phrase[0].isalnum() and folded[start - 1].isalnum()))
+                    and (end == len(folded) or not (phrase[-1].isalnum() and folded[end].isalnum()))):
+                return True
+            start = folded.find(phrase, start + 1)
+        return False
+
+
+class PatternScan:
+    """One document checked against a PatternSet; patterns run lazily."""
+
+    def __init__(self, pattern_set: PatternSet, context: ScanContext):
+        self.pattern_set = pattern_set
+        self.context = context
+
+    def search(self, key: str):
+        """re.Match for the named pattern, or None (skipped when no anchor is present)."""
+        regex, anchors, prefixed = self.pattern_set.patterns[key]
+        ctx = self.context
+        if not anchors:
+            return regex.search(ctx.text)
+        positions = [p for p in map(ctx.first, anchors) if p != -1]
+        if not positions:
+            return None
+        if prefixed and ctx.aligned:
+            return regex.search(ctx.text, positions[0])
+        return regex.search(ctx.text)
+
+    def find(self, *keys: str) -> str | None:
+        """First captured group of the first key that matches, stripped."""
+        for key in keys:
+            m = self.search(key)
+            if m:
+                return m.group(1).strip()
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Shared patterns (used on small strings or whole text without a prefilter)
+# ---------------------------------------------------------------------------
+
+DATE_DMY = re.compile(r'\d{1,2}/\d{1,2}/\d{4}')
+FILENAME_DATE_RANGE = re.compile(r'(\d{1,2})\.(\d{1,2})\s*-\s*(\d{1,2})\.(\d{1,2})')
+VIC_FIRST_NAME_NOISE = re.compile(r'(?:Claim|Date|Worker).*', I)
+VIC_LAST_NAME_NOISE = re.compile(r'(?:Date|Worker|not known).*', I)
+NON_ALNUM_UPPER = re.compile(r'[^A-Z0-9]')
+WHITESPACE_RUN = re.compile(r"\s+")
+
+_DATE = r'(\d{1,2}/\d{1,2}/\d{4})'
+
+
+# ---------------------------------------------------------------------------
+# COC templates
+# ---------------------------------------------------------------------------
+
+# Template classifier keywords: (phrase, weight), matched as whole words.
+# A template needs COC_TEMPLATE_MIN_SCORE to be chosen over UNKNOWN; on a tie
+# the earlier template wins, as the old if/elif detection did.
+COC_TEMPLATE_KEYWORDS = {
+    "NSW_SIRA": (
+        ("sira", 5), ("state insurance regulatory authority", 5), ("icare", 3),
+        ("certificate of fitness", 3), ("has capacity for some type of work", 2),
+        ("has no current work capacity", 2), ("is fit for pre-injury", 1), ("next review date", 1),
+    ),
+    "VIC_TAC": (
+        ("worksafe", 5), ("transport accident", 5), ("tac", 4),
+        ("worker first name", 3), ("worker last name", 3),
+        ("capacity for suitable employment", 2), ("capacity for pre-injury employment", 2),
+        ("clinical diagnosis", 1),
+    ),
+    "QLD": (
+        ("workcover queensland", 5), ("qcomp", 5), ("queensland", 4), ("(given names)", 3),
+        ("workers' compensation medical certificate", 2), ("(surname)", 2), ("suitable duties", 1),
+    ),
+}
+COC_TEMPLATE_MIN_SCORE = 3
+
+COC_NSW_SIRA = PatternSet("NSW_SIRA", {
+    # Names stay on their line: under IGNORECASE "\s+" ran on into "Last name ...".
+    "first_name": (r'First name\s*\n\s*([A-Z][a-z]+(?:[ \t]+[A-Z][a-z]+)*)', I, ("first name",)),
+    "last_name": (r'Last name\s*\n\s*([A-Z][a-zA-Z]+(?:[ \t]+[A-Z][a-zA-Z]+)*)', I, ("last name",)),
+    "claim_next_line": (r'Claim number\s*\n\s*(\d{5,})', I, ("claim number",)),
+    "claim_same_line": (r'Claim number\s*[:\s]+(\d{5,})', I, ("claim number",)),
+    "fit_pre_injury": (r'is fit for pre[- ]?injury (?:duties|work)', I, ("is fit for pre",)),
+    "fit_pre_injury_ticked": (r'(?:\[?[xX✓]\]?|☑)\s*is fit for pre', I, ("is fit for pre",)),
+    "some_capacity": (
+        r'has capacity for some type of work from\s+' + _DATE + r'\s+to\s+[\[|\s]*' + _DATE,
+        I, ("has capacity for some type of work from",)),
+    "hours_per_day": (r'for\s+(\d{1,2}(?:\s*-\s*\d{1,2})?)\s+hours?/day', I, ("/day",)),
+    "days_per_week": (r'(\d{1,2})\s+days?/week', I, ("/week",)),
+    "no_capacity": (
+        r'has no (?:current )?(?:work )?capaci\w*\s+(?:for any (?:employment|work)\s+)?from\s+[\[|\s]*'
+        + _DATE + r'\s+.*?to\s+[\[|\s]*' + _DATE,
+        I, ("has no ",)),
+    "next_review": (
+        r'Next review date\s*[\(\[]?(?:DD/MM/YYYY)?[\)\]]?\s*[\n|:]*\s*' + _DATE, I, ("next review date",)),
+    "diagnosis": (r'Diagnosis of work related.*?\n\s*(.+?)(?:\n|$)', I, ("diagnosis of work related",)),
+})
+
+COC_VIC_TAC = PatternSet("VIC_TAC", {
+    "first_name": (r'Worker First Name\s*\n\s*([A-Z][A-Za-z\s]+?)(?:\n|Claim|Date|$)', I, ("worker first name",)),
+    "first_name_line": (r'Worker First Name\s*\n\s*(.+?)(?:\n)', I, ("worker first name",)),
+    "last_name": (
+        r'Worker Last Name\s*\n?\s*(?:not known\)?)?\s*\n?\s*(?:Date of (?:Birth|Injury))?\s*\n?\s*([A-Z][A-Za-z]+)',
+        I, ("worker last name",)),
+    "last_name_line": (r'Worker Last Name\s*\n\s*(.+?)(?:\n)', I, ("worker last name",)),
+    "claim": (r'Claim Number\s*(?:\(if known\))?\s*\n?\s*([A-Z0-9\s\+]{5,}?)(?:\n|$)', I, ("claim number",)),
+    "no_capacity": (
+        r'[Hh]ave [Nn]o capacity for (?:any )?employment from\s+' + _DATE + r'\s+to\s+' + _DATE,
+        0, ("capacity for",)),
+    "no_capacity_bare": (
+        r'No capacity for employment from\s+' + _DATE + r'\s+to\s+' + _DATE,
+        0, ("no capacity for employment from",)),
+    "suitable_capacity": (
+        r'[Hh]ave a capacity for suitable employment from\s+' + _DATE + r'\s+to\s+' + _DATE,
+        0, ("capacity for suitable employment from",)),
+    "pre_injury_capacity": (
+        r'[Hh]ave a capacity for pre[- ]?injury employment from\s+' + _DATE, 0, ("injury employment from",)),
+    "diagnosis": (r'Clinical Diagnosis.*?is:\s*\n?\s*(.+?)(?:\n\n|\n[0-9])', I | S, ("clinical diagnosis",)),
+})
+
+COC_QLD = PatternSet("QLD", {
+    "surname": (r'\(surname\)\s*(.+?)(?:\n|I attended)', I, ("(surname)",)),
+    "given_names": (r'I attended to \(given names\)\s*(.+?)(?:\n|$)', I, ("(given names)",)),
+    "given_names_loose": (r'given names?\)?\s*(.+?)(?:\n|$)', I, ("given name",)),
+    "no_capacity": (
+        r'No capacity for any type.*?from\s+' + _DATE + r'\s+to\s+' + _DATE, I, ("no capacity for any type",)),
+    "suitable_duties": (
+        r'(?:suitable|some form of work) duties?\s+from\s+' + _DATE + r'\s+to\s+' + _DATE, I, ("dut",)),
+})
+
+
+# ---------------------------------------------------------------------------
+# Incident / Register of Injury reports
+# ---------------------------------------------------------------------------
+
+_SEP = r'\s*[:\-|]\s*'
+_SEP_Q = r'\s*[:\-|?]\s*'
+
+INCIDENT_REPORT = PatternSet("INCIDENT_REPORT", {
+    "name_labelled": (
+        r"(?:employee|worker|injured person|injured worker)(?:'s)?\s*(?:full\s*)?name" + _SEP + r"(.+)",
+        I, ("name",)),
+    "name_of": (r"name\s+of\s+(?:employee|worker|injured person)" + _SEP + r"(.+)", I, ("name",)),
+    "surname": (r"(?:surname|family\s+name)" + _SEP + r"(.+)", I, ("name",)),
+    "name_bare": (r"name" + _SEP + r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)", I, ("name",)),
+    "dob": (r"(?:date\s+of\s+birth|dob|d\.o\.b)" + _SEP + r"(\S+)", I, ("birth", "dob", "d.o.b")),
+    "phone": (
+        r"(?:phone|telephone|contact\s*number|mobile)" + _SEP + r"([\d\s\+\(\)]{8,})",
+        I, ("phone", "contact", "mobile")),
+    "phone_short": (r"(?:ph|mob)" + _SEP + r"([\d\s\+\(\)]{8,})", I, ("ph", "mob")),
+    "email_labelled": (r"(?:email|e-mail)" + _SEP + r"([\w.\-+]+@[\w.\-]+\.\w+)", I, ("@",)),
+    "email_any": (r"([\w.\-+]+@[\w.\-]+\.\w+)", I, ("@",)),
+    "site": (
+        r"(?:workplace|work\s*site|site|location\s+of\s+workplace)" + _SEP + r"(.+)",
+        I, ("workplace", "site")),
+    "site_incident": (
+        r"(?:place\s+of\s+incident|incident\s+location|location\s+of\s+incident)" + _SEP + r"(.+)",
+        I, ("incident",)),
+    "site_where": (
+        r"(?:where\s+did\s+(?:the\s+)?(?:incident|injury|accident)\s+occur)" + _SEP_Q + r"(.+)",
+        I, ("where",)),
+    "doi": (
+        r"(?:date\s+of\s+(?:injury|incident|accident|occurrence))" + _SEP + r"(\S+)", I, ("date",)),
+    "doi_alt": (
+        r"(?:incident\s+date|injury\s+date|date\s+(?:incident|injury)\s+occurred)" + _SEP + r"(\S+)",
+        I, ("date",)),
+    "doi_when": (
+        r"(?:when\s+did\s+(?:the\s+)?(?:incident|injury)\s+occur)" + _SEP_Q + r"(\S+)", I, ("when",)),
+    "doi_date": (r"(?:date)" + _SEP + r"(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})", I, ("date",)),
+    "time_of_incident": (
+        r"(?:time\s+of\s+(?:incident|injury|accident))" + _SEP + r"(\d{1,2}[:\.]?\d{0,2}\s*(?:am|pm)?)",
+        I, ("time",)),
+    "description_block": (
+        r"(?:what\s+happened|description\s+of\s+(?:injury|incident|accident)|how\s+(?:did\s+)?(?:the\s+)?(?:injury|incident)\s+occur|details?\s+of\s+(?:incident|injury|accident))"
+        + _SEP + r"(.+?)(?:\n\n|\n[A-Z])",
+        I | S, ("happened", "description", "how", "detail")),
+    "description_line": (
+        r"(?:what\s+happened|description\s+of\s+(?:injury|incident)|brief\s+description|describe\s+(?:the\s+)?(?:incident|injury))"
+        + _SEP_Q + r"(.+)",
+        I, ("happened", "description", "describe")),
+    "description_details": (
+        r"(?:incident\s+details?|injury\s+details?)" + _SEP + r"(.+?)(?:\n\n|\n[A-Z])", I | S, ("detail",)),
+    "witnesses": (r"(?:witness(?:es)?|witness\s+name)" + _SEP + r"(.+)", I, ("witness",)),
+    "witnesses_any": (r"(?:any\s+witnesses?)" + _SEP_Q + r"(.+)", I, ("witness",)),
+    "employment_type": (
+        r"(?:employment\s+(?:type|status|basis)|type\s+of\s+employment)" + _SEP + r"(.+)",
+        I, ("employment",)),
+    "tenure": (r"(?:tenure|length\s+of\s+(?:service|employment))" + _SEP + r"(.+)", I, ("tenure", "length")),
+    "tenure_start": (
+        r"(?:start\s+date|commencement\s+date|date\s+(?:of\s+)?commencement)" + _SEP + r"(.+)",
+        I, ("date",)),
+    "shift": (
+        r"(?:shift|hours\s+(?:of\s+work|worked)|roster)" + _SEP + r"(.+)", I, ("shift", "hours", "roster")),
+    "shift_hours": (
+        r"(?:normal\s+working\s+hours|usual\s+hours|hours\s+per\s+week)" + _SEP + r"(.+)", I, ("hours",)),
+    "nature_of_injury": (
+        r"(?:nature\s+of\s+injury|type\s+of\s+injury|injury\s+type)" + _SEP + r"(.+)", I, ("injury",)),
+    "mechanism_of_injury": (r"(?:mechanism\s+of\s+injury)" + _SEP + r"(.+)", I, ("mechanism",)),
+    "body_part": (
+        r"(?:body\s+part|part\s+of\s+body|injured\s+body\s+part|area\s+affected)" + _SEP + r"(.+)",
+        I, ("body", "affected")),
+    "body_area": (r"(?:area\s+of\s+injury|location\s+of\s+injury)" + _SEP + r"(.+)", I, ("injury",)),
+    "treatment": (
+        r"(?:treatment|medical\s+treatment|first\s+aid|treatment\s+given)" + _SEP + r"(.+)",
+        I, ("treatment", "aid")),
+    "treatment_action": (
+        r"(?:initial\s+treatment|action\s+taken)" + _SEP + r"(.+)", I, ("treatment", "taken")),
+    "entity": (
+        r"(?:employer|entity|company|business\s+name|organisation)" + _SEP + r"(.+)",
+        I, ("employer", "entity", "company", "business", "organisation")),
+    "entity_named": (
+        r"(?:name\s+of\s+employer|employer\s+name|trading\s+name)" + _SEP + r"(.+)", I, ("employer", "trading")),
+    "claim_number": (
+        r"(?:claim\s+(?:number|no|ref)|reference\s+(?:number|no))" + _SEP + r"(\S+)", I, ("claim", "reference")),
+    "manager": (
+        r"(?:manager|supervisor|reporting\s+officer)" + _SEP + r"(.+)", I, ("manager", "supervisor", "officer")),
+    "manager_reported_to": (r"(?:reported\s+to|person\s+reported\s+to)" + _SEP + r"(.+)", I, ("reported",)),
+    "state": (r"(?:state|state/territory)" + _SEP + r"(VIC|NSW|QLD|TAS|SA|WA|ACT|NT)", I, ("state",)),
+})
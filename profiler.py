@@ -0,0 +1,253 @@
+"""
+Sampling profiler for page reruns.
+
+start() launches a thread that samples the calling (script) thread's stack
+every SAMPLE_INTERVAL_MS, keeping only the frames below the caller, i.e.
+the app.py rerun. Each sample is charged to a section by the outermost
+library it is running in: Streamlit is "render", python-docx "documents",
+OCR and PDF handling "ocr", SQLite and the loaders "data load", and
+anything else (pandas, the metrics modules, app.py itself) "compute".
+
+A profile ends at stop(), or on its own once the script has left the
+caller's frame, so reruns cut short by st.rerun()/st.stop() are kept too.
+The last MAX_PROFILES are held in memory for export as speedscope JSON
+or collapsed stacks (for flamegraph.pl and similar tools).
+
+Profiling is off unless PROFILE_RERUNS=1 is set or an admin turns it on
+for their session on the Activity Log page.
+"""
+
+import json
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+ENABLED = os.environ.get("PROFILE_RERUNS", "0") == "1"
+SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+MAX_PROFILES = int(os.environ.get("PROFILE_KEEP", "20"))
+
+# Checked from the outermost frame below the page script inward; the first
+# frame whose module path starts with one of the prefixes sets the section.
+SECTION_RULES = (
+    ("render", ("streamlit/",)),
+    ("documents", ("docx/", "doc_generator.py", "doc_packs.py")),
+    ("ocr", ("coc_parser.py", "coc_scanner.py", "ocr_cache.py", "pytesseract/", "pdf2image/", "pdfplumber/",
+             "pdfminer/")),
+    ("data load", ("database.py", "data_cache.py", "case_bundle.py", "case_listing.py", "search.py",
+                   "log_writer.py", "sqlite3/", "pandas/io/sql.py")),
+)
+SECTIONS = tuple(name for name, _ in SECTION_RULES) + ("compute",)
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+_LIB_DIRS = tuple(sorted({os.path.abspath(p) for p in (sysconfig.get_paths()["purelib"],
+                                                        sysconfig.get_paths()["platlib"],
+                                                        sysconfig.get_paths()["stdlib"])},
+                         key=len, reverse=True))
+
+_profiles: deque = deque(maxlen=MAX_PROFILES)
+
+
+def _module_path(filename: str) -> str:
+    """Path of a source file relative to the repo or the library directory it lives in."""
+    path = os.path.abspath(filename)
+    for base in (_REPO_DIR,) + _LIB_DIRS:
+        if path.startswith(base + os.sep):
+            return path[len(base) + 1:].replace(os.sep, "/")
+    return filename
+
+
+@dataclass
+class Profile:
+    label: str
+    started_at: datetime
+    interval_ms: float
+    duration_ms: float = 0.0
+    # Chronological (stack, milliseconds); a stack is a tuple of
+    # (function, module path, first line) from the page script to the leaf.
+    samples: list = field(default_factory=list)
+    sections: dict = field(default_factory=lambda: dict.fromkeys(SECTIONS, 0.0))
+
+    @property
+    def sampled_ms(self) -> float:
+        return sum(ms for _, ms in self.samples)
+
+
+class Sampler:
+    """Samples one thread's stack until stop(); see start()."""
+
+    def __init__(self, label: str, root_frame, interval_ms: float = SAMPLE_INTERVAL_MS):
+        self.profile = Profile(label, datetime.now(), interval_ms)
+        self._root = root_frame
+        self._thread_id = threading.get_ident()
+        self._interval = interval_ms / 1000
+        self._started = time.perf_counter()
+        self._stop = threading.Event()
+        self._finish_lock = threading.Lock()
+        self._finished = False
+        self._frame_keys: dict = {}  # code object -> frame tuple, memoised
+        self._sections: dict = {}  # stack -> section, memoised
+        self._thread = threading.Thread(target=self._run, name="rerun-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        """End the profile (if it hasn't ended already) and return it."""
+        self._stop.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        self._finish()
+        return self.profile
+
+    def _finish(self):
+        with self._finish_lock:
+            if self._finished:
+                return
+            self._finished = True
+        self.profile.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+        self._root = None
+        _profiles.append(self.profile)
+
+    def _frame_key(self, code) -> tuple:
+        key = self._frame_keys.get(code)
+        if key is None:
+            key = self._frame_keys[code] = (code.co_name, _module_path(code.co_filename), code.co_firstlineno)
+        return key
+
+    def _stack(self, frame) -> tuple | None:
+        """
+        Frames from the root frame down to ``frame``; () while the thread is
+        inside stop(), None if the root is no longer on the stack.
+        """
+        codes = []
+        while frame is not None:
+            if frame.f_code is _STOP_CODE:
+                return ()
+            codes.append(frame.f_code)
+            if frame is self._root:
+                return tuple(self._frame_key(code) for code in reversed(codes))
+            frame = frame.f_back
+        return None
+
+    def _section(self, stack: tuple) -> str:
+        section = self._sections.get(stack)
+        if section is None:
+            section = self._sections[stack] = _classify(stack)
+        return section
+
+    def _run(self):
+        profile = self.profile
+        last = time.perf_counter()
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = self._stack(frame) if frame is not None else None
+            del frame
+            now = time.perf_counter()
+            if stack is None:
+                break  # the rerun ended without calling stop()
+            ms = (now - last) * 1000
+            last = now
+            if not stack:
+                continue
+            if profile.samples and profile.samples[-1][0] == stack:
+                profile.samples[-1] = (stack, profile.samples[-1][1] + ms)
+            else:
+                profile.samples.append((stack, ms))
+            profile.sections[self._section(stack)] += ms
+        self._finish()
+
+
+_STOP_CODE = Sampler.stop.__code__
+
+
+def _classify(stack: tuple) -> str:
+    for _, module, _ in stack[1:]:
+        for section, prefixes in SECTION_RULES:
+            if module.startswith(prefixes):
+                return section
+    return "compute"
+
+
+def start(label: str) -> Sampler:
+    """Profile the calling thread from the caller's frame down, e.g. one app.py rerun."""
+    return Sampler(label, sys._getframe(1))
+
+
+def recent_profiles() -> list[Profile]:
+    """The last MAX_PROFILES profiles, newest first."""
+    return list(reversed(_profiles))
+
+
+def clear_profiles():
+    _profiles.clear()
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def _profile_name(profile: Profile) -> str:
+    return f"{profile.label} {profile.started_at:%Y-%m-%d %H:%M:%S}"
+
+
+def _frame_name(frame: tuple) -> str:
+    function, module, line = frame
+    return f"{function} ({module}:{line})"
+
+
+def to_collapsed(profiles: list[Profile]) -> str:
+    """
+    Collapsed stacks ("frame;frame;frame weight" per line, weight in whole
+    milliseconds), each rooted at the profile's name and then its section.
+    """
+    lines = []
+    for profile in profiles:
+        totals: dict = {}
+        for stack, ms in profile.samples:
+            totals[stack] = totals.get(stack, 0.0) + ms
+        root = _profile_name(profile).replace(";", ",")
+        for stack, ms in totals.items():
+            if round(ms) < 1:
+                continue
+            names = [root, _classify(stack)] + [_frame_name(frame).replace(";", ",") for frame in stack]
+            lines.append(f"{';'.join(names)} {round(ms)}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(profiles: list[Profile]) -> str:
+    """A speedscope file (https://www.speedscope.app) with one sampled profile per rerun."""
+    frames, index = [], {}
+
+    def frame_index(key, name, file=None, line=None):
+        if key not in index:
+            index[key] = len(frames)
+            frames.append({"name": name, "file": file, "line": line} if file else {"name": name})
+        return index[key]
+
+    out = []
+    for profile in profiles:
+        samples, weights = [], []
+        for stack, ms in profile.samples:
+            section = _classify(stack)
+            samples.append([frame_index(("section", section), f"[{section}]")]
+                           + [frame_index(frame, _frame_name(frame), frame[1], frame[2]) for frame in stack])
+            weights.append(round(ms, 3))
+        out.append({
+            "type": "sampled",
+            "name": _profile_name(profile),
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 3),
+            "samples": samples,
+            "weights": weights,
+        })
+    return json.dumps({
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": "ClaimTrack Pro page reruns",
+        "exporter": "claimtrack profiler",
+        "shared": {"frames": frames},
+        "profiles": out,
+    })
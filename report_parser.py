@@ -5,11 +5,12 @@ and matches field labels to pre-fill the New Case wizard.
 
 from __future__ import annotations
 
-import re
 import io
 from datetime import datetime
 from typing import Optional
 
+import patterns
+
 
 # ---------------------------------------------------------------------------
 # Text extraction
@@ -56,12 +57,6 @@ def _extract_text_from_pdf(file_bytes: bytes) -> str:
 # Field parsing helpers
 # ---------------------------------------------------------------------------
 
-def _find(pattern: str, text: str, flags=re.IGNORECASE) -> str | None:
-    """Return the first captured group, or None."""
-    m = re.search(pattern, text, flags)
-    return m.group(1).strip() if m else None
-
-
 def _parse_date(raw: str | None) -> str | None:
     """Try to normalise a date string to YYYY-MM-DD."""
     if not raw:
@@ -88,56 +83,45 @@ def _parse_fields_from_text(text: str) -> dict:
     incident report formats.
     """
     fields: dict = {}
+    scan = patterns.INCIDENT_REPORT.scan(text)
 
     # Employee name — multiple patterns for different form layouts
-    name = (_find(r"(?:employee|worker|injured person|injured worker)(?:'s)?\s*(?:full\s*)?name\s*[:\-|]\s*(.+)", text)
-            or _find(r"name\s+of\s+(?:employee|worker|injured person)\s*[:\-|]\s*(.+)", text)
-            or _find(r"(?:surname|family\s+name)\s*[:\-|]\s*(.+)", text)
-            or _find(r"name\s*[:\-|]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)", text))
+    name = scan.find("name_labelled", "name_of", "surname", "name_bare")
     if name:
         fields["worker_name"] = name.split("\n")[0].strip()
 
     # Date of birth
-    dob = _find(r"(?:date\s+of\s+birth|dob|d\.o\.b)\s*[:\-|]\s*(\S+)", text)
+    dob = scan.find("dob")
     if dob:
         fields["dob"] = _parse_date(dob) or dob
 
     # Phone
-    phone = (_find(r"(?:phone|telephone|contact\s*number|mobile)\s*[:\-|]\s*([\d\s\+\(\)]{8,})", text)
-             or _find(r"(?:ph|mob)\s*[:\-|]\s*([\d\s\+\(\)]{8,})", text))
+    phone = scan.find("phone", "phone_short")
     if phone:
-        fields["phone"] = re.sub(r"\s+", " ", phone).strip()
+        fields["phone"] = patterns.WHITESPACE_RUN.sub(" ", phone).strip()
 
     # Email
-    email = (_find(r"(?:email|e-mail)\s*[:\-|]\s*([\w.\-+]+@[\w.\-]+\.\w+)", text)
-             or _find(r"([\w.\-+]+@[\w.\-]+\.\w+)", text))
+    email = scan.find("email_labelled", "email_any")
     if email:
         fields["email"] = email.strip()
 
     # Site / Workplace
-    site = (_find(r"(?:workplace|work\s*site|site|location\s+of\s+workplace)\s*[:\-|]\s*(.+)", text)
-            or _find(r"(?:place\s+of\s+incident|incident\s+location|location\s+of\s+incident)\s*[:\-|]\s*(.+)", text)
-            or _find(r"(?:where\s+did\s+(?:the\s+)?(?:incident|injury|accident)\s+occur)\s*[:\-|?]\s*(.+)", text))
+    site = scan.find("site", "site_incident", "site_where")
     if site:
         fields["site"] = site.split("\n")[0].strip()
 
     # Date of incident / injury — expanded patterns
-    doi = (_find(r"(?:date\s+of\s+(?:injury|incident|accident|occurrence))\s*[:\-|]\s*(\S+)", text)
-           or _find(r"(?:incident\s+date|injury\s+date|date\s+(?:incident|injury)\s+occurred)\s*[:\-|]\s*(\S+)", text)
-           or _find(r"(?:when\s+did\s+(?:the\s+)?(?:incident|injury)\s+occur)\s*[:\-|?]\s*(\S+)", text)
-           or _find(r"(?:date)\s*[:\-|]\s*(\d{1,2}[/\-]\d{1,2}[/\-]\d{2,4})", text))
+    doi = scan.find("doi", "doi_alt", "doi_when", "doi_date")
     if doi:
         fields["date_of_injury"] = _parse_date(doi) or doi
 
     # Time of incident
-    time_of = _find(r"(?:time\s+of\s+(?:incident|injury|accident))\s*[:\-|]\s*(\d{1,2}[:\.]?\d{0,2}\s*(?:am|pm)?)", text)
+    time_of = scan.find("time_of_incident")
     if time_of:
         fields["time_of_incident"] = time_of.strip()
 
     # What happened / description — more flexible patterns
-    desc = (_find(r"(?:what\s+happened|description\s+of\s+(?:injury|incident|accident)|how\s+(?:did\s+)?(?:the\s+)?(?:injury|incident)\s+occur|details?\s+of\s+(?:incident|injury|accident))\s*[:\-|]\s*(.+?)(?:\n\n|\n[A-Z])", text, re.IGNORECASE | re.DOTALL)
-            or _find(r"(?:what\s+happened|description\s+of\s+(?:injury|incident)|brief\s+description|describe\s+(?:the\s+)?(?:incident|injury))\s*[:\-|?]\s*(.+)", text)
-            or _find(r"(?:incident\s+details?|injury\s+details?)\s*[:\-|]\s*(.+?)(?:\n\n|\n[A-Z])", text, re.IGNORECASE | re.DOTALL))
+    desc = scan.find("description_block", "description_line", "description_details")
     if desc:
         # Clean up: limit to reasonable length, trim trailing whitespace
         cleaned = desc.strip()
@@ -146,64 +130,56 @@ def _parse_fields_from_text(text: str) -> dict:
         fields["injury_description"] = cleaned
 
     # Witnesses
-    witness = (_find(r"(?:witness(?:es)?|witness\s+name)\s*[:\-|]\s*(.+)", text)
-               or _find(r"(?:any\s+witnesses?)\s*[:\-|?]\s*(.+)", text))
+    witness = scan.find("witnesses", "witnesses_any")
     if witness:
         fields["witnesses"] = witness.split("\n")[0].strip()
 
     # Employment type
-    emp_type = _find(r"(?:employment\s+(?:type|status|basis)|type\s+of\s+employment)\s*[:\-|]\s*(.+)", text)
+    emp_type = scan.find("employment_type")
     if emp_type:
         fields["employment_type"] = emp_type.split("\n")[0].strip()
 
     # Tenure / length of service
-    tenure = (_find(r"(?:tenure|length\s+of\s+(?:service|employment))\s*[:\-|]\s*(.+)", text)
-              or _find(r"(?:start\s+date|commencement\s+date|date\s+(?:of\s+)?commencement)\s*[:\-|]\s*(.+)", text))
+    tenure = scan.find("tenure", "tenure_start")
     if tenure:
         fields["tenure"] = tenure.split("\n")[0].strip()
 
     # Hours / shift
-    shift = (_find(r"(?:shift|hours\s+(?:of\s+work|worked)|roster)\s*[:\-|]\s*(.+)", text)
-             or _find(r"(?:normal\s+working\s+hours|usual\s+hours|hours\s+per\s+week)\s*[:\-|]\s*(.+)", text))
+    shift = scan.find("shift", "shift_hours")
     if shift:
         fields["shift_structure"] = shift.split("\n")[0].strip()
 
     # Nature of injury / body part
-    nature = (_find(r"(?:nature\s+of\s+injury|type\s+of\s+injury|injury\s+type)\s*[:\-|]\s*(.+)", text)
-              or _find(r"(?:mechanism\s+of\s+injury)\s*[:\-|]\s*(.+)", text))
+    nature = scan.find("nature_of_injury", "mechanism_of_injury")
     if nature:
         fields["nature_of_injury"] = nature.split("\n")[0].strip()
 
-    body_part = (_find(r"(?:body\s+part|part\s+of\s+body|injured\s+body\s+part|area\s+affected)\s*[:\-|]\s*(.+)", text)
-                 or _find(r"(?:area\s+of\s+injury|location\s+of\s+injury)\s*[:\-|]\s*(.+)", text))
+    body_part = scan.find("body_part", "body_area")
     if body_part:
         fields["body_part"] = body_part.split("\n")[0].strip()
 
     # Treatment
-    treatment = (_find(r"(?:treatment|medical\s+treatment|first\s+aid|treatment\s+given)\s*[:\-|]\s*(.+)", text)
-                 or _find(r"(?:initial\s+treatment|action\s+taken)\s*[:\-|]\s*(.+)", text))
+    treatment = scan.find("treatment", "treatment_action")
     if treatment:
         fields["treatment"] = treatment.split("\n")[0].strip()
 
     # Entity / employer — expanded
-    entity = (_find(r"(?:employer|entity|company|business\s+name|organisation)\s*[:\-|]\s*(.+)", text)
-              or _find(r"(?:name\s+of\s+employer|employer\s+name|trading\s+name)\s*[:\-|]\s*(.+)", text))
+    entity = scan.find("entity", "entity_named")
     if entity:
         fields["entity"] = entity.split("\n")[0].strip()
 
     # Claim number
-    claim = _find(r"(?:claim\s+(?:number|no|ref)|reference\s+(?:number|no))\s*[:\-|]\s*(\S+)", text)
+    claim = scan.find("claim_number")
     if claim:
         fields["claim_number"] = claim.strip()
 
     # Manager / Supervisor
-    manager = (_find(r"(?:manager|supervisor|reporting\s+officer)\s*[:\-|]\s*(.+)", text)
-               or _find(r"(?:reported\s+to|person\s+reported\s+to)\s*[:\-|]\s*(.+)", text))
+    manager = scan.find("manager", "manager_reported_to")
     if manager:
         fields["manager"] = manager.split("\n")[0].strip()
 
     # State — also try to infer from address
-    state = _find(r"(?:state|state/territory)\s*[:\-|]\s*(VIC|NSW|QLD|TAS|SA|WA|ACT|NT)", text)
+    state = scan.find("state")
     if not state:
         # Try to infer from text mentions of state names
         state_map = {
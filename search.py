@@ -0,0 +1,177 @@
+"""
+Global search over cases, correspondence, incidents and COC text.
+
+Backed by the search_index FTS5 table, which triggers keep in step with the
+source tables (see database._migrate_search_index). Results are ranked by
+BM25 with worker name / subject matches weighted above matches in the body
+text, and each carries a highlighted snippet and the case it belongs to.
+
+Only the newest SEARCH_CANDIDATES matches are scored, so a common word
+doesn't rank hundreds of thousands of rows. bm25() still counts every match
+of each word once per query for its IDF, about 20 ms for a word in 300k of
+a million rows; bench/search.py times it.
+"""
+
+import re
+import unicodedata
+
+import database as db
+
+KIND_NAMES = {1: "case", 2: "correspondence", 3: "incident", 4: "coc"}
+KIND_CODES = {name: code for code, name in KIND_NAMES.items()}
+MAX_RESULTS = 25
+HIGHLIGHT = ("**", "**")
+SNIPPET_WORDS = 12
+# Matches scored per query, newest (highest rowid) first. Ranking the lot
+# took 0.45-0.7 s for a common word at a million index rows.
+SEARCH_CANDIDATES = 2000
+# A typed prefix is searched as the terms it expands to when there are at
+# most this many. FTS5 merges a prefix query's doclists in full before the
+# first row, 25 ms more than the word itself for "physio*" at a million rows.
+MAX_PREFIX_TERMS = 8
+
+_TOKEN_RE = re.compile(r"\w+")
+_QUERY_TERM_RE = re.compile(r'"([^"]*)"( \*)?')
+
+
+def _fold(token: str) -> str:
+    """``token`` as the unicode61 tokenizer indexes it: lower case, no diacritics."""
+    decomposed = unicodedata.normalize("NFKD", token.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _prefix_terms(conn, prefix: str) -> list[str] | None:
+    """Indexed terms starting with ``prefix``, or None if there are more than MAX_PREFIX_TERMS."""
+    terms, start = [], prefix
+    while True:
+        # ">= term || NUL" rather than "> term": the vocab table seeks to a
+        # lower bound but would step through every instance of an equal term.
+        row = conn.execute("SELECT term FROM search_terms WHERE term >= ? AND term < ? LIMIT 1",
+                           (start, prefix + "\U0010ffff")).fetchone()
+        if row is None:
+            return terms
+        if len(terms) == MAX_PREFIX_TERMS:
+            return None
+        terms.append(row["term"])
+        start = row["term"] + "\0"
+
+
+def build_query(text: str, conn=None) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match; the last one also matches as a prefix while it is
+    still being typed (from two characters, the shortest indexed prefix).
+    Given ``conn``, a prefix with at most MAX_PREFIX_TERMS completions is
+    spelled out as those terms. Words are quoted, so FTS5 syntax in the input
+    (AND, quotes, column filters, ...) is searched for literally. Returns ""
+    when there is nothing to search for.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return ""
+    terms = [f'"{token}"' for token in tokens]
+    if len(tokens[-1]) >= 2 and not text[-1:].isspace():
+        expanded = None
+        if conn is not None:
+            expanded = _prefix_terms(conn, _fold(tokens[-1]))
+        if expanded is None:
+            terms[-1] += " *"
+        elif expanded:
+            terms[-1] = "(" + " OR ".join(f'"{term}"' for term in expanded) + ")"
+    return " AND ".join(terms)
+
+
+def snippet(body: str, query: str) -> str:
+    """
+    The SNIPPET_WORDS words of ``body`` holding the most distinct terms of
+    ``query`` (a build_query() expression), with those terms in HIGHLIGHT
+    and "…" where the text was cut; the start of ``body`` if none occur.
+    Built from the text rather than by FTS5's snippet(), which has to match
+    the query again for each result.
+    """
+    words = list(_TOKEN_RE.finditer(body))
+    if not words:
+        return body.strip()
+    terms = [(_fold(term), bool(prefix)) for term, prefix in _QUERY_TERM_RE.findall(query)]
+    hits = {}  # word index -> the term it matched
+    for i, word in enumerate(words):
+        folded = _fold(word.group())
+        for term, prefix in terms:
+            if folded.startswith(term) if prefix else folded == term:
+                hits[i] = term
+                break
+    start = 0
+    if hits:
+        starts = {max(0, min(i - SNIPPET_WORDS // 4, len(words) - SNIPPET_WORDS)) for i in hits}
+        start = max(starts, key=lambda first: (
+            len({term for i, term in hits.items() if first <= i < first + SNIPPET_WORDS}), -first))
+    end = min(len(words), start + SNIPPET_WORDS)
+    out, pos = ["…" if start else ""], words[start].start()
+    for i in range(start, end):
+        word = words[i]
+        out.append(body[pos:word.start()])
+        out.append(HIGHLIGHT[0] + word.group() + HIGHLIGHT[1] if i in hits else word.group())
+        pos = word.end()
+    out.append("…" if end < len(words) else body[pos:])
+    return "".join(out).strip()
+
+
+def search(text: str, kinds=None, limit: int = MAX_RESULTS) -> list[dict]:
+    """
+    Best matches for ``text``, best first.
+
+    ``kinds`` restricts results to some of KIND_NAMES. Each result has kind,
+    id (row id in the source table), case_id, title, snippet, score (BM25,
+    lower is better) and the case's worker_name, state and status (None when
+    the row isn't linked to a case).
+
+    One statement: the newest SEARCH_CANDIDATES matches are ranked, newest
+    first on equal scores, and only the best ``limit`` are joined back for
+    their text and case.
+    """
+    conn = db.get_connection()
+    query = build_query(text, conn)
+    if not query:
+        return []
+    where, params = "search_index MATCH ?", [query]
+    if kinds is not None:
+        # The kind code is rowid % 8; reading the kind column costs as much as ranking.
+        codes = [KIND_CODES[kind] for kind in kinds]
+        where += f" AND rowid % 8 IN ({', '.join('?' * len(codes))})"
+        params.extend(codes)
+    rows = conn.execute(f"""
+        WITH candidates AS (
+            SELECT rowid, rank FROM search_index
+            WHERE {where}
+            ORDER BY rowid DESC
+            LIMIT ?
+        ), hits AS (
+            SELECT rowid, rank FROM candidates
+            ORDER BY rank, rowid DESC
+            LIMIT ?
+        )
+        SELECT s.rowid, s.kind, s.case_id, s.title, s.body, hits.rank,
+               c.worker_name, c.state, c.status
+        FROM hits
+        JOIN search_index s ON s.rowid = hits.rowid
+        LEFT JOIN cases c ON c.id = s.case_id
+        ORDER BY hits.rank, hits.rowid DESC
+    """, params + [SEARCH_CANDIDATES, limit]).fetchall()
+    return [{
+        "kind": KIND_NAMES[row["kind"]],
+        "id": row["rowid"] // 8,
+        "case_id": row["case_id"],
+        "title": row["title"],
+        "snippet": snippet(row["body"], query),
+        "score": row["rank"],
+        "worker_name": row["worker_name"],
+        "state": row["state"],
+        "status": row["status"],
+    } for row in rows]
+
+
+def optimize():
+    """Merge the index's b-trees; worth running after a large import."""
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
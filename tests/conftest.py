@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import database as db  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """A freshly migrated and seeded database in a temporary directory."""
+    db.close_all_connections()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "workcover.db"))
+    db.init_db()
+    yield db
+    db.close_all_connections()
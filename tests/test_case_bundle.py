@@ -0,0 +1,46 @@
+"""case_bundle.load_case_bundle across a schema change and with queued log rows."""
+
+import case_bundle
+import log_writer
+
+
+def _case_with_coc(db):
+    db.seed_data()
+    return db.get_connection().execute("SELECT case_id FROM latest_certificates LIMIT 1").fetchone()[0]
+
+
+def test_bundle_picks_up_migrated_column(temp_db, monkeypatch):
+    case_id = _case_with_coc(temp_db)
+    before = case_bundle.load_case_bundle(case_id)
+    assert "review_note" not in before.latest_coc
+
+    def add_review_note(conn):
+        conn.execute("ALTER TABLE certificates ADD COLUMN review_note TEXT")
+        conn.execute("UPDATE certificates SET review_note = 'checked' WHERE case_id = ?", (case_id,))
+
+    monkeypatch.setattr(temp_db, "MIGRATIONS", temp_db.MIGRATIONS + [(999, "review_note", add_review_note)])
+    assert temp_db.migrate() == [999]
+
+    after = case_bundle.load_case_bundle(case_id)
+    assert after.latest_coc["review_note"] == "checked"
+    assert after.case == before.case
+
+
+def test_bundle_waits_only_for_its_own_case(temp_db, monkeypatch):
+    case_id = _case_with_coc(temp_db)
+    other_id = temp_db.get_connection().execute(
+        "SELECT id FROM cases WHERE id != ? LIMIT 1", (case_id,)).fetchone()[0]
+    log_writer.flush()
+    # No writer thread: rows stay queued until someone drains them.
+    monkeypatch.setattr(log_writer, "_thread", None)
+    monkeypatch.setattr(log_writer, "_ensure_started", lambda: None)
+
+    log_writer.log_activity(other_id, "Queued elsewhere")
+    bundle = case_bundle.load_case_bundle(case_id)
+    assert log_writer._queue.qsize() == 1
+    assert "Queued elsewhere" not in [a["action"] for a in bundle.activity]
+
+    log_writer.log_activity(case_id, "Queued here")
+    bundle = case_bundle.load_case_bundle(case_id)
+    assert log_writer._queue.qsize() == 0
+    assert bundle.activity[0]["action"] == "Queued here"
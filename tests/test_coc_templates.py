@@ -0,0 +1,74 @@
+"""
+coc_parser template classification, field extraction and text-layer/OCR
+selection against the labelled COC texts in fixtures/coc_text (labels in
+fixtures/coc_templates.json). bench.coc_templates times the same fixtures.
+"""
+
+import pytest
+
+import coc_parser
+from bench import coc_templates
+
+TEXTS = {name: text for name, _, text in coc_templates.fixtures()}
+LABELS = {name: label for name, label, _ in coc_templates.fixtures()}
+
+
+def _text(name: str) -> str:
+    return TEXTS[name]
+
+
+@pytest.mark.parametrize("name", sorted(LABELS))
+def test_classify_template(name):
+    template, confidence = coc_parser.classify_template(_text(name))
+    assert template == LABELS[name]["template"]
+    assert 0.0 <= confidence <= 1.0
+
+
+@pytest.mark.parametrize("name", sorted(LABELS))
+def test_extracted_fields(name):
+    fields = coc_templates.single_pass_fields(_text(name))
+    assert {k: fields.get(k) for k in LABELS[name]["fields"]} == LABELS[name]["fields"]
+
+
+def test_single_pass_at_least_as_accurate_as_four_parsers():
+    right = {path: sum(coc_templates.score(label, func(text))[0] for _, label, text in coc_templates.fixtures())
+             for path, func in coc_templates.PATHS.items()}
+    assert right["single pass"] >= right["four parsers"]
+
+
+@pytest.mark.parametrize("name", sorted(LABELS))
+def test_text_layer_quality_check(name):
+    assert coc_parser._text_layer_ok(_text(name)) == LABELS[name]["text_layer"]
+
+
+def test_whole_word_keywords_only():
+    # "tac" inside "contact" or "attach" is not the TAC keyword.
+    assert coc_parser.classify_template("Please contact us and attach the tactile report.")[0] == "UNKNOWN"
+
+
+@pytest.fixture
+def pdf_pages(monkeypatch):
+    """Serve fixture texts as a PDF's text layer; OCR returns the page's label."""
+    pages = []
+    monkeypatch.setattr(coc_parser, "_extract_text_layer", lambda source: [
+        {"page": n, "text": _text(name), "extract_s": 0.0} for n, name in enumerate(pages, start=1)])
+    monkeypatch.setattr(coc_parser, "_ocr_page", lambda source, n, dpi: {
+        "page": n, "text": _text("qld_no_capacity.txt"), "render_s": 0.0, "ocr_s": 0.0})
+    return pages
+
+
+@pytest.mark.parametrize("names, method", [
+    (["vic_worksafe_suitable.txt"], "text_layer"),
+    (["unknown_blank_scan.txt"], "ocr"),
+    (["nsw_sira_some_capacity.txt", "unknown_unmapped_font.txt"], "mixed"),
+])
+def test_extraction_method_and_stats(pdf_pages, names, method):
+    pdf_pages.extend(names)
+    before = coc_parser.extraction_stats()
+    fields = coc_parser.parse_coc_pdf(b"%PDF fixture", max_workers=1, use_cache=False)
+    after = coc_parser.extraction_stats()
+    assert fields["_extraction_method"] == method
+    assert [t["method"] for t in fields["_ocr_timings"]] == [
+        "text_layer" if LABELS[name]["text_layer"] else "ocr" for name in names]
+    assert after[method] == before[method] + 1
+    assert sum(after.values()) == sum(before.values()) + 1
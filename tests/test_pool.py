@@ -0,0 +1,28 @@
+"""Connection pool: per-thread connections across close_all_connections()."""
+
+import threading
+
+
+def test_thread_connection_survives_close_all_connections(temp_db):
+    opened, closed, done = threading.Event(), threading.Event(), threading.Event()
+    errors = []
+
+    def worker():
+        try:
+            temp_db.get_connection().execute("SELECT 1")
+            opened.set()
+            closed.wait()
+            temp_db.get_connection().execute("SELECT 1")
+            temp_db.release_connection()
+        except Exception as e:  # noqa: BLE001 - reported below
+            errors.append(e)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    opened.wait()
+    temp_db.close_all_connections()
+    closed.set()
+    thread.join()
+    assert not errors
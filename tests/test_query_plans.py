@@ -0,0 +1,82 @@
+"""
+EXPLAIN QUERY PLAN checks for the app's hot queries: each must be served by
+its index (see _migrate_hot_path_indexes) rather than a full scan or a
+temporary sort. The SQL is read from app.py's module-level constants, so a
+query edited there is checked as it now stands.
+"""
+
+import re
+
+import pytest
+
+from bench import harness
+
+# app.py constant -> (params, index the plan must use)
+HOT_QUERIES = {
+    "CASES_SQL": ((), "idx_cases_state_worker"),
+    "WORKER_NAMES_SQL": ((), "idx_cases_worker_name"),
+    "CASE_CERTIFICATES_SQL": ((1,), "idx_certificates_case_cert_to"),
+    "LATEST_COCS_SQL": ((), "idx_latest_certificates_cert_to"),
+    "CASE_PAYROLL_SQL": ((1,), "idx_payroll_case_period"),
+    "PAYROLL_HISTORY_SQL": ((), "idx_payroll_period_to"),
+    "CASE_DOCUMENTS_SQL": ((1,), "idx_documents_case_type"),
+    "CASE_ACTIVITY_SQL": ((1, 50), "idx_activity_case_created"),
+    "RECENT_ACTIVITY_SQL": ((50,), "idx_activity_created"),
+    "AUDIT_LOG_SQL": ((), "idx_audit_created"),
+    "FOLLOW_UPS_SQL": ((), "idx_correspondence_follow_up"),
+    "CASE_CORRESPONDENCE_SQL": ((1,), "idx_correspondence_case_date"),
+    "CORRESPONDENCE_SQL": ((), "idx_correspondence_date"),
+    "OPEN_EVENTS_SQL": ((), "idx_calendar_open_date"),
+    "CALENDAR_EVENTS_SQL": ((), "idx_calendar_event_date"),
+}
+
+# "SCAN cases" or "SCAN co" with no index after it: a full table scan.
+_FULL_SCAN = re.compile(r"SCAN \w+$")
+# cases under any alias the app gives it, scanned without an index.
+_CASES_SCAN = re.compile(r"SCAN (cases|cs|c)\b(?! USING)")
+
+
+def _plan(db, name):
+    params, _ = HOT_QUERIES[name]
+    return db.explain_query_plan(harness.app_constant(name), params)
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(temp_db, name):
+    plan = _plan(temp_db, name)
+    assert any(HOT_QUERIES[name][1] in line for line in plan), plan
+    assert not [line for line in plan if _FULL_SCAN.match(line)], plan
+    assert not [line for line in plan if "TEMP B-TREE" in line], plan
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_no_query_scans_cases_without_index(temp_db, name):
+    plan = _plan(temp_db, name)
+    assert not any(_CASES_SCAN.match(line) for line in plan), plan
+
+
+def test_full_scan_patterns_catch_bare_scans():
+    assert _FULL_SCAN.match("SCAN co") and _CASES_SCAN.match("SCAN cases")
+    assert _CASES_SCAN.match("SCAN c") and _CASES_SCAN.match("SCAN cs")
+    assert not _FULL_SCAN.match("SCAN cases USING INDEX idx_cases_state_worker")
+    assert not _CASES_SCAN.match("SCAN c USING COVERING INDEX idx_cases_worker_name")
+    assert not _CASES_SCAN.match("SCAN co")
+
+
+def test_manifest_lookups_use_primary_key_range(temp_db):
+    import coc_scanner
+
+    for sql in ("SELECT path FROM scan_manifest WHERE path = ? OR (path >= ? AND path < ?)",
+                "DELETE FROM scan_manifest WHERE path = ? OR (path >= ? AND path < ?)"):
+        plan = temp_db.explain_query_plan(sql, ("/r", *coc_scanner._below("/r")))
+        assert any("sqlite_autoindex_scan_manifest_1 (path>? AND path<?)" in line for line in plan), plan
+
+
+def test_manifest_range_covers_only_paths_below():
+    import coc_scanner
+
+    low, high = coc_scanner._below("/data/Active Cases")
+    inside = ["/data/Active Cases/", "/data/Active Cases/Smith/COC/a.pdf", "/data/Active Cases/~"]
+    outside = ["/data/Active Cases", "/data/Active Cases0", "/data/Active Cases!", "/data/Active Cases 2/x"]
+    assert all(low <= p < high for p in inside)
+    assert not any(low <= p < high for p in outside)
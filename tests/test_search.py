@@ -0,0 +1,76 @@
+"""search.search ranking."""
+
+import search
+
+FILLER = " ".join(["routine update on the claim and next steps"] * 6)
+
+
+def _add_correspondence(conn, case_id, subject, summary):
+    return conn.execute(
+        "INSERT INTO correspondence (case_id, date, subject, summary) VALUES (?, '2025-01-01', ?, ?)",
+        (case_id, subject, summary)).lastrowid
+
+
+def test_best_candidate_ranks_first_however_old(temp_db):
+    temp_db.seed_data()
+    with temp_db.transaction() as conn:
+        case_id = conn.execute("SELECT id FROM cases LIMIT 1").fetchone()[0]
+        best = _add_correspondence(conn, case_id, "Update", "physio physio review")
+        for _ in range(search.SEARCH_CANDIDATES - 1):
+            _add_correspondence(conn, case_id, "Update", f"{FILLER} physio {FILLER}")
+
+    results = search.search("physio", kinds=["correspondence"], limit=5)
+    assert results[0]["id"] == best
+    assert [r["score"] for r in results] == sorted(r["score"] for r in results)
+
+
+def test_equal_scores_newest_first(temp_db):
+    temp_db.seed_data()
+    with temp_db.transaction() as conn:
+        case_id = conn.execute("SELECT id FROM cases LIMIT 1").fetchone()[0]
+        ids = [_add_correspondence(conn, case_id, "Update", "hydrotherapy booked") for _ in range(3)]
+
+    results = search.search("hydrotherapy", kinds=["correspondence"])
+    assert [r["id"] for r in results] == ids[::-1]
+
+
+def test_only_the_newest_candidates_are_ranked(temp_db, monkeypatch):
+    temp_db.seed_data()
+    with temp_db.transaction() as conn:
+        case_id = conn.execute("SELECT id FROM cases LIMIT 1").fetchone()[0]
+        oldest = _add_correspondence(conn, case_id, "Update", "physio physio review")
+        ids = [_add_correspondence(conn, case_id, "Update", f"{FILLER} physio {FILLER}") for _ in range(20)]
+    monkeypatch.setattr(search, "SEARCH_CANDIDATES", 10)
+
+    results = search.search("physio", kinds=["correspondence"])
+    assert sorted(r["id"] for r in results) == ids[-10:]
+    assert oldest not in [r["id"] for r in results]
+
+
+def test_typed_prefix_expands_to_indexed_terms(temp_db, monkeypatch):
+    temp_db.seed_data()
+    with temp_db.transaction() as conn:
+        case_id = conn.execute("SELECT id FROM cases LIMIT 1").fetchone()[0]
+        hydro = _add_correspondence(conn, case_id, "Update", "Hydrotherapy booked, hydrotherapist confirmed")
+        for n in range(3):
+            _add_correspondence(conn, case_id, "Update", f"zzterm{n} noted")
+    conn = temp_db.get_connection()
+
+    assert search.build_query("HYDRO", conn) == '("hydrotherapist" OR "hydrotherapy")'
+    assert search.build_query("hydro ", conn) == '"hydro"'
+    assert search.build_query("hydrox", conn) == '"hydrox"'
+    monkeypatch.setattr(search, "MAX_PREFIX_TERMS", 2)
+    assert search.build_query("zzterm", conn) == '"zzterm" *'
+
+    [result] = search.search("booked hydro", kinds=["correspondence"])
+    assert result["id"] == hydro
+    assert result["snippet"] == "**Hydrotherapy** **booked**, **hydrotherapist** confirmed"
+
+
+def test_snippet_centres_on_the_query_terms():
+    body = " ".join(f"w{n}" for n in range(30)) + " Back pain, worse at night " + " ".join(f"x{n}" for n in range(30))
+    text = search.snippet(body, '"back" AND "pa" *')
+    assert text.startswith("…") and text.endswith("…")
+    assert "**Back** **pain**," in text
+    assert len(text.strip("…").split()) == search.SNIPPET_WORDS
+    assert search.snippet("No match here", '"physio"') == "No match here"
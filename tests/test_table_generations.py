@@ -0,0 +1,44 @@
+"""Cache invalidation across processes: database.table_generations."""
+
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+from conftest import REPO_ROOT
+
+
+def _write_in_other_process(db_path, sql):
+    script = textwrap.dedent(f"""
+        import database as db
+        db.DB_PATH = {db_path!r}
+        with db.transaction() as conn:
+            conn.execute({sql!r})
+    """)
+    subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True)
+
+
+def test_local_write_bumps_only_written_table(temp_db):
+    before = temp_db.table_generations(("cases", "terminations"))
+    with temp_db.transaction() as conn:
+        conn.execute("INSERT INTO cases (worker_name, state) VALUES ('Local', 'NSW')")
+    after = temp_db.table_generations(("cases", "terminations"))
+    assert after[1] > before[1]
+    assert after[0] == before[0] and after[2] == before[2]
+
+
+def test_write_from_other_process_bumps_table(temp_db):
+    before = temp_db.table_generations(("cases", "terminations"))
+    _write_in_other_process(temp_db.DB_PATH, "INSERT INTO cases (worker_name, state) VALUES ('Worker', 'VIC')")
+    after = temp_db.table_generations(("cases", "terminations"))
+    assert after[1] > before[1]
+    assert after[0] == before[0] and after[2] == before[2]
+
+
+def test_write_outside_transaction_helper_bumps_epoch(temp_db):
+    before = temp_db.table_generations(("cases",))
+    conn = sqlite3.connect(temp_db.DB_PATH)
+    with conn:
+        conn.execute("INSERT INTO cases (worker_name, state) VALUES ('Raw', 'QLD')")
+    conn.close()
+    assert temp_db.table_generations(("cases",)) != before